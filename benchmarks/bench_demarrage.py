@@ -0,0 +1,87 @@
+"""
+Mesure le temps de démarrage de src/main.py, en processus séparés : ouverture du menu
+console (puis sortie immédiate) et sous-commandes sans menu (chercher, emprunter + retourner).
+Pour chaque mode, indique aussi si matplotlib ou ttkbootstrap ont été importés.
+
+Usage :
+    python benchmarks/bench_demarrage.py --livres 10000 --repetitions 5 --sortie demarrage.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(RACINE)]
+
+from benchmarks.generateur import generer_donnees, MOTS
+
+MAIN = RACINE / "src" / "main.py"
+MODULES_LOURDS = ("matplotlib", "ttkbootstrap")
+
+
+def lancer(arguments: list[str], entree: str = "", verifier: bool = True):
+    """Lance main.py avec -X importtime ; retourne (durée, modules lourds importés)."""
+    debut = time.perf_counter()
+    resultat = subprocess.run([sys.executable, "-X", "importtime", str(MAIN), *arguments],
+                              input=entree, capture_output=True, text=True, encoding="utf-8")
+    duree = time.perf_counter() - debut
+    if verifier and resultat.returncode != 0:
+        raise RuntimeError(f"main.py {' '.join(arguments)} : {resultat.stderr.strip().splitlines()[-1]}")
+    # importtime écrit une ligne par module sur stderr : "import time: ... | ... | nom"
+    importes = {ligne.rsplit("|", 1)[-1].strip() for ligne in resultat.stderr.splitlines()
+                if ligne.startswith("import time:")}
+    return duree, sorted(m for m in MODULES_LOURDS if m in importes)
+
+
+def mesurer_mode(arguments: list[str], repetitions: int, entree: str = ""):
+    durees = []
+    lourds = []
+    for _ in range(repetitions):
+        duree, lourds = lancer(arguments, entree)
+        durees.append(duree)
+    return {"mediane_ms": statistics.median(durees) * 1e3, "min_ms": min(durees) * 1e3,
+            "modules_lourds": lourds}
+
+
+def mesurer_tout(data_dir: Path, repetitions: int):
+    donnees = ["--data", str(data_dir)]
+    isbn = str(9780000000000)
+    id_membre = (data_dir / "membres.txt").read_text(encoding="utf-8").split(";", 1)[0]
+    resultats = {
+        "console": mesurer_mode([*donnees, "console"], repetitions, entree="0\n"),
+        "chercher": mesurer_mode([*donnees, "chercher", MOTS[0]], repetitions),
+    }
+    # L'emprunt et le retour se suivent : la bibliothèque revient à son état de départ.
+    # Avec un historique généré, le livre peut être déjà emprunté : le refus est chronométré aussi
+    emprunt_retour = [lancer([*donnees, commande, isbn, id_membre], verifier=False)
+                      for _ in range(repetitions) for commande in ("emprunter", "retourner")]
+    durees = [duree for duree, _ in emprunt_retour]
+    resultats["emprunter_retourner"] = {"mediane_ms": statistics.median(durees) * 1e3,
+                                        "min_ms": min(durees) * 1e3,
+                                        "modules_lourds": emprunt_retour[-1][1]}
+    return resultats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps de démarrage de main.py (menu console et sous-commandes)")
+    parser.add_argument("--livres", type=int, default=10_000)
+    parser.add_argument("--membres", type=int, default=1_000)
+    parser.add_argument("--evenements", type=int, default=0)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--sortie", type=Path, default=None, help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        generer_donnees(dossier, args.livres, args.membres, args.evenements)
+        resultats = {"livres": args.livres, "membres": args.membres, "evenements": args.evenements,
+                     "modes": mesurer_tout(Path(dossier), args.repetitions)}
+
+    texte = json.dumps(resultats, indent=2, ensure_ascii=False)
+    if args.sortie:
+        args.sortie.write_text(texte, encoding="utf-8")
+    print(texte)
@@ -0,0 +1,75 @@
+"""
+Compare la mémoire occupée par le catalogue selon sa représentation :
+classe à __dict__ (ancienne représentation), Livre à __slots__, catalogue en colonnes.
+
+Usage : python benchmarks/bench_memoire.py [nombre_de_livres]
+"""
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bibliotheque import Livre
+from catalogue_colonnes import CatalogueColonnes
+
+
+class LivreDict:
+    """Reproduction de l'ancienne classe Livre, avec un __dict__ par instance."""
+
+    def __init__(self, isbn, titre, auteur, annee, genre, statut="disponible"):
+        self.isbn = isbn
+        self.titre = titre
+        self.auteur = auteur
+        self.annee = annee
+        self.genre = genre
+        self.statut = statut
+
+
+def lignes_synthetiques(n: int, graine: int = 42):
+    rng = random.Random(graine)
+    genres = ["Roman", "Poésie", "Science-fiction", "Policier", "Essai", "Théâtre", "Histoire"]
+    nb_auteurs = max(1, n // 20)
+    for i in range(n):
+        statut = "disponible" if rng.random() < 0.8 else "emprunté"
+        ligne = f"{9780000000000 + i};Titre numéro {i};Auteur {rng.randrange(nb_auteurs)};{rng.randint(1800, 2024)};{rng.choice(genres)};{statut}"
+        # Découpage comme à la lecture de livres.txt : des chaînes neuves à chaque ligne
+        isbn, titre, auteur, annee, genre, statut = ligne.split(";")
+        yield isbn, titre, auteur, int(annee), genre, statut
+
+
+def mesurer(construire, n: int):
+    gc.collect()
+    tracemalloc.start()
+    catalogue = construire(lignes_synthetiques(n))
+    courant, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(catalogue) == n
+    return courant
+
+
+def catalogue_dict(lignes):
+    return {l[0]: LivreDict(*l) for l in lignes}
+
+
+def catalogue_slots(lignes):
+    return {l[0]: Livre(*l) for l in lignes}
+
+
+def catalogue_colonnes(lignes):
+    cat = CatalogueColonnes()
+    for l in lignes:
+        cat[l[0]] = Livre(*l)
+    return cat
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    resultats = {"livres": n}
+    for nom, construire in [("dict", catalogue_dict), ("slots", catalogue_slots), ("colonnes", catalogue_colonnes)]:
+        octets = mesurer(construire, n)
+        resultats[nom] = {"octets": octets, "octets_par_livre": round(octets / n, 1)}
+    print(json.dumps(resultats, indent=2))
@@ -0,0 +1,135 @@
+"""
+Mesure les opérations courantes de Bibliotheque sur une bibliothèque synthétique
+et écrit les résultats en JSON pour comparer deux exécutions.
+
+Usage :
+    python benchmarks/bench_operations.py --livres 10000 --membres 1000 --evenements 100000 --sortie resultats.json
+    python benchmarks/bench_operations.py ... --reference anciens_resultats.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(RACINE / "src"), str(RACINE)]
+
+from bibliotheque import Bibliotheque
+from statistiques import Statistiques
+from benchmarks.generateur import generer_donnees, GENRES, MOTS
+import visualisations as vis
+
+
+def chronometrer(fonction, repetitions: int = 3):
+    """Exécute fonction plusieurs fois (sorties console masquées) et retourne les durées."""
+    durees = []
+    for _ in range(repetitions):
+        with contextlib.redirect_stdout(io.StringIO()):
+            debut = time.perf_counter()
+            fonction()
+            durees.append(time.perf_counter() - debut)
+    return durees
+
+
+def executer(data_dir: Path, repetitions: int, nb_operations: int, graine: int = 42):
+    rng = random.Random(graine)
+    resultats = {}
+
+    def mesurer(nom, fonction, operations=1):
+        durees = chronometrer(fonction, repetitions)
+        resultats[nom] = {
+            "min_s": min(durees),
+            "moyenne_s": sum(durees) / len(durees),
+            "operations": operations,
+            "par_operation_us": min(durees) / operations * 1e6,
+        }
+
+    biblio = Bibliotheque(data_dir)
+    mesurer("charger_tout", biblio.charger_tout)
+    mesurer("sauvegarder_tout", biblio.sauvegarder_tout)
+
+    requetes = [rng.choice(MOTS) for _ in range(nb_operations)]
+    mesurer("chercher_livre_par_titre", lambda: [biblio.chercher_livre_par_titre(q) for q in requetes], nb_operations)
+    noms = [m.nom.split()[0] for m in rng.sample(list(biblio.membres.values()), min(nb_operations, len(biblio.membres)))]
+    mesurer("chercher_membre_par_nom", lambda: [biblio.chercher_membre_par_nom(n) for n in noms], len(noms))
+
+    # Emprunts puis retours des mêmes couples (membres sans emprunt en cours, livres disponibles)
+    disponibles = [l.isbn for l in biblio.livres.values() if l.est_disponible()]
+    libres = [m.id_membre for m in biblio.membres.values() if not m.livres_empruntes]
+    couples = list(zip(rng.sample(disponibles, min(nb_operations, len(disponibles))), libres))
+
+    def emprunts_retours():
+        for isbn, idm in couples:
+            biblio.emprunter(isbn, idm)
+        for isbn, idm in couples:
+            biblio.retourner(isbn, idm)
+    mesurer("emprunter_retourner", emprunts_retours, 2 * len(couples))
+
+    journalisee = Bibliotheque(data_dir, journal=True)
+    journalisee.charger_tout()
+
+    def emprunts_retours_journal():
+        for isbn, idm in couples:
+            journalisee.emprunter(isbn, idm)
+            journalisee.sauvegarder_tout()
+            journalisee.retourner(isbn, idm)
+            journalisee.sauvegarder_tout()
+    mesurer("emprunter_retourner_journal", emprunts_retours_journal, 2 * len(couples))
+    journalisee.compacter()
+
+    mesurer("afficher_historique", biblio.afficher_historique)
+    mesurer("statistiques_reconstruction", lambda: Statistiques.depuis_historique(biblio.historique, biblio.livres))
+    mesurer("calcul_repartition_genres", lambda: vis.calcul_repartition_genres(biblio.index_catalogue))
+    genres = [rng.choice(GENRES) for _ in range(nb_operations)]
+    mesurer("filtrer_genre_disponibles",
+            lambda: [biblio.compter_livres(genre=g, statut="disponible") for g in genres], len(genres))
+    stats = biblio.statistiques
+    mesurer("top_auteurs", lambda: stats.top_auteurs())
+    mesurer("activite_emprunts", lambda: stats.activite())
+    return resultats
+
+
+def comparer(resultats: dict, reference: dict):
+    print(f"{'opération':32} {'référence (s)':>14} {'actuel (s)':>12} {'ratio':>8}")
+    for nom, mesure in resultats.items():
+        ancien = reference.get(nom)
+        if not ancien:
+            continue
+        ratio = mesure["min_s"] / ancien["min_s"] if ancien["min_s"] else float("inf")
+        print(f"{nom:32} {ancien['min_s']:14.4f} {mesure['min_s']:12.4f} {ratio:8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks des opérations de la bibliothèque")
+    parser.add_argument("--livres", type=int, default=10_000)
+    parser.add_argument("--membres", type=int, default=1_000)
+    parser.add_argument("--evenements", type=int, default=100_000)
+    parser.add_argument("--operations", type=int, default=200, help="Nombre de recherches / emprunts mesurés")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--graine", type=int, default=42)
+    parser.add_argument("--sortie", type=Path, default=None, help="Fichier JSON des résultats")
+    parser.add_argument("--reference", type=Path, default=None, help="Résultats JSON d'une exécution précédente")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        generer_donnees(dossier, args.livres, args.membres, args.evenements, args.graine)
+        resultats = executer(Path(dossier), args.repetitions, args.operations, args.graine)
+
+    rapport = {
+        "parametres": {k: v for k, v in vars(args).items() if k not in ("sortie", "reference")},
+        "environnement": {"python": platform.python_version(), "plateforme": platform.platform()},
+        "resultats": resultats,
+    }
+    texte = json.dumps(rapport, indent=2, ensure_ascii=False, default=str)
+    if args.sortie:
+        args.sortie.write_text(texte, encoding="utf-8")
+    else:
+        print(texte)
+    if args.reference:
+        comparer(resultats, json.loads(args.reference.read_text(encoding="utf-8"))["resultats"])
@@ -0,0 +1,172 @@
+"""
+Test de charge de l'API HTTP (src/serveur_api.py) : plusieurs bornes simulées envoient
+des requêtes en continu sur des connexions persistantes, puis le débit (requêtes par
+seconde) et les latences sont écrits en JSON.
+
+Sans --url, une bibliothèque synthétique est générée et un serveur local est lancé.
+
+Usage :
+    python benchmarks/charge_api.py --bornes 20 --duree 10
+    python benchmarks/charge_api.py --url http://127.0.0.1:8080 --bornes 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+RACINE = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(RACINE)]
+
+from benchmarks.generateur import generer_donnees, MOTS
+
+
+class Connexion:
+    """Client HTTP/1.1 minimal sur une connexion persistante."""
+
+    def __init__(self, hote: str, port: int):
+        self.hote, self.port = hote, port
+        self.reader = self.writer = None
+
+    async def ouvrir(self):
+        self.reader, self.writer = await asyncio.open_connection(self.hote, self.port)
+
+    async def requete(self, methode: str, chemin: str, corps: dict | None = None):
+        donnees = json.dumps(corps).encode() if corps is not None else b""
+        self.writer.write(
+            f"{methode} {chemin} HTTP/1.1\r\nHost: {self.hote}\r\nContent-Length: {len(donnees)}\r\n\r\n".encode()
+            + donnees
+        )
+        await self.writer.drain()
+        statut = int((await self.reader.readline()).split()[1])
+        longueur = 0
+        while True:
+            ligne = await self.reader.readline()
+            if ligne in (b"\r\n", b""):
+                break
+            nom, _, valeur = ligne.decode().partition(":")
+            if nom.lower() == "content-length":
+                longueur = int(valeur)
+        return statut, json.loads(await self.reader.readexactly(longueur))
+
+    def fermer(self):
+        self.writer.close()
+
+
+async def borne(numero: int, hote: str, port: int, fin: float, isbns: list[str], mesures: dict):
+    """Une borne : recherches, pages du catalogue, puis emprunt et retour d'un livre qui lui est réservé."""
+    rng = random.Random(numero)
+    connexion = Connexion(hote, port)
+    await connexion.ouvrir()
+    id_membre = str(numero + 1)
+    # La borne feuillette le catalogue page après page, puis recommence au début
+    curseur = None
+    try:
+        while time.perf_counter() < fin:
+            isbn = rng.choice(isbns)
+            liste = "/livres?taille=50" + (f"&curseur={quote(curseur)}" if curseur else "")
+            requetes = [
+                ("recherche", "GET", f"/livres/recherche?q={quote(rng.choice(MOTS))}&limite=20", None),
+                ("liste", "GET", liste, None),
+                ("emprunt", "POST", "/emprunts", {"isbn": isbn, "id_membre": id_membre}),
+                ("retour", "POST", "/retours", {"isbn": isbn, "id_membre": id_membre}),
+                ("historique", "GET", "/historique?n=20", None),
+            ]
+            for nom, methode, chemin, corps in requetes:
+                debut = time.perf_counter()
+                statut, reponse = await connexion.requete(methode, chemin, corps)
+                mesures.setdefault(nom, []).append(time.perf_counter() - debut)
+                if nom == "liste" and statut == 200:
+                    curseur = reponse["curseur_suivant"]
+                if statut >= 500:
+                    mesures.setdefault("erreurs", []).append(statut)
+    finally:
+        connexion.fermer()
+
+
+def resume(durees: list[float]):
+    durees = sorted(durees)
+    rang = lambda q: durees[min(len(durees) - 1, int(q * len(durees)))]
+    return {"requetes": len(durees), "p50_ms": rang(0.5) * 1e3, "p95_ms": rang(0.95) * 1e3, "p99_ms": rang(0.99) * 1e3}
+
+
+async def charger(hote: str, port: int, nb_bornes: int, duree: float, nb_livres: int):
+    # Chaque borne a ses propres livres : les emprunts ne se gênent pas entre bornes
+    mesures = {}
+    debut = time.perf_counter()
+    fin = debut + duree
+    await asyncio.gather(*(
+        borne(k, hote, port, fin, [str(9780000000000 + i) for i in range(k, nb_livres, nb_bornes)], mesures)
+        for k in range(nb_bornes)
+    ))
+    ecoule = time.perf_counter() - debut
+    erreurs = mesures.pop("erreurs", [])
+    total = sum(len(d) for d in mesures.values())
+    return {
+        "bornes": nb_bornes,
+        "duree_s": ecoule,
+        "requetes": total,
+        "requetes_par_seconde": total / ecoule,
+        "erreurs": len(erreurs),
+        "par_requete": {nom: resume(d) for nom, d in mesures.items()},
+    }
+
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def attendre_serveur(port: int, delai: float = 60):
+    limite = time.time() + delai
+    while time.time() < limite:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Le serveur ne répond pas")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test de charge de l'API HTTP de la bibliothèque")
+    parser.add_argument("--url", default=None, help="Serveur existant (sinon un serveur local est lancé)")
+    parser.add_argument("--bornes", type=int, default=20)
+    parser.add_argument("--duree", type=float, default=10)
+    parser.add_argument("--livres", type=int, default=10_000)
+    parser.add_argument("--sortie", type=Path, default=None, help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    serveur = None
+    dossier = None
+    if args.url:
+        url = urlsplit(args.url)
+        hote, port = url.hostname, url.port or 80
+    else:
+        dossier = tempfile.TemporaryDirectory()
+        generer_donnees(dossier.name, args.livres, max(args.bornes, 100), 0)
+        hote, port = "127.0.0.1", port_libre()
+        serveur = subprocess.Popen([sys.executable, str(RACINE / "src" / "serveur_api.py"),
+                                    "--data", dossier.name, "--port", str(port)], stdout=subprocess.DEVNULL)
+    try:
+        if serveur:
+            attendre_serveur(port)
+        resultats = asyncio.run(charger(hote, port, args.bornes, args.duree, args.livres))
+    finally:
+        if serveur:
+            serveur.terminate()
+            serveur.wait()
+        if dossier:
+            dossier.cleanup()
+
+    texte = json.dumps(resultats, indent=2, ensure_ascii=False)
+    if args.sortie:
+        args.sortie.write_text(texte, encoding="utf-8")
+    print(texte)
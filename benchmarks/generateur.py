@@ -0,0 +1,118 @@
+"""
+Générateur déterministe de bibliothèques synthétiques (livres.txt, membres.txt, historique.csv).
+
+Usage : python benchmarks/generateur.py DOSSIER --livres 10000 --membres 1000 --evenements 100000
+"""
+import argparse
+import csv
+import datetime
+import random
+from pathlib import Path
+
+GENRES = ["Roman", "Poésie", "Science-fiction", "Policier", "Essai", "Théâtre", "Histoire",
+          "Fantasy", "Biographie", "Conte philosophique", "Dystopie", "Thriller"]
+MOTS = ["le", "la", "nuit", "mer", "rouge", "noir", "prince", "étranger", "misérables", "guerre",
+        "paix", "jardin", "ombre", "lumière", "voyage", "secret", "maison", "château", "fleurs", "temps",
+        "mémoires", "cité", "dernier", "premier", "éternel", "silence", "retour", "horizon", "île", "loup"]
+PRENOMS = ["Youssef", "Fatima", "Mohamed", "Khadija", "Rachid", "Sanae", "Adil", "Nadia", "Hassan",
+           "Leila", "Salma", "Omar", "Amina", "Karim", "Sofia", "Mehdi"]
+NOMS = ["El Amrani", "Bennani", "Boukili", "El Idrissi", "Ouarzazi", "Bensalem", "Charkaoui",
+        "El Mansouri", "Tazi", "Bouzid", "Barrak", "Alaoui", "Berrada", "Chraibi"]
+
+
+def livres_synthetiques(n: int, graine: int = 42):
+    """Produit n tuples (isbn, titre, auteur, annee, genre, statut) reproductibles."""
+    rng = random.Random(graine)
+    nb_auteurs = max(1, n // 20)
+    for i in range(n):
+        titre = " ".join(rng.choice(MOTS) for _ in range(rng.randint(1, 4))).capitalize() + f" {i}"
+        auteur = f"{rng.choice(PRENOMS)} {rng.choice(NOMS)} {rng.randrange(nb_auteurs)}"
+        yield (str(9780000000000 + i), titre, auteur, rng.randint(1800, 2024), rng.choice(GENRES), "disponible")
+
+
+def membres_synthetiques(n: int, graine: int = 42):
+    rng = random.Random(graine + 1)
+    for i in range(1, n + 1):
+        yield (str(i), f"{rng.choice(PRENOMS)} {rng.choice(NOMS)}")
+
+
+def generer_donnees(data_dir: str | Path, nb_livres: int, nb_membres: int, nb_evenements: int,
+                    graine: int = 42, quota: int = 5, jours: int = 365):
+    """
+    Écrit une bibliothèque cohérente dans data_dir : l'historique alterne emprunts et retours
+    en respectant les quotas, et l'état final des livres et des membres en découle.
+    """
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(graine + 2)
+    isbns = [str(9780000000000 + i) for i in range(nb_livres)]
+    ids = [str(i) for i in range(1, nb_membres + 1)]
+
+    # Emprunts en cours : liste + positions pour tirer et retirer au hasard en O(1)
+    en_cours = []
+    position = {}
+    emprunteur = {}
+    date_emprunt = {}
+    nb_par_membre = dict.fromkeys(ids, 0)
+    debut = datetime.date.today() - datetime.timedelta(days=jours)
+
+    def retourner_au_hasard(date):
+        k = rng.randrange(len(en_cours))
+        isbn = en_cours[k]
+        dernier = en_cours.pop()
+        if dernier != isbn:
+            en_cours[k] = dernier
+            position[dernier] = k
+        del position[isbn]
+        idm = emprunteur.pop(isbn)
+        del date_emprunt[isbn]
+        nb_par_membre[idm] -= 1
+        return [date, isbn, idm, "retour"]
+
+    # Plus il y a d'emprunts en cours, plus un retour est probable : le stock reste stable
+    capacite = max(1, min(nb_livres, nb_membres * quota) // 2)
+    with open(data_dir / "historique.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "isbn", "id_membre", "action"])
+        for i in range(nb_evenements):
+            date = (debut + datetime.timedelta(days=i * jours // max(1, nb_evenements))).isoformat()
+            if en_cours and rng.random() < len(en_cours) / capacite:
+                writer.writerow(retourner_au_hasard(date))
+                continue
+            isbn = rng.choice(isbns)
+            idm = rng.choice(ids)
+            if isbn in position or nb_par_membre[idm] >= quota:
+                if en_cours:
+                    writer.writerow(retourner_au_hasard(date))
+                continue
+            position[isbn] = len(en_cours)
+            en_cours.append(isbn)
+            emprunteur[isbn] = idm
+            date_emprunt[isbn] = date
+            nb_par_membre[idm] += 1
+            writer.writerow([date, isbn, idm, "emprunt"])
+
+    emprunts_par_membre = {}
+    for isbn, idm in emprunteur.items():
+        emprunts_par_membre.setdefault(idm, []).append(f"{isbn}@{date_emprunt[isbn]}")
+
+    with open(data_dir / "livres.txt", "w", encoding="utf-8") as f:
+        for isbn, titre, auteur, annee, genre, _ in livres_synthetiques(nb_livres, graine):
+            statut = "emprunté" if isbn in emprunteur else "disponible"
+            f.write(";".join([isbn, titre, auteur, str(annee), genre, statut]) + "\n")
+    with open(data_dir / "membres.txt", "w", encoding="utf-8") as f:
+        for idm, nom in membres_synthetiques(nb_membres, graine):
+            f.write(";".join([idm, nom, ",".join(emprunts_par_membre.get(idm, []))]) + "\n")
+    return data_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère une bibliothèque synthétique")
+    parser.add_argument("dossier", type=Path)
+    parser.add_argument("--livres", type=int, default=10_000)
+    parser.add_argument("--membres", type=int, default=1_000)
+    parser.add_argument("--evenements", type=int, default=100_000)
+    parser.add_argument("--graine", type=int, default=42)
+    args = parser.parse_args()
+    generer_donnees(args.dossier, args.livres, args.membres, args.evenements, args.graine)
+    print(f"Données générées dans {args.dossier}")
@@ -1,24 +1,52 @@
+import contextlib
 import datetime
-import csv
+import heapq
+import json
+import os
+import sys
+from functools import wraps
+from itertools import islice
 from pathlib import Path
 
 from exceptions import (
     LivreIndisponibleError,
     QuotaEmpruntDepasseError,
     MembreInexistantError,
-    LivreInexistantError
+    LivreInexistantError,
+    EmpruntInexistantError,
+    ReservationImpossibleError,
+    ReservationInexistanteError
+)
+from echeances import ReglesPret, Echeancier, Amendes, jours_entre, formater_montant
+from exemplaires import Exemplaires, Stock, DETENTEUR_INCONNU
+from journal import Journal
+from reservations import Reservations
+from verrou import VerrouFichier
+from historique import Historique, HistoriquePartitionne
+from index_texte import IndexTexte, normaliser
+from index_catalogue import IndexCatalogue
+from instrumentation import mesurer
+from statistiques import Statistiques
+from import_export import (
+    CHAMPS_LIVRES, CHAMPS_MEMBRES, RapportImport,
+    valider_livre, valider_membre, ecrire_enregistrements
 )
 
 # ===================== CLASSE Livre =====================
 
 class Livre:
+    # Pas de __dict__ par instance : important quand le catalogue compte des millions de livres
+    __slots__ = ("isbn", "titre", "auteur", "annee", "genre", "statut")
+
     def __init__(self, isbn: str, titre: str, auteur: str, annee: int, genre: str, statut: str = "disponible"):
         self.isbn = isbn
         self.titre = titre
-        self.auteur = auteur
+        # Auteurs, genres et statuts se répètent : une seule copie de chaque chaîne
+        self.auteur = sys.intern(auteur)
         self.annee = annee
-        self.genre = genre
-        self.statut = statut  # "disponible" ou "emprunté"
+        self.genre = sys.intern(genre)
+        # "disponible" (un exemplaire libre au moins), "emprunté" ou "réservé" (mis de côté)
+        self.statut = sys.intern(statut)
 
     def est_disponible(self):
         return self.statut == "disponible"
@@ -56,27 +84,29 @@ class Livre:
 # ===================== CLASSE Membre =====================
 
 class Membre:
+    __slots__ = ("id_membre", "nom", "livres_empruntes", "quota_max")
+
     def __init__(self, id_membre: str, nom: str, quota_max: int = 5):
         self.id_membre = id_membre
         self.nom = nom
-        self.livres_empruntes = []
+        # Emprunts en cours : isbn -> date d'emprunt ISO ("" si inconnue)
+        self.livres_empruntes = {}
         self.quota_max = quota_max
 
     def peut_emprunter(self):
         return len(self.livres_empruntes) < self.quota_max
 
-    def emprunter(self, isbn: str):
+    def emprunter(self, isbn: str, date_iso: str = ""):
         if not self.peut_emprunter():
             raise QuotaEmpruntDepasseError(f"Le membre '{self.nom}' (ID {self.id_membre}) a atteint son quota.")
-        self.livres_empruntes.append(isbn)
+        self.livres_empruntes[isbn] = date_iso
 
     def retourner(self, isbn: str):
-        if isbn in self.livres_empruntes:
-            self.livres_empruntes.remove(isbn)
+        self.livres_empruntes.pop(isbn, None)
 
     def to_line(self):
         nom = self.nom.replace(";", ",")
-        emprunts = ",".join(self.livres_empruntes)
+        emprunts = ",".join(f"{isbn}@{date}" if date else isbn for isbn, date in self.livres_empruntes.items())
         return ";".join([self.id_membre, nom, emprunts])
 
     @classmethod
@@ -87,137 +117,1142 @@ class Membre:
         id_membre, nom = parts[0], parts[1]
         m = cls(id_membre=id_membre, nom=nom)
         if len(parts) >= 3 and parts[2]:
-            m.livres_empruntes = parts[2].split(",")
+            # Format "isbn@date" ; les anciennes lignes n'ont que l'isbn (doublons fusionnés)
+            for emprunt in parts[2].split(","):
+                isbn, _, date = emprunt.partition("@")
+                m.livres_empruntes[isbn] = date
         return m
 
     def __str__(self):
         return f"{self.nom} (ID {self.id_membre}) - emprunts: {len(self.livres_empruntes)}"
 
 
+# ===================== Pagination =====================
+
+# Clés de tri proposées par les requêtes paginées
+CLES_TRI_LIVRES = {
+    "isbn": lambda l: l.isbn,
+    "titre": lambda l: normaliser(l.titre),
+    "auteur": lambda l: normaliser(l.auteur),
+    "annee": lambda l: l.annee,
+}
+CLES_TRI_MEMBRES = {
+    "id_membre": lambda m: m.id_membre,
+    "nom": lambda m: normaliser(m.nom),
+    "emprunts": lambda m: len(m.livres_empruntes),
+}
+
+
+def paginer(elements, curseur: str | None = None, limite: int = 50, cle=None, ident=None, decroissant: bool = False):
+    """
+    Découpe un itérable en pages et retourne (page, curseur_suivant), le curseur valant
+    None à la dernière page. Sans clé de tri, le curseur est une position dans l'itérable ;
+    avec une clé, c'est la clé du dernier élément rendu (départagée par ident) : chaque page
+    ne garde que les limite + 1 meilleurs éléments au lieu de trier tout l'ensemble.
+    """
+    if limite <= 0:
+        raise ValueError("La taille de page doit être positive.")
+    if cle is None:
+        debut = int(curseur or 0)
+        page = list(islice(elements, debut, debut + limite + 1))
+        return page[:limite], (str(debut + limite) if len(page) > limite else None)
+
+    def cle_complete(element):
+        return (cle(element), ident(element))
+
+    if curseur is not None:
+        dernier = tuple(json.loads(curseur))
+        if decroissant:
+            elements = (e for e in elements if cle_complete(e) < dernier)
+        else:
+            elements = (e for e in elements if cle_complete(e) > dernier)
+    choisir = heapq.nlargest if decroissant else heapq.nsmallest
+    page = choisir(limite + 1, elements, key=cle_complete)
+    suivant = json.dumps(cle_complete(page[limite - 1]), ensure_ascii=False) if len(page) > limite else None
+    return page[:limite], suivant
+
+
 # ===================== CLASSE Bibliotheque =====================
 
+def exclusif(methode):
+    """
+    Mode partagé : la mutation s'exécute sous le verrou du dossier de données,
+    après avoir appliqué les changements enregistrés par les autres processus.
+    """
+    @wraps(methode)
+    def enveloppe(self, *args, **kwargs):
+        if self.verrou is None:
+            return methode(self, *args, **kwargs)
+        with self._mutation():
+            return methode(self, *args, **kwargs)
+    return enveloppe
+
+
+# Valeurs de --stockage et de BIBLIO_STOCKAGE
+STOCKAGES = ("texte", "binaire", "sqlite")
+
+
+def ouvrir_bibliotheque(data_dir: str | Path, stockage: str = "texte", **options):
+    """
+    Crée la bibliothèque avec le stockage demandé : "texte" (livres.txt, membres.txt,
+    historique.csv), "binaire" (instantanés livres.bin et membres.bin, voir
+    instantane_binaire.py) ou "sqlite" (data/bibliotheque.db).
+    """
+    if stockage == "sqlite":
+        # Import local : stockage_sqlite dépend de ce module. La base est lue à la demande et
+        # chaque mutation est une transaction : seul le mode partagé s'applique
+        from stockage_sqlite import BibliothequeSQLite
+        return BibliothequeSQLite(Path(data_dir) / "bibliotheque.db", partage=options.get("partage", False))
+    if stockage == "binaire":
+        # Les instantanés binaires se lisent d'un bloc : pas de lecture paresseuse de livres.txt
+        options.pop("paresseux", None)
+        return Bibliotheque(data_dir, binaire=True, **options)
+    if stockage != "texte":
+        raise ValueError(f"Stockage inconnu : '{stockage}'")
+    return Bibliotheque(data_dir, **options)
+
+
 class Bibliotheque:
-    def __init__(self, data_dir: str | Path):
+    def __init__(self, data_dir: str | Path, journal: bool = False, seuil_compaction: int = 1_000_000,
+                 compact: bool = False, paresseux: bool = False, binaire: bool = False, partage: bool = False,
+                 partitionne: bool = False):
         self.data_dir = Path(data_dir)
         self.file_livres = self.data_dir / "livres.txt"
         self.file_membres = self.data_dir / "membres.txt"
+        # Mode binaire : instantanés livres.bin / membres.bin avec somme de contrôle
+        self.binaire = binaire
+        self.file_livres_bin = self.data_dir / "livres.bin"
+        self.file_membres_bin = self.data_dir / "membres.bin"
         self.file_historique = self.data_dir / "historique.csv"
+        self.file_reservations = self.data_dir / "reservations.txt"
+        self.file_exemplaires = self.data_dir / "exemplaires.txt"
+        self.dossier_historique = self.data_dir / "historique"
         self.livres = {}
+        if compact:
+            # Mode compact : catalogue stocké par colonnes, même interface qu'un dict isbn -> Livre
+            # (import local : catalogue_colonnes dépend de ce module)
+            from catalogue_colonnes import CatalogueColonnes
+            self.livres = CatalogueColonnes()
+        # Mode paresseux : livres.txt est projeté en mémoire, chaque livre n'est lu qu'au premier accès
+        self.paresseux = paresseux
+        if paresseux:
+            if compact or binaire:
+                raise ValueError("Le mode paresseux ne peut pas être combiné aux modes compact ou binaire.")
+            from catalogue_paresseux import CatalogueParesseux
+            self.livres = CatalogueParesseux()
         self.membres = {}
-        self.historique = []
+        # Index inverse des emprunts en cours : isbn -> ids des membres qui en ont un exemplaire
+        self.emprunteurs = {}
+        # Historique en ajout seul sur disque : rien n'est chargé en mémoire. Mode partitionné :
+        # une partition indexée par mois ; choisi aussi dès que le dossier des partitions existe
+        self.partitionne = partitionne or self.dossier_historique.is_dir()
+        if self.partitionne:
+            self.historique = HistoriquePartitionne(self.dossier_historique)
+        else:
+            self.historique = Historique(self.file_historique)
+        # Index de recherche plein texte, tenus à jour à chaque ajout ou suppression
+        self.index_livres = IndexTexte({"titre": 3, "auteur": 2, "genre": 1})
+        self.index_membres = IndexTexte({"nom": 1})
+        # Index secondaires : genre, auteur et statut -> isbns
+        self.index_catalogue = IndexCatalogue()
+        # Statistiques construites à la première consultation puis tenues à jour
+        self._statistiques = None
+        # Fichier -> numéros des lignes invalides ignorées au dernier chargement
+        self.lignes_ignorees = {}
+        # Dates de retour des emprunts en cours (durées de prêt de regles_pret.json) et amendes
+        self.regles_pret = ReglesPret.charger(self.data_dir / "regles_pret.json")
+        self.echeancier = Echeancier()
+        self.amendes = Amendes(self.data_dir / "amendes.csv")
+        # Files d'attente des livres empruntés et exemplaires mis de côté pour leur réservataire
+        self.reservations = Reservations()
+        # Exemplaires (codes-barres) de chaque titre et compteurs disponibles / total
+        self.exemplaires = Exemplaires(self._stock_initial)
+        # Mode journal : chaque mutation est ajoutée à journal.log au lieu de tout réécrire
+        self.journal = Journal(self.data_dir / "journal.log", seuil_compaction) if journal or partage else None
+        # Mode partagé (plusieurs processus sur le même dossier) : les mutations passent par un
+        # verrou de fichier et chaque processus rejoue le journal des autres avant d'écrire
+        self.verrou = VerrouFichier(self.data_dir / "bibliotheque.lock") if partage else None
 
     def charger_tout(self):
         self.data_dir.mkdir(parents=True, exist_ok=True)
-        self.charger_livres()
-        self.charger_membres()
-        self.charger_historique()
+        with self.verrou or contextlib.nullcontext():
+            self.charger_livres()
+            self.charger_membres()
+            self.charger_reservations()
+            self.charger_exemplaires()
+            self.charger_historique()
+            self.amendes.recharger()
+            self.echeancier.differer(self._echeances_en_cours)
+            if self.journal:
+                self.rejouer_journal()
 
+    @mesurer
+    def synchroniser(self):
+        """
+        Mode partagé : applique les mutations journalisées par les autres processus depuis
+        la dernière lecture. Si le journal a été replié sans que ces mutations aient été
+        lues, tout est rechargé. Retourne True si l'état a changé.
+        """
+        if self.verrou is None:
+            return False
+        with self.verrou:
+            nouveaux = self.journal.nouveaux_enregistrements()
+            if nouveaux is None:
+                self.charger_tout()
+                return True
+            for enregistrement in nouveaux:
+                self._rejouer_enregistrement(enregistrement)
+            if nouveaux:
+                # L'historique a grandi : compteurs et statistiques à recalculer
+                self.historique.recharger()
+                self._statistiques = None
+                self.amendes.recharger()
+            return bool(nouveaux)
+
+    @contextlib.contextmanager
+    def _mutation(self):
+        """
+        Mode partagé, autour de chaque mutation (voir exclusif) : verrou du dossier, puis
+        mutations des autres processus appliquées. Le journal reçoit ensuite chaque changement.
+        """
+        with self.verrou:
+            self.synchroniser()
+            yield
+
+    @property
+    def version(self):
+        """Numéro de la dernière mutation journalisée connue (None hors mode journal)."""
+        return self.journal.seq if self.journal else None
+
+    @exclusif
     def sauvegarder_tout(self):
+        if self.journal:
+            # Les mutations sont déjà sur disque, on ne replie que si le journal est trop gros
+            if self.journal.doit_compacter():
+                self.compacter()
+            return
+        self._ecrire_instantanes()
+
+    @mesurer
+    @exclusif
+    def compacter(self):
+        self._ecrire_instantanes()
+        if self.journal:
+            self.journal.marquer_point_controle()
+
+    def _ecrire_instantanes(self):
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.sauvegarder_livres()
         self.sauvegarder_membres()
+        self.sauvegarder_reservations()
+        self.sauvegarder_exemplaires()
         self.sauvegarder_historique()
 
+    def rejouer_journal(self):
+        for enregistrement in self.journal.relire():
+            self._rejouer_enregistrement(enregistrement)
+
+    def _rejouer_enregistrement(self, enr: dict, attribuer: bool = True):
+        try:
+            self._appliquer_enregistrement(enr, attribuer)
+        except (KeyError, LivreIndisponibleError, QuotaEmpruntDepasseError):
+            # Enregistrement déjà replié (arrêt entre instantané et point de contrôle)
+            pass
+
+    def _appliquer_enregistrement(self, enr: dict, attribuer: bool = True):
+        # L'événement d'historique a déjà été ajouté à historique.csv avant le journal
+        op = enr["op"]
+        if op == "emprunt":
+            self._appliquer_emprunt(enr["isbn"], enr["id_membre"], enr["date"], historiser=False,
+                                    code=enr.get("exemplaire"))
+        elif op == "retour":
+            self._appliquer_retour(enr["isbn"], enr["id_membre"], enr["date"], historiser=False)
+            if attribuer:
+                self._attribuer_reservation(enr["isbn"], enr["date"])
+        elif op == "ajout_livre":
+            self._inserer_livre(Livre(enr["isbn"], enr["titre"], enr["auteur"], enr["annee"], enr["genre"]))
+        elif op == "suppression_livre":
+            self._retirer_livre(enr["isbn"])
+        elif op == "ajout_membre":
+            self._inserer_membre(Membre(enr["id_membre"], enr["nom"]))
+        elif op == "reservation":
+            self.reservations.ajouter(enr["isbn"], enr["id_membre"], enr["date"])
+        elif op == "annulation_reservation":
+            self._appliquer_annulation_reservation(enr["isbn"], enr["id_membre"], enr["date"])
+        elif op == "expiration_reservations":
+            for isbn, id_membre in enr["mises"]:
+                self._liberer_mise_de_cote(isbn, id_membre, enr["date"])
+        elif op == "ajout_exemplaires":
+            self._ajouter_exemplaires(enr["isbn"], enr["codes"])
+            if attribuer:
+                self._attribuer_reservation(enr["isbn"], enr["date"])
+        elif op == "retrait_exemplaire":
+            self._retirer_exemplaire(enr["isbn"], enr["code"])
+        elif op == "paiement_amende":
+            # Le paiement est dans amendes.csv : seuls les soldes sont à relire
+            self.amendes.recharger()
+        elif op == "lot":
+            # Comme dans traiter_lot : les livres rendus ne sont attribués qu'une fois le lot appliqué
+            for sous_enr in enr["operations"]:
+                self._rejouer_enregistrement(sous_enr, attribuer=False)
+            for sous_enr in enr["operations"]:
+                if sous_enr["op"] == "retour":
+                    self._attribuer_reservation(sous_enr["isbn"], sous_enr["date"])
+
+    def _journaliser(self, op: str, **donnees):
+        if self.journal:
+            self.historique.vider()
+            self.journal.ajouter(op, **donnees)
+
+    def _inserer_livre(self, livre: Livre):
+        ancien = self.livres.get(livre.isbn)
+        if ancien is not None:
+            self.index_catalogue.retirer(ancien.isbn, ancien.genre, ancien.auteur, ancien.statut)
+        self.livres[livre.isbn] = livre
+        self.index_livres.ajouter(livre.isbn, titre=livre.titre, auteur=livre.auteur, genre=livre.genre)
+        self.index_catalogue.ajouter(livre.isbn, livre.genre, livre.auteur, livre.statut)
+
+    def _retirer_livre(self, isbn: str):
+        livre = self.livres[isbn]
+        del self.livres[isbn]
+        for id_membre in self.emprunteurs.get(isbn, ()):
+            self.echeancier.retirer(isbn, id_membre)
+        self.reservations.oublier_livre(isbn)
+        self.exemplaires.oublier(isbn)
+        self.index_livres.retirer(isbn)
+        self.index_catalogue.retirer(isbn, livre.genre, livre.auteur, livre.statut)
+
+    def _inserer_membre(self, membre: Membre):
+        self.membres[membre.id_membre] = membre
+        self.index_membres.ajouter(membre.id_membre, nom=membre.nom)
+
+    def _appliquer_emprunt(self, isbn: str, id_membre: str, date_iso: str, historiser: bool = True,
+                           code: str | None = None):
+        """Prête au membre un exemplaire du livre (code à la relecture du journal) ; retourne son code-barres."""
+        livre = self.livres[isbn]
+        membre = self.membres[id_membre]
+        stock = self.exemplaires.stock(isbn)
+        if isbn in membre.livres_empruntes:
+            raise LivreIndisponibleError(f"Le membre ID {id_membre} a déjà emprunté le livre ISBN {isbn}.")
+        # Un exemplaire mis de côté ne peut être emprunté que par son réservataire
+        de_cote = id_membre in stock.reserves
+        if not de_cote and not stock.libres:
+            expiration = min(self.reservations.mises_de_cote(isbn).values(), default=None)
+            if expiration is not None:
+                raise LivreIndisponibleError(f"Le livre '{livre.titre}' (ISBN {isbn}) est réservé jusqu'au {expiration}.")
+            raise LivreIndisponibleError(f"Le livre '{livre.titre}' (ISBN {isbn}) n'est pas disponible.")
+        membre.emprunter(isbn, date_iso)
+        if de_cote:
+            code = stock.reserves.pop(id_membre)
+            self.reservations.retirer_mise_de_cote(isbn, id_membre)
+        else:
+            code = stock.prendre(code)
+        stock.prets[id_membre] = code
+        self._indexer_emprunt(isbn, id_membre)
+        self._actualiser_statut(livre, stock)
+        self.echeancier.ajouter(isbn, id_membre, self.regles_pret.echeance(date_iso, livre.genre, id_membre))
+        if historiser:
+            self._historiser((date_iso, isbn, id_membre, "emprunt"), livre)
+        return code
+
+    def _appliquer_retour(self, isbn: str, id_membre: str, date_iso: str, historiser: bool = True):
+        livre = self.livres[isbn]
+        stock = self.exemplaires.stock(isbn)
+        self.membres[id_membre].retourner(isbn)
+        code = stock.prets.pop(id_membre, None)
+        if code is not None:
+            stock.libres.append(code)
+        self._desindexer_emprunt(isbn, id_membre)
+        self._actualiser_statut(livre, stock)
+        self.echeancier.retirer(isbn, id_membre)
+        if historiser:
+            self._historiser((date_iso, isbn, id_membre, "retour"), livre)
+
+    def _actualiser_statut(self, livre: Livre, stock: Stock):
+        if livre.statut != stock.statut:
+            livre.statut = stock.statut
+            self.index_catalogue.changer_statut(livre.isbn, livre.statut)
+
+    def _indexer_emprunt(self, isbn: str, id_membre: str):
+        self.emprunteurs.setdefault(isbn, set()).add(id_membre)
+
+    def _desindexer_emprunt(self, isbn: str, id_membre: str):
+        emprunteurs = self.emprunteurs.get(isbn)
+        if emprunteurs is not None:
+            emprunteurs.discard(id_membre)
+            if not emprunteurs:
+                del self.emprunteurs[isbn]
+
+    def emprunteurs_de(self, isbn: str):
+        """Membres qui détiennent actuellement un exemplaire du livre."""
+        return [self.membres[idm] for idm in sorted(self.emprunteurs.get(isbn, ())) if idm in self.membres]
+
+    def emprunts_de(self, id_membre: str):
+        """Emprunts en cours du membre : isbn -> date d'emprunt."""
+        if id_membre not in self.membres:
+            raise MembreInexistantError(f"Membre ID {id_membre} introuvable.")
+        return dict(self.membres[id_membre].livres_empruntes)
+
+    # ---------- échéances et amendes ----------
+
+    def _emprunts_avec_genre(self):
+        """Emprunts en cours : (isbn, id_membre, date d'emprunt, genre du livre)."""
+        for membre in self.membres.values():
+            for isbn, date in membre.livres_empruntes.items():
+                livre = self.livres.get(isbn)
+                if livre is not None:
+                    yield isbn, membre.id_membre, date, livre.genre
+
+    def _echeances_en_cours(self):
+        for isbn, id_membre, date, genre in self._emprunts_avec_genre():
+            yield isbn, id_membre, self.regles_pret.echeance(date, genre, id_membre)
+
+    def echeance_de(self, isbn: str, id_membre: str):
+        """Date de retour prévue de l'exemplaire emprunté par le membre, ou None (calculée sans l'échéancier)."""
+        membre = self.membres.get(id_membre)
+        if membre is None or isbn not in membre.livres_empruntes or isbn not in self.livres:
+            return None
+        return self.regles_pret.echeance(membre.livres_empruntes[isbn], self.livres[isbn].genre, id_membre) or None
+
+    @mesurer
+    def emprunts_en_retard(self, date: str | None = None):
+        """Emprunts dont la date de retour est dépassée : [(echeance, isbn, id_membre)], les plus anciens d'abord."""
+        return self.echeancier.avant(date or datetime.date.today().isoformat())
+
+    @mesurer
+    def emprunts_a_rendre(self, jours: int = 7, date: str | None = None):
+        """Emprunts à rendre dans les jours qui viennent (date comprise) : [(echeance, isbn, id_membre)]."""
+        debut = datetime.date.fromisoformat(date) if date else datetime.date.today()
+        fin = debut + datetime.timedelta(days=jours - 1)
+        return self.echeancier.entre(debut.isoformat(), fin.isoformat())
+
+    def _facturer_retard(self, isbn: str, id_membre: str, echeance: str | None, date_retour: str):
+        if not echeance or date_retour <= echeance:
+            return
+        jours = jours_entre(echeance, date_retour)
+        montant = self.regles_pret.amende(jours)
+        if montant:
+            self.amendes.ajouter(date_retour, id_membre, "retard", isbn, montant)
+
+    def solde_amendes(self, id_membre: str):
+        """Montant dû par le membre, en centimes."""
+        if id_membre not in self.membres:
+            raise MembreInexistantError(f"Membre ID {id_membre} introuvable.")
+        return self.amendes.solde(id_membre)
+
+    @exclusif
+    def payer_amende(self, id_membre: str, montant: int):
+        """Enregistre un paiement (en centimes), au plus égal au montant dû."""
+        solde = self.solde_amendes(id_membre)
+        if montant <= 0 or montant > solde:
+            raise ValueError(f"Montant invalide : le membre ID {id_membre} doit {formater_montant(solde)}.")
+        date_iso = datetime.date.today().isoformat()
+        self._journaliser("paiement_amende", id_membre=id_membre, montant=montant, date=date_iso)
+        self.amendes.ajouter(date_iso, id_membre, "paiement", "", -montant)
+        print(f"Paiement de {formater_montant(montant)} enregistré, reste dû : {formater_montant(solde - montant)}")
+
+    # ---------- réservations ----------
+
+    def _changer_statut(self, isbn: str, statut: str):
+        self.livres[isbn].statut = statut
+        self.index_catalogue.changer_statut(isbn, statut)
+
+    def _attribuer_reservation(self, isbn: str, date_iso: str):
+        """Met les exemplaires libres de côté pour les premiers membres en attente ; retourne leurs ids."""
+        if isbn not in self.livres or not self.reservations.nombre_en_attente(isbn):
+            return []
+        stock = self.exemplaires.stock(isbn)
+        reservataires = []
+        while stock.libres:
+            id_membre = self.reservations.suivant(isbn)
+            if id_membre is None:
+                break
+            stock.reserves[id_membre] = stock.libres.pop()
+            self.reservations.mettre_de_cote(isbn, id_membre, self.regles_pret.expiration_reservation(date_iso))
+            reservataires.append(id_membre)
+        if reservataires:
+            self._changer_statut(isbn, stock.statut)
+        return reservataires
+
+    def _liberer_mise_de_cote(self, isbn: str, id_membre: str, date_iso: str):
+        """Le réservataire n'est pas venu ou a annulé : l'exemplaire passe au suivant ou redevient disponible."""
+        if isbn not in self.livres or self.reservations.mise_de_cote(isbn, id_membre) is None:
+            return
+        # Stock lu avant de retirer la mise de côté : un exemplaire implicite s'en déduit
+        stock = self.exemplaires.stock(isbn)
+        self.reservations.retirer_mise_de_cote(isbn, id_membre)
+        code = stock.reserves.pop(id_membre, None)
+        if code is not None:
+            stock.libres.append(code)
+        self._changer_statut(isbn, stock.statut)
+        self._attribuer_reservation(isbn, date_iso)
+
+    def _expirer_reservations(self, date_iso: str):
+        mises = self.reservations.expirees(date_iso)
+        for isbn, id_membre in mises:
+            self._liberer_mise_de_cote(isbn, id_membre, date_iso)
+        if mises:
+            self._journaliser("expiration_reservations", mises=mises, date=date_iso)
+        return mises
+
+    def _appliquer_annulation_reservation(self, isbn: str, id_membre: str, date_iso: str):
+        if self.reservations.mise_de_cote(isbn, id_membre) is not None:
+            self._liberer_mise_de_cote(isbn, id_membre, date_iso)
+            return True
+        return self.reservations.annuler(isbn, id_membre)
+
+    @mesurer
+    @exclusif
+    def reserver(self, isbn: str, id_membre: str):
+        """Place le membre dans la file d'attente d'un livre indisponible ; retourne son rang."""
+        if id_membre not in self.membres:
+            raise MembreInexistantError(f"Membre ID {id_membre} introuvable.")
+        if isbn not in self.livres:
+            raise LivreInexistantError(f"ISBN {isbn} introuvable.")
+        date_iso = datetime.date.today().isoformat()
+        self._expirer_reservations(date_iso)
+        livre = self.livres[isbn]
+        membre = self.membres[id_membre]
+        if livre.est_disponible():
+            raise ReservationImpossibleError(
+                f"Le livre '{livre.titre}' (ISBN {isbn}) est disponible : il peut être emprunté directement."
+            )
+        if isbn in membre.livres_empruntes:
+            raise ReservationImpossibleError(f"Le membre ID {id_membre} a déjà emprunté le livre ISBN {isbn}.")
+        if self.reservations.en_attente(isbn, id_membre) or self.reservations.mise_de_cote(isbn, id_membre):
+            raise ReservationImpossibleError(f"Le membre ID {id_membre} a déjà réservé le livre ISBN {isbn}.")
+        rang = self.reservations.ajouter(isbn, id_membre, date_iso)
+        self._journaliser("reservation", isbn=isbn, id_membre=id_membre, date=date_iso)
+        print(f"Réservation : {membre.nom} (ID {id_membre}) est n°{rang} en attente pour '{livre.titre}' (ISBN {isbn})")
+        return rang
+
+    @exclusif
+    def annuler_reservation(self, isbn: str, id_membre: str):
+        date_iso = datetime.date.today().isoformat()
+        self._expirer_reservations(date_iso)
+        if not self._appliquer_annulation_reservation(isbn, id_membre, date_iso):
+            raise ReservationInexistanteError(f"Le membre ID {id_membre} n'a pas réservé le livre ISBN {isbn}.")
+        self._journaliser("annulation_reservation", isbn=isbn, id_membre=id_membre, date=date_iso)
+        print(f"Réservation annulée : livre ISBN {isbn}, membre ID {id_membre}")
+
+    @exclusif
+    def expirer_reservations(self):
+        """Libère les exemplaires mis de côté dont le délai est passé ; retourne les (isbn, id_membre)."""
+        return self._expirer_reservations(datetime.date.today().isoformat())
+
+    def file_attente(self, isbn: str):
+        """Membres en attente du livre, dans l'ordre : [(id_membre, date de la demande)]."""
+        return self.reservations.attente(isbn)
+
+    def reservations_de(self, id_membre: str):
+        """Réservations du membre : [(isbn, rang dans la file ou None, date limite si le livre l'attend ou None)]."""
+        if id_membre not in self.membres:
+            raise MembreInexistantError(f"Membre ID {id_membre} introuvable.")
+        return self.reservations.de_membre(id_membre)
+
+    # ---------- exemplaires ----------
+
+    def _stock_initial(self, isbn: str):
+        """
+        Stock d'un titre sans exemplaire déclaré : un exemplaire unique, de code-barres
+        l'isbn, prêté ou mis de côté selon le statut du livre (à un détenteur inconnu si
+        aucun emprunteur ni réservataire n'est connu : il reste indisponible).
+        """
+        livre = self.livres[isbn]
+        stock = Stock([isbn])
+        emprunteurs = self.emprunteurs.get(isbn)
+        reservataires = self.reservations.mises_de_cote(isbn)
+        if livre.statut == "emprunté" and emprunteurs:
+            stock.prets[min(emprunteurs)] = stock.libres.pop()
+        elif livre.statut == "réservé" and reservataires:
+            stock.reserves[min(reservataires)] = stock.libres.pop()
+        elif livre.statut != "disponible":
+            cible = stock.reserves if livre.statut == "réservé" else stock.prets
+            cible[DETENTEUR_INCONNU] = stock.libres.pop()
+        return stock
+
+    def _total_exemplaires(self, isbn: str):
+        # Les stocks déclarés sont tous chargés avec exemplaires.txt : les autres n'ont qu'un exemplaire
+        stock = self.exemplaires.charge(isbn)
+        return stock.total if stock is not None else 1
+
+    def disponibilite(self, isbn: str):
+        """(exemplaires disponibles, total) du livre, sans parcourir ses exemplaires."""
+        if isbn not in self.livres:
+            raise LivreInexistantError(f"ISBN {isbn} introuvable.")
+        if self.exemplaires.charge(isbn) is None and self._total_exemplaires(isbn) == 1:
+            # Exemplaire unique implicite : le statut suffit, sans créer de stock
+            return (1 if self.livres[isbn].est_disponible() else 0), 1
+        stock = self.exemplaires.stock(isbn)
+        return stock.disponibles, stock.total
+
+    def decrire_livre(self, livre: Livre):
+        disponibles, total = self.disponibilite(livre.isbn)
+        return f"{livre} - {disponibles}/{total} exemplaires disponibles" if total > 1 else str(livre)
+
+    def isbn_exemplaire(self, code: str):
+        """Isbn du titre auquel appartient l'exemplaire, ou None."""
+        isbn = self.exemplaires.isbn_de(code)
+        if isbn is None and code in self.livres and self.exemplaires.charge(code) is None:
+            # Exemplaire unique implicite, dont le code-barres est l'isbn
+            isbn = code
+        return isbn
+
+    def _ajouter_exemplaires(self, isbn: str, codes: list[str]):
+        stock = self.exemplaires.stock(isbn)
+        self.exemplaires.ajouter(isbn, codes)
+        self._changer_statut(isbn, stock.statut)
+
+    def _retirer_exemplaire(self, isbn: str, code: str):
+        stock = self.exemplaires.stock(isbn)
+        self.exemplaires.retirer(isbn, code)
+        self._changer_statut(isbn, stock.statut)
+
+    @exclusif
+    def ajouter_exemplaires(self, isbn: str, nombre: int = 1, codes: list[str] | None = None):
+        """
+        Ajoute des exemplaires au titre, avec les codes-barres fournis ou numérotés ISBN-2,
+        ISBN-3... ; les membres en attente sont servis en premier. Retourne les codes.
+        """
+        if isbn not in self.livres:
+            raise LivreInexistantError(f"ISBN {isbn} introuvable.")
+        stock = self.exemplaires.stock(isbn)
+        if codes is None:
+            if nombre <= 0:
+                raise ValueError("Le nombre d'exemplaires doit être positif.")
+            codes, numero = [], stock.total
+            while len(codes) < nombre:
+                numero += 1
+                if self.isbn_exemplaire(f"{isbn}-{numero}") is None:
+                    codes.append(f"{isbn}-{numero}")
+        for code in codes:
+            if not code or ";" in code or "," in code:
+                raise ValueError(f"Code-barres invalide : '{code}'")
+            if self.isbn_exemplaire(code) is not None or code in self.livres or codes.count(code) > 1:
+                raise ValueError(f"Le code-barres {code} est déjà utilisé.")
+        date_iso = datetime.date.today().isoformat()
+        self._ajouter_exemplaires(isbn, codes)
+        self._journaliser("ajout_exemplaires", isbn=isbn, codes=codes, date=date_iso)
+        reservataires = self._attribuer_reservation(isbn, date_iso)
+        print(f"{len(codes)} exemplaire(s) ajouté(s) à '{self.livres[isbn].titre}' (ISBN {isbn}) : {', '.join(codes)}")
+        for id_membre in reservataires:
+            print(f"Exemplaire mis de côté pour {self.membres[id_membre].nom} (ID {id_membre})")
+        return codes
+
+    @exclusif
+    def retirer_exemplaire(self, code: str):
+        """Retire du catalogue un exemplaire libre (perdu, réformé) ; le titre en garde au moins un."""
+        isbn = self.isbn_exemplaire(code)
+        if isbn is None:
+            raise LivreInexistantError(f"Exemplaire {code} introuvable.")
+        stock = self.exemplaires.stock(isbn)
+        if code not in stock.libres:
+            raise LivreIndisponibleError(f"L'exemplaire {code} est prêté ou mis de côté.")
+        if stock.total == 1:
+            raise ValueError(f"{code} est le dernier exemplaire du livre ISBN {isbn} : supprimez le livre.")
+        self._retirer_exemplaire(isbn, code)
+        self._journaliser("retrait_exemplaire", isbn=isbn, code=code)
+        print(f"Exemplaire {code} retiré de '{self.livres[isbn].titre}' (ISBN {isbn})")
+
+    @exclusif
+    def fusionner_titres(self, isbn: str, doublons: list[str]):
+        """
+        Regroupe sous isbn des livres saisis en double (un faux isbn par exemplaire) : leurs
+        exemplaires, emprunts et historique passent au titre conservé et les faux isbns
+        deviennent des codes-barres. Comme un import, le résultat est écrit d'un bloc.
+        """
+        if isbn not in self.livres:
+            raise LivreInexistantError(f"ISBN {isbn} introuvable.")
+        for doublon in doublons:
+            if doublon not in self.livres or doublon == isbn:
+                raise LivreInexistantError(f"ISBN {doublon} introuvable.")
+            if self.reservations.nombre_en_attente(doublon) or self.reservations.mises_de_cote(doublon):
+                raise ValueError(f"Le livre ISBN {doublon} a des réservations en cours : fusion impossible.")
+        detenteurs = [idm for doublon in (isbn, *doublons) for idm in self.emprunteurs.get(doublon, ())]
+        if len(detenteurs) != len(set(detenteurs)):
+            raise ValueError(f"Un membre détient plusieurs exemplaires du livre ISBN {isbn} : fusion impossible.")
+        livre = self.livres[isbn]
+        for doublon in doublons:
+            # Stocks lus avant de déplacer les emprunts, dont se déduisent les exemplaires implicites
+            self.exemplaires.stock(isbn)
+            self.exemplaires.stock(doublon)
+            for id_membre in list(self.emprunteurs.get(doublon, ())):
+                membre = self.membres[id_membre]
+                date = membre.livres_empruntes.pop(doublon)
+                membre.livres_empruntes[isbn] = date
+                self._desindexer_emprunt(doublon, id_membre)
+                self._indexer_emprunt(isbn, id_membre)
+                self.echeancier.retirer(doublon, id_membre)
+                self.echeancier.ajouter(isbn, id_membre, self.regles_pret.echeance(date, livre.genre, id_membre))
+            self.exemplaires.fusionner(isbn, doublon)
+            self._retirer_livre(doublon)
+        self._changer_statut(isbn, self.exemplaires.stock(isbn).statut)
+        self.historique.remplacer_isbns({doublon: isbn for doublon in doublons})
+        self._statistiques = None
+        self.compacter()
+        print(f"{len(doublons)} livre(s) fusionné(s) dans '{livre.titre}' (ISBN {isbn}) : "
+              f"{self._total_exemplaires(isbn)} exemplaires")
+
+    @exclusif
+    def verifier_coherence(self, corriger: bool = False):
+        """
+        Rejoue l'historique pour retrouver les emprunts en cours et les compare aux
+        emprunts des membres, à l'index inverse et aux statuts des livres. Retourne la
+        liste des anomalies ; avec corriger=True, l'état est reconstruit depuis l'historique.
+        """
+        en_cours = self._emprunts_selon_historique()
+        anomalies = []
+        for membre in self.membres.values():
+            for isbn in membre.livres_empruntes:
+                if (isbn, membre.id_membre) not in en_cours:
+                    anomalies.append(f"Membre {membre.id_membre} : {isbn} absent des emprunts en cours de l'historique")
+        # isbn -> membres qui en ont un exemplaire selon l'historique
+        emprunteurs = {}
+        for (isbn, idm), date in en_cours.items():
+            if isbn not in self.livres or idm not in self.membres:
+                anomalies.append(f"Historique : {isbn} emprunté par {idm} le {date} (livre ou membre inconnu)")
+                continue
+            emprunteurs.setdefault(isbn, set()).add(idm)
+            if isbn not in self.membres[idm].livres_empruntes:
+                anomalies.append(f"Historique : {isbn} emprunté par {idm} le {date} mais absent de ses emprunts")
+            if idm not in self.emprunteurs.get(isbn, ()):
+                anomalies.append(f"Index inverse : l'emprunt de {isbn} par {idm} n'y figure pas")
+        for livre in self.livres.values():
+            attendu = self._statut_attendu(livre.isbn, len(emprunteurs.get(livre.isbn, ())))
+            if livre.statut != attendu:
+                anomalies.append(f"Livre {livre.isbn} : statut '{livre.statut}' au lieu de '{attendu}'")
+        for isbn, stock in self.exemplaires.charges():
+            # Un détenteur inconnu est déjà signalé par le statut du livre
+            prets = set(stock.prets) - {DETENTEUR_INCONNU}
+            if isbn in self.livres and prets != emprunteurs.get(isbn, set()):
+                anomalies.append(f"Exemplaires {isbn} : prêtés à {sorted(prets)} au lieu de "
+                                 f"{sorted(emprunteurs.get(isbn, ()))}")
+
+        if corriger and anomalies:
+            self._reconstruire_emprunts(en_cours)
+            self.echeancier.differer(self._echeances_en_cours)
+        return anomalies
+
+    def _statut_attendu(self, isbn: str, nb_prets: int):
+        nb_de_cote = len(self.reservations.mises_de_cote(isbn))
+        if nb_prets + nb_de_cote < self._total_exemplaires(isbn):
+            return "disponible"
+        return "réservé" if nb_de_cote else "emprunté"
+
+    def _emprunts_selon_historique(self):
+        """Emprunts en cours d'après l'historique : (isbn, id_membre) -> date d'emprunt."""
+        en_cours = {}
+        for (date, isbn, idm, action) in self.historique:
+            if action == "emprunt":
+                en_cours[isbn, idm] = date
+            else:
+                en_cours.pop((isbn, idm), None)
+        return en_cours
+
+    def _reconstruire_emprunts(self, en_cours: dict[tuple[str, str], str]):
+        for membre in self.membres.values():
+            membre.livres_empruntes = {}
+        self.emprunteurs.clear()
+        for (isbn, idm), date in en_cours.items():
+            if idm in self.membres and isbn in self.livres:
+                self.membres[idm].livres_empruntes[isbn] = date
+                self._indexer_emprunt(isbn, idm)
+        for isbn, stock in self.exemplaires.charges():
+            if isbn in self.livres:
+                stock.repartir(self.emprunteurs.get(isbn, ()), self.reservations.mises_de_cote(isbn))
+        for livre in self.livres.values():
+            livre.statut = self._statut_attendu(livre.isbn, len(self.emprunteurs.get(livre.isbn, ())))
+            self.index_catalogue.changer_statut(livre.isbn, livre.statut)
+        self.compacter()
+
+    def _historiser(self, rec: tuple[str, str, str, str], livre: Livre):
+        self.historique.ajouter(rec)
+        if self._statistiques is not None:
+            self._statistiques.enregistrer(*rec, livre)
+
+    @property
+    def statistiques(self):
+        if self._statistiques is None:
+            self._statistiques = Statistiques.depuis_historique(self.historique, self.livres)
+        return self._statistiques
+
+    @mesurer
     def charger_livres(self):
         self.livres.clear()
+        self.index_livres.vider()
+        self.index_catalogue.vider()
+        if self.binaire and self.file_livres_bin.exists():
+            # Import local : instantane_binaire dépend de ce module
+            from instantane_binaire import lire_livres
+            for livre in lire_livres(self.file_livres_bin):
+                self.livres[livre.isbn] = livre
+            self.index_livres.differer(self._champs_indexes_livres)
+            self.index_catalogue.differer(self._champs_indexes_livres)
+            return
         if not self.file_livres.exists():
             return
+        if self.paresseux:
+            self.livres.ouvrir(self.file_livres)
+            # Les index seront construits à la première requête, sans lire les objets Livre
+            self.index_livres.differer(self.livres.champs_indexes)
+            self.index_catalogue.differer(self.livres.champs_indexes)
+            self._signaler_lignes_ignorees(self.file_livres, self.livres.lignes_ignorees)
+            return
+        ignorees = []
         with open(self.file_livres, "r", encoding="utf-8") as f:
-            for ligne in f:
+            for numero, ligne in enumerate(f, start=1):
                 if ligne.strip():
                     try:
                         livre = Livre.from_line(ligne)
-                        self.livres[livre.isbn] = livre
-                    except Exception:
-                        pass
+                    except (ValueError, IndexError):
+                        ignorees.append(numero)
+                        continue
+                    self._inserer_livre(livre)
+        self._signaler_lignes_ignorees(self.file_livres, ignorees)
 
+    def _champs_indexes_livres(self):
+        for livre in self.livres.values():
+            yield livre.isbn, {"titre": livre.titre, "auteur": livre.auteur, "genre": livre.genre, "statut": livre.statut}
+
+    @mesurer
     def sauvegarder_livres(self):
-        with open(self.file_livres, "w", encoding="utf-8") as f:
+        if self.binaire:
+            from instantane_binaire import ecrire_livres
+            ecrire_livres(self.file_livres_bin, self.livres.values())
+            return
+        if self.paresseux:
+            # Les lignes jamais lues sont recopiées sans être analysées
+            self.livres.sauvegarder(self.file_livres)
+            return
+        tmp = self.file_livres.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
             for livre in self.livres.values():
                 f.write(livre.to_line() + "\n")
+        os.replace(tmp, self.file_livres)
 
+    @mesurer
     def charger_membres(self):
         self.membres.clear()
+        self.emprunteurs.clear()
+        self.index_membres.vider()
+        if self.binaire and self.file_membres_bin.exists():
+            from instantane_binaire import lire_membres
+            for membre in lire_membres(self.file_membres_bin):
+                self._inserer_membre(membre)
+                for isbn in membre.livres_empruntes:
+                    self._indexer_emprunt(isbn, membre.id_membre)
+            return
         if not self.file_membres.exists():
             return
+        ignorees = []
         with open(self.file_membres, "r", encoding="utf-8") as f:
-            for ligne in f:
+            for numero, ligne in enumerate(f, start=1):
                 if ligne.strip():
                     try:
                         membre = Membre.from_line(ligne)
-                        self.membres[membre.id_membre] = membre
-                    except Exception:
-                        pass
+                    except (ValueError, IndexError):
+                        ignorees.append(numero)
+                        continue
+                    self._inserer_membre(membre)
+                    for isbn in membre.livres_empruntes:
+                        self._indexer_emprunt(isbn, membre.id_membre)
+        self._signaler_lignes_ignorees(self.file_membres, ignorees)
+
+    def _signaler_lignes_ignorees(self, chemin: Path, numeros: list[int]):
+        self.lignes_ignorees[chemin.name] = numeros
+        if numeros:
+            apercu = ", ".join(map(str, numeros[:10])) + (", ..." if len(numeros) > 10 else "")
+            print(f"[!] {chemin.name} : {len(numeros)} ligne(s) invalide(s) ignorée(s) (lignes {apercu})",
+                  file=sys.stderr)
 
+    @mesurer
     def sauvegarder_membres(self):
-        with open(self.file_membres, "w", encoding="utf-8") as f:
+        if self.binaire:
+            from instantane_binaire import ecrire_membres
+            ecrire_membres(self.file_membres_bin, self.membres.values())
+            return
+        tmp = self.file_membres.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
             for membre in self.membres.values():
                 f.write(membre.to_line() + "\n")
+        os.replace(tmp, self.file_membres)
+
+    @mesurer
+    def charger_reservations(self):
+        self.reservations.charger(self.file_reservations)
 
+    @mesurer
+    def sauvegarder_reservations(self):
+        self.reservations.sauvegarder(self.file_reservations)
+
+    @mesurer
+    def charger_exemplaires(self):
+        self.exemplaires.charger(self.file_exemplaires)
+
+    @mesurer
+    def sauvegarder_exemplaires(self):
+        self.exemplaires.sauvegarder(self.file_exemplaires)
+
+    @mesurer
     def charger_historique(self):
-        self.historique.clear()
-        if not self.file_historique.exists():
-            return
-        with open(self.file_historique, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                date = row.get("date", "").strip()
-                isbn = row.get("isbn", "").strip()
-                idm = row.get("id_membre", "").strip()
-                action = row.get("action", "").strip()
-                if date and isbn and idm and action:
-                    self.historique.append((date, isbn, idm, action))
+        self.historique.recharger()
+        if self.partitionne and self.file_historique.exists():
+            # Première ouverture en mode partitionné : historique.csv est réparti par mois
+            self.historique.migrer_depuis(self.file_historique)
+        self._statistiques = None
 
+    @mesurer
     def sauvegarder_historique(self):
-        with open(self.file_historique, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["date", "isbn", "id_membre", "action"])
-            for rec in self.historique:
-                writer.writerow(rec)
-
-    def lister_livres(self):
-        if not self.livres:
-            print("Aucun livre en base.")
-            return
-        for livre in self.livres.values():
-            print(f"- {livre}")
+        self.historique.vider()
+
+    def lister_livres(self, **filtres):
+        trouve = False
+        for livre in self.filtrer_livres(**filtres):
+            print(f"- {self.decrire_livre(livre)}")
+            trouve = True
+        if not trouve:
+            print("Aucun livre en base." if not filtres else "Aucun livre ne correspond.")
+
+    # ---------- Requêtes paginées ----------
+
+    def filtrer_livres(self, genre: str | None = None, auteur: str | None = None, annee_min: int | None = None,
+                       annee_max: int | None = None, statut: str | None = None):
+        """
+        Générateur des livres qui satisfont tous les filtres fournis (genre et auteur sans
+        tenir compte des majuscules ni des accents). Genre, auteur et statut passent par les
+        index secondaires : seuls les livres retenus sont lus, dans un ordre quelconque ;
+        sans ces filtres, le catalogue est parcouru dans son ordre.
+        """
+        isbns = self.index_catalogue.isbns(genre=genre, auteur=auteur, statut=statut)
+        candidats = self.livres.values() if isbns is None else (self.livres[isbn] for isbn in isbns)
+        for livre in candidats:
+            if annee_min is not None and livre.annee < annee_min:
+                continue
+            if annee_max is not None and livre.annee > annee_max:
+                continue
+            yield livre
+
+    @mesurer
+    def page_livres(self, curseur: str | None = None, limite: int = 50, tri: str | None = None,
+                    decroissant: bool = False, **filtres):
+        """
+        Une page de livres filtrés (voir filtrer_livres) : retourne (livres, curseur_suivant).
+        tri : None (ordre du catalogue), "isbn", "titre", "auteur" ou "annee".
+        """
+        if tri is not None and tri not in CLES_TRI_LIVRES:
+            raise ValueError(f"Tri inconnu : '{tri}'")
+        return paginer(self.filtrer_livres(**filtres), curseur, limite,
+                       CLES_TRI_LIVRES.get(tri), lambda l: l.isbn, decroissant)
+
+    @mesurer
+    def compter_livres(self, **filtres):
+        if all(v is None for v in filtres.values()):
+            return len(self.livres)
+        if filtres.keys() <= {"genre", "auteur", "statut"}:
+            return self.index_catalogue.compter(**filtres)
+        return sum(1 for _ in self.filtrer_livres(**filtres))
+
+    def filtrer_membres(self, nom: str | None = None, avec_emprunts: bool | None = None):
+        """Générateur des membres filtrés ; nom passe par l'index de recherche des membres."""
+        candidats = self.chercher_membre_par_nom(nom) if nom else self.membres.values()
+        for membre in candidats:
+            if avec_emprunts is not None and bool(membre.livres_empruntes) != avec_emprunts:
+                continue
+            yield membre
+
+    @mesurer
+    def page_membres(self, curseur: str | None = None, limite: int = 50, tri: str | None = None,
+                     decroissant: bool = False, **filtres):
+        """Une page de membres filtrés ; tri : None, "id_membre", "nom" ou "emprunts"."""
+        if tri is not None and tri not in CLES_TRI_MEMBRES:
+            raise ValueError(f"Tri inconnu : '{tri}'")
+        return paginer(self.filtrer_membres(**filtres), curseur, limite,
+                       CLES_TRI_MEMBRES.get(tri), lambda m: m.id_membre, decroissant)
+
+    def filtrer_historique(self, date_min: str | None = None, date_max: str | None = None, isbn: str | None = None,
+                           id_membre: str | None = None, action: str | None = None, recents_d_abord: bool = True):
+        """
+        Générateur des événements (date, isbn, id_membre, action) filtrés, du plus récent au plus
+        ancien par défaut. Les dates sont ISO ("2025-01-31") ; voir Historique.chercher pour
+        ce que chaque stockage lit réellement (arrêt anticipé, partitions, index SQL).
+        """
+        for rec in self.historique.chercher(date_min, date_max, isbn, id_membre, recents_d_abord):
+            if action is None or rec[3] == action:
+                yield rec
+
+    @mesurer
+    def page_historique(self, curseur: str | None = None, limite: int = 50, **filtres):
+        """Une page d'événements filtrés (voir filtrer_historique) : retourne (événements, curseur_suivant)."""
+        return paginer(self.filtrer_historique(**filtres), curseur, limite)
+
+    @mesurer
+    def page_historique_chronologique(self, curseur: str | None = None, limite: int = 50, **filtres):
+        """
+        Événements filtrés du plus ancien au plus récent : retourne (événements, curseur). Le
+        curseur (jour du dernier événement rendu, rang dans ce jour) reprend au jour voulu sans
+        relire les précédents et reste valable quand l'historique s'allonge ; une page plus
+        courte que limite atteint la fin actuelle, que le même curseur permet de suivre.
+        """
+        if limite <= 0:
+            raise ValueError("La taille de page doit être positive.")
+        jour, rang = json.loads(curseur) if curseur else (None, 0)
+        if jour is not None and (filtres.get("date_min") or "") < jour:
+            filtres["date_min"] = jour
+        deja_rendus = rang
+        page = []
+        for rec in self.filtrer_historique(recents_d_abord=False, **filtres):
+            if rec[0] == jour and deja_rendus:
+                deja_rendus -= 1
+                continue
+            page.append(rec)
+            if len(page) == limite:
+                break
+        for rec in page:
+            jour, rang = (jour, rang + 1) if rec[0] == jour else (rec[0], 1)
+        return page, (json.dumps([jour, rang]) if jour is not None else None)
 
+    def decrire_evenement(self, rec: tuple[str, str, str, str]):
+        date, isbn, idm, action = rec
+        titre = self.livres[isbn].titre if isbn in self.livres else "Titre inconnu"
+        nom = self.membres[idm].nom if idm in self.membres else "Nom inconnu"
+        return f"{date} - {action} - '{titre}' (ISBN {isbn}) - {nom} (ID {idm})"
+
+    @exclusif
     def ajouter_livre(self, isbn: str, titre: str, auteur: str, annee: int, genre: str):
         if isbn in self.livres:
             print(f"[!] Le livre ISBN {isbn} existe déjà.")
             return
         livre = Livre(isbn=isbn, titre=titre, auteur=auteur, annee=annee, genre=genre)
-        self.livres[isbn] = livre
+        self._inserer_livre(livre)
+        self._journaliser("ajout_livre", isbn=isbn, titre=titre, auteur=auteur, annee=annee, genre=genre)
         print(f"Livre ajouté : {livre}")
 
+    @exclusif
     def supprimer_livre(self, isbn: str):
         if isbn not in self.livres:
             raise LivreInexistantError(f"ISBN {isbn} introuvable.")
         titre = self.livres[isbn].titre
         print(f"Livre supprimé : '{titre}' (ISBN {isbn})")
-        del self.livres[isbn]
+        self._retirer_livre(isbn)
+        self._journaliser("suppression_livre", isbn=isbn)
 
-    def lister_membres(self):
-        if not self.membres:
-            print("Aucun membre en base.")
-            return
-        for membre in self.membres.values():
+    def lister_membres(self, **filtres):
+        trouve = False
+        for membre in self.filtrer_membres(**filtres):
             print(f"- {membre}")
+            trouve = True
+        if not trouve:
+            print("Aucun membre en base." if not filtres else "Aucun membre ne correspond.")
 
+    @exclusif
     def enregistrer_membre(self, id_membre: str, nom: str):
         if id_membre in self.membres:
             print(f"[!] Le membre ID {id_membre} existe déjà.")
             return
         membre = Membre(id_membre=id_membre, nom=nom)
-        self.membres[id_membre] = membre
+        self._inserer_membre(membre)
+        self._journaliser("ajout_membre", id_membre=id_membre, nom=nom)
         print(f"Membre ajouté : {membre.nom} (ID {membre.id_membre})")
 
+    @mesurer
+    @exclusif
+    def importer_livres(self, enregistrements, taille_lot: int = 10_000, fichier_rejets: str | Path | None = None):
+        """
+        Importe des livres (dicts isbn, titre, auteur, annee, genre) par lots, sans affichage
+        ligne par ligne. Les lignes invalides ou déjà présentes sont rejetées sans interrompre
+        l'import et les données ne sont enregistrées qu'une fois, à la fin.
+        """
+        return self._importer_en_masse(
+            enregistrements, valider_livre, lambda champs: Livre(*champs),
+            self._isbns_existants, self._inserer_livres_lot, taille_lot, fichier_rejets,
+        )
+
+    @mesurer
+    @exclusif
+    def importer_membres(self, enregistrements, taille_lot: int = 10_000, fichier_rejets: str | Path | None = None):
+        """Importe des membres (dicts id_membre, nom) ; mêmes règles que importer_livres."""
+        return self._importer_en_masse(
+            enregistrements, valider_membre, lambda champs: Membre(*champs),
+            self._ids_membres_existants, self._inserer_membres_lot, taille_lot, fichier_rejets,
+        )
+
+    def _importer_en_masse(self, enregistrements, valider, fabriquer, existants, inserer_lot, taille_lot, fichier_rejets):
+        rapport = RapportImport(fichier_rejets)
+        try:
+            lot = []
+            for numero, enr in enumerate(enregistrements, 1):
+                try:
+                    champs = valider(enr)
+                except ValueError as e:
+                    rapport.rejeter(numero, enr, str(e))
+                    continue
+                lot.append((numero, enr, champs[0], fabriquer(champs)))
+                if len(lot) >= taille_lot:
+                    self._importer_lot(lot, existants, inserer_lot, rapport)
+                    lot = []
+            self._importer_lot(lot, existants, inserer_lot, rapport)
+            # Les ajouts ne passent pas par le journal : une seule écriture complète à la fin
+            self.compacter()
+        finally:
+            rapport.fermer()
+        return rapport
+
+    def _importer_lot(self, lot, existants, inserer_lot, rapport: RapportImport):
+        if not lot:
+            return
+        deja_presents = existants([cle for (_, _, cle, _) in lot])
+        vus = set()
+        nouveaux = []
+        for numero, enr, cle, objet in lot:
+            if cle in deja_presents or cle in vus:
+                rapport.rejeter(numero, enr, f"'{cle}' existe déjà")
+                continue
+            vus.add(cle)
+            nouveaux.append(objet)
+        inserer_lot(nouveaux)
+        rapport.acceptes += len(nouveaux)
+
+    def _isbns_existants(self, isbns: list[str]):
+        return {isbn for isbn in isbns if isbn in self.livres}
+
+    def _ids_membres_existants(self, ids: list[str]):
+        return {idm for idm in ids if idm in self.membres}
+
+    def _inserer_livres_lot(self, livres: list[Livre]):
+        for livre in livres:
+            self._inserer_livre(livre)
+
+    def _inserer_membres_lot(self, membres: list[Membre]):
+        for membre in membres:
+            self._inserer_membre(membre)
+
+    def exporter_livres(self, chemin: str | Path, format: str | None = None):
+        """Exporte le catalogue en CSV ou JSON Lines au fil de l'eau ; retourne le nombre de livres."""
+        enregistrements = (
+            {"isbn": l.isbn, "titre": l.titre, "auteur": l.auteur, "annee": l.annee, "genre": l.genre, "statut": l.statut}
+            for l in self.livres.values()
+        )
+        return ecrire_enregistrements(chemin, enregistrements, CHAMPS_LIVRES, format)
+
+    def exporter_membres(self, chemin: str | Path, format: str | None = None):
+        enregistrements = ({"id_membre": m.id_membre, "nom": m.nom} for m in self.membres.values())
+        return ecrire_enregistrements(chemin, enregistrements, CHAMPS_MEMBRES, format)
+
+    @mesurer
     def chercher_livre_par_titre(self, titre: str):
-        return [livre for livre in self.livres.values() if titre.lower() in livre.titre.lower()]
+        return [self.livres[isbn] for isbn in self.index_livres.chercher(titre, champs=("titre",))]
 
+    @mesurer
+    def chercher_livres(self, requete: str, limite: int | None = None):
+        """Recherche dans les titres, auteurs et genres (termes multiples, préfixes, sans accents)."""
+        return [self.livres[isbn] for isbn in self.index_livres.chercher(requete, limite=limite)]
+
+    @mesurer
     def chercher_membre_par_nom(self, nom: str):
-        return [membre for membre in self.membres.values() if nom.lower() in membre.nom.lower()]
+        return [self.membres[idm] for idm in self.index_membres.chercher(nom)]
 
+    @mesurer
+    @exclusif
     def emprunter(self, isbn: str, id_membre: str):
         if id_membre not in self.membres:
             raise MembreInexistantError(f"Membre ID {id_membre} introuvable.")
@@ -225,12 +1260,18 @@ class Bibliotheque:
             raise LivreInexistantError(f"ISBN {isbn} introuvable.")
         livre = self.livres[isbn]
         membre = self.membres[id_membre]
-        livre.emprunter()
-        membre.emprunter(isbn)
         date_iso = datetime.date.today().isoformat()
-        self.historique.append((date_iso, isbn, id_membre, "emprunt"))
-        print(f"Emprunt : {membre.nom} (ID {id_membre}) a emprunté '{livre.titre}' (ISBN {isbn}) le {date_iso}")
+        self._expirer_reservations(date_iso)
+        code = self._appliquer_emprunt(isbn, id_membre, date_iso)
+        # L'exemplaire est noté : la relecture du journal prête le même
+        self._journaliser("emprunt", isbn=isbn, id_membre=id_membre, date=date_iso, exemplaire=code)
+        exemplaire = f", exemplaire {code}" if code != isbn else ""
+        print(f"Emprunt : {membre.nom} (ID {id_membre}) a emprunté '{livre.titre}' (ISBN {isbn}{exemplaire}) "
+              f"le {date_iso}, à rendre le {self.echeance_de(isbn, id_membre)}")
+        return code
 
+    @mesurer
+    @exclusif
     def retourner(self, isbn: str, id_membre: str):
         if id_membre not in self.membres:
             raise MembreInexistantError(f"Membre ID {id_membre} introuvable.")
@@ -238,18 +1279,152 @@ class Bibliotheque:
             raise LivreInexistantError(f"ISBN {isbn} introuvable.")
         livre = self.livres[isbn]
         membre = self.membres[id_membre]
-        livre.retourner()
-        membre.retourner(isbn)
+        if isbn not in membre.livres_empruntes:
+            raise EmpruntInexistantError(f"Le livre ISBN {isbn} n'est pas emprunté par le membre ID {id_membre}.")
         date_iso = datetime.date.today().isoformat()
-        self.historique.append((date_iso, isbn, id_membre, "retour"))
+        self._expirer_reservations(date_iso)
+        echeance = self.echeance_de(isbn, id_membre)
+        self._appliquer_retour(isbn, id_membre, date_iso)
+        self._journaliser("retour", isbn=isbn, id_membre=id_membre, date=date_iso)
+        # Une fois le retour journalisé : une amende ne peut pas précéder le retour qui la justifie
+        self._facturer_retard(isbn, id_membre, echeance, date_iso)
+        # Le journal rejoue la même attribution à partir du retour
+        reservataires = self._attribuer_reservation(isbn, date_iso)
         print(f"Retour : {membre.nom} (ID {id_membre}) a retourné '{livre.titre}' (ISBN {isbn}) le {date_iso}")
+        if echeance and date_iso > echeance:
+            montant = self.regles_pret.amende(jours_entre(echeance, date_iso))
+            print(f"[!] Retour en retard (à rendre le {echeance}) : amende de {formater_montant(montant)}")
+        for reservataire in reservataires:
+            expiration = self.reservations.mise_de_cote(isbn, reservataire)
+            print(f"Livre mis de côté pour {self.membres[reservataire].nom} (ID {reservataire}) jusqu'au {expiration}")
+
+    @mesurer
+    @exclusif
+    def traiter_lot(self, operations):
+        """
+        Applique un lot d'emprunts et de retours en tout ou rien, sans affichage.
+        Chaque opération est un tuple (op, isbn, id_membre) ou un dict avec ces clés,
+        op valant "emprunt" ou "retour". Si une opération échoue, tout le lot est annulé.
+        L'historique et la sauvegarde ne sont écrits qu'une fois, pour le lot entier.
+        Retourne un dict par opération : op, isbn, id_membre, statut ("ok", "echec"
+        ou "annule") et message. Une opération mal formée échoue comme les autres (ses
+        champs illisibles valent None).
+        """
+        date_iso = datetime.date.today().isoformat()
+        self._expirer_reservations(date_iso)
+        resultats = []
+        # Position dans le lot -> message des opérations mal formées
+        invalides = {}
+        for i, operation in enumerate(operations):
+            try:
+                op, isbn, id_membre = self._lire_operation(operation)
+            except ValueError as e:
+                op = isbn = id_membre = None
+                invalides[i] = str(e)
+            resultats.append({"op": op, "isbn": isbn, "id_membre": id_membre, "statut": "ok", "message": ""})
+
+        # Chaque opération appliquée laisse de quoi l'annuler : (op inverse, isbn, id_membre, date)
+        annulations = []
+        # Dates de retour prévues des livres rendus, pour les amendes : position dans le lot -> échéance
+        echeances = {}
+        # Exemplaires prêtés, notés dans le journal : position dans le lot -> code-barres
+        codes = {}
+        echec = None
+        try:
+            for i, res in enumerate(resultats):
+                op, isbn, id_membre = res["op"], res["isbn"], res["id_membre"]
+                try:
+                    if i in invalides:
+                        raise ValueError(invalides[i])
+                    self._verifier_operation(op, isbn, id_membre)
+                    if op == "emprunt":
+                        expiration = self.reservations.mise_de_cote(isbn, id_membre)
+                        codes[i] = self._appliquer_emprunt(isbn, id_membre, date_iso, historiser=False)
+                        if expiration is not None:
+                            # Un exemplaire attendait ce membre : l'annulation le remet de côté
+                            annulations.append(("mise_de_cote", isbn, id_membre, expiration))
+                        annulations.append(("retour", isbn, id_membre, date_iso))
+                    else:
+                        date_emprunt = self.membres[id_membre].livres_empruntes.get(isbn, "")
+                        echeances[i] = self.echeance_de(isbn, id_membre)
+                        self._appliquer_retour(isbn, id_membre, date_iso, historiser=False)
+                        annulations.append(("emprunt", isbn, id_membre, date_emprunt))
+                except (ValueError, MembreInexistantError, LivreInexistantError, EmpruntInexistantError,
+                        LivreIndisponibleError, QuotaEmpruntDepasseError) as e:
+                    echec = i
+                    res["statut"], res["message"] = "echec", str(e)
+                    break
+        except Exception:
+            self._annuler_lot(annulations)
+            raise
+
+        if echec is not None:
+            self._annuler_lot(annulations)
+            for i, res in enumerate(resultats):
+                if i != echec:
+                    res["statut"], res["message"] = "annule", f"Lot annulé : échec de l'opération {echec + 1}"
+            return resultats
+
+        for i, res in enumerate(resultats):
+            livre = self.livres[res["isbn"]]
+            self._historiser((date_iso, res["isbn"], res["id_membre"], res["op"]), livre)
+        operations_journal = [
+            {"op": res["op"], "isbn": res["isbn"], "id_membre": res["id_membre"], "date": date_iso}
+            for res in resultats
+        ]
+        for i, code in codes.items():
+            operations_journal[i]["exemplaire"] = code
+        self._journaliser("lot", operations=operations_journal)
+        for i, res in enumerate(resultats):
+            if res["op"] == "retour":
+                self._facturer_retard(res["isbn"], res["id_membre"], echeances[i], date_iso)
+        for res in resultats:
+            if res["op"] == "retour":
+                self._attribuer_reservation(res["isbn"], date_iso)
+        self.sauvegarder_tout()
+        return resultats
+
+    @staticmethod
+    def _lire_operation(operation):
+        """(op, isbn, id_membre) d'une opération de lot (tuple ou dict) ; ValueError si mal formée."""
+        if isinstance(operation, dict):
+            operation = (operation.get("op"), operation.get("isbn"), operation.get("id_membre"))
+        try:
+            op, isbn, id_membre = operation
+        except (TypeError, ValueError):
+            raise ValueError(f"Opération invalide : {operation!r} (attendu : op, isbn, id_membre)")
+        if not all(isinstance(champ, str) for champ in (op, isbn, id_membre)):
+            raise ValueError(f"Opération invalide : {operation!r} (op, isbn et id_membre sont des textes)")
+        return op, isbn, id_membre
+
+    def _verifier_operation(self, op: str, isbn: str, id_membre: str):
+        if op not in ("emprunt", "retour"):
+            raise ValueError(f"Opération inconnue : '{op}'")
+        if id_membre not in self.membres:
+            raise MembreInexistantError(f"Membre ID {id_membre} introuvable.")
+        if isbn not in self.livres:
+            raise LivreInexistantError(f"ISBN {isbn} introuvable.")
+        if op == "retour" and id_membre not in self.emprunteurs.get(isbn, ()):
+            raise EmpruntInexistantError(f"Le livre ISBN {isbn} n'est pas emprunté par le membre ID {id_membre}.")
+
+    def _annuler_lot(self, annulations: list[tuple[str, str, str, str]]):
+        # Opérations inverses, de la dernière à la première
+        for op, isbn, id_membre, date_iso in reversed(annulations):
+            if op == "emprunt":
+                self._appliquer_emprunt(isbn, id_membre, date_iso, historiser=False)
+            elif op == "retour":
+                self._appliquer_retour(isbn, id_membre, date_iso, historiser=False)
+            else:
+                # date_iso est ici l'expiration de la mise de côté ; l'exemplaire tout juste
+                # rendu par l'annulation de l'emprunt est au sommet de la pile
+                stock = self.exemplaires.stock(isbn)
+                stock.reserves[id_membre] = stock.prendre()
+                self.reservations.mettre_de_cote(isbn, id_membre, date_iso)
+                self._changer_statut(isbn, stock.statut)
 
     def afficher_historique(self, max_lignes: int = 20):
         if not self.historique:
             print("Aucun historique.")
             return
-        for rec in self.historique[-max_lignes:]:
-            date, isbn, idm, action = rec
-            titre = self.livres[isbn].titre if isbn in self.livres else "Titre inconnu"
-            nom = self.membres[idm].nom if idm in self.membres else "Nom inconnu"
-            print(f"{date} - {action} - '{titre}' (ISBN {isbn}) - {nom} (ID {idm})")
+        for rec in self.historique.dernieres(max_lignes):
+            print(self.decrire_evenement(rec))
@@ -0,0 +1,152 @@
+from array import array
+from collections.abc import MutableMapping
+
+from bibliotheque import Livre
+
+
+# ===================== CLASSE TableChaines =====================
+
+class TableChaines:
+    """Table de chaînes : chaque valeur distincte est stockée une fois et désignée par un entier."""
+
+    def __init__(self):
+        self.valeurs = []
+        self._codes = {}
+
+    def code(self, valeur: str):
+        code = self._codes.get(valeur)
+        if code is None:
+            code = self._codes[valeur] = len(self.valeurs)
+            self.valeurs.append(valeur)
+        return code
+
+
+# ===================== CLASSE LivreColonne =====================
+
+class LivreColonne(Livre):
+    """
+    Vue sur une ligne du catalogue en colonnes : se comporte comme un Livre,
+    mais lit et écrit directement dans les colonnes.
+    """
+
+    __slots__ = ("_cat", "_ligne")
+
+    def __init__(self, catalogue: "CatalogueColonnes", ligne: int):
+        self._cat = catalogue
+        self._ligne = ligne
+
+    @property
+    def isbn(self):
+        return self._cat._isbns[self._ligne]
+
+    @property
+    def titre(self):
+        return self._cat._titres[self._ligne]
+
+    @titre.setter
+    def titre(self, valeur):
+        self._cat._titres[self._ligne] = valeur
+
+    @property
+    def auteur(self):
+        return self._cat._chaines.valeurs[self._cat._auteurs[self._ligne]]
+
+    @auteur.setter
+    def auteur(self, valeur):
+        self._cat._auteurs[self._ligne] = self._cat._chaines.code(valeur)
+
+    @property
+    def annee(self):
+        return self._cat._annees[self._ligne]
+
+    @annee.setter
+    def annee(self, valeur):
+        self._cat._annees[self._ligne] = valeur
+
+    @property
+    def genre(self):
+        return self._cat._chaines.valeurs[self._cat._genres[self._ligne]]
+
+    @genre.setter
+    def genre(self, valeur):
+        self._cat._genres[self._ligne] = self._cat._chaines.code(valeur)
+
+    @property
+    def statut(self):
+        return self._cat._table_statuts.valeurs[self._cat._statuts[self._ligne]]
+
+    @statut.setter
+    def statut(self, valeur):
+        self._cat._statuts[self._ligne] = self._cat._table_statuts.code(valeur)
+
+
+# ===================== CLASSE CatalogueColonnes =====================
+
+class CatalogueColonnes(MutableMapping):
+    """
+    Catalogue isbn -> Livre stocké par colonnes : années dans un tableau d'entiers,
+    auteurs, genres et statuts codés par la table de chaînes. Aucun objet Livre
+    n'est conservé ; chaque accès retourne une vue LivreColonne.
+    """
+
+    def __init__(self):
+        self._positions = {}
+        self._isbns = []
+        self._titres = []
+        self._auteurs = array("I")
+        self._genres = array("I")
+        self._annees = array("i")
+        self._chaines = TableChaines()
+        # Un octet par livre : code du statut dans sa propre (petite) table
+        self._statuts = array("B")
+        self._table_statuts = TableChaines()
+        self._libres = []
+
+    def __getitem__(self, isbn):
+        return LivreColonne(self, self._positions[isbn])
+
+    def __setitem__(self, isbn, livre):
+        auteur = self._chaines.code(livre.auteur)
+        genre = self._chaines.code(livre.genre)
+        statut = self._table_statuts.code(livre.statut)
+        ligne = self._positions.get(isbn)
+        if ligne is None and self._libres:
+            ligne = self._libres.pop()
+        if ligne is None:
+            self._positions[isbn] = len(self._isbns)
+            self._isbns.append(isbn)
+            self._titres.append(livre.titre)
+            self._auteurs.append(auteur)
+            self._genres.append(genre)
+            self._annees.append(livre.annee)
+            self._statuts.append(statut)
+            return
+        self._positions[isbn] = ligne
+        self._isbns[ligne] = isbn
+        self._titres[ligne] = livre.titre
+        self._auteurs[ligne] = auteur
+        self._genres[ligne] = genre
+        self._annees[ligne] = livre.annee
+        self._statuts[ligne] = statut
+
+    def __delitem__(self, isbn):
+        ligne = self._positions.pop(isbn)
+        self._isbns[ligne] = None
+        self._titres[ligne] = None
+        self._libres.append(ligne)
+
+    def __contains__(self, isbn):
+        return isbn in self._positions
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def values(self):
+        for ligne in self._positions.values():
+            yield LivreColonne(self, ligne)
+
+    def clear(self):
+        self.__init__()
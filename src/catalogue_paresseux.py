@@ -0,0 +1,235 @@
+import mmap
+import os
+import re
+import time
+from array import array
+from collections.abc import MutableMapping
+from pathlib import Path
+
+from bibliotheque import Livre
+
+# Une correspondance par ligne : isbn et les 4 champs suivants si la ligne est valide (au moins
+# 6 champs), sinon groupe 1 vide et la ligne entière dans le groupe 2
+_LIGNE_LIVRE = re.compile(rb"^(?:([^;\n]*);(?:[^;\n]*;){4})?([^\n]*)", re.M)
+_VERSION_INDEX = b"LIVRES-IDX 2"
+
+
+# ===================== CLASSE CatalogueParesseux =====================
+
+class CatalogueParesseux(MutableMapping):
+    """
+    Catalogue isbn -> Livre adossé à livres.txt projeté en mémoire (mmap).
+    À l'ouverture, seul l'index isbn -> position de la ligne est construit
+    (ou relu depuis livres.idx) ; chaque Livre est lu à son premier accès
+    puis conservé. L'ordre et les règles d'un dict sont respectés.
+    """
+
+    def __init__(self):
+        # isbn -> position de la ligne dans le fichier, ou Livre déjà lu (ou ajouté)
+        self._entrees = {}
+        self._fichier = None
+        self._mmap = None
+        # Numéros des lignes invalides du fichier ouvert (ignorées, comme au chargement complet)
+        self.lignes_ignorees = []
+
+    # ---------- ouverture ----------
+
+    def ouvrir(self, chemin: str | Path):
+        self.fermer()
+        chemin = Path(chemin)
+        self._projeter(chemin)
+        if not self._mmap:
+            return
+        cache = self._chemin_index(chemin)
+        signature = self._signature(chemin)
+        index = self._lire_index(cache, signature)
+        if index is None:
+            index = self._indexer(self._mmap)
+            self._ecrire_index(cache, signature, *index)
+        self._entrees, self.lignes_ignorees = index
+
+    def _projeter(self, chemin: Path):
+        """
+        Projette le fichier en mémoire (rien s'il est vide). Sous Windows, un fichier ouvert ne
+        peut pas être remplacé, même par un autre processus : la compaction d'un autre poste
+        échouerait. Il y est donc lu d'un bloc puis refermé ; les lignes ne sont toujours
+        analysées qu'au premier accès.
+        """
+        if os.name == "nt":
+            self._mmap = chemin.read_bytes() or None
+            return
+        self._fichier = open(chemin, "rb")
+        if os.fstat(self._fichier.fileno()).st_size:
+            self._mmap = mmap.mmap(self._fichier.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _indexer(contenu):
+        """(isbn -> position de la ligne, numéros des lignes non vides invalides)."""
+        positions, ignorees = {}, []
+        for numero, m in enumerate(_LIGNE_LIVRE.finditer(contenu), start=1):
+            if m.group(1) is not None:
+                positions[m.group(1).decode("utf-8")] = m.start()
+            elif m.group(2).strip():
+                ignorees.append(numero)
+        return positions, ignorees
+
+    def fermer(self):
+        self._entrees = {}
+        self.lignes_ignorees = []
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._mmap = None
+        if self._fichier is not None:
+            self._fichier.close()
+            self._fichier = None
+
+    @staticmethod
+    def _chemin_index(chemin: Path):
+        return chemin.with_suffix(".idx")
+
+    @staticmethod
+    def _signature(chemin: Path):
+        st = os.stat(chemin)
+        return f"{st.st_size} {st.st_mtime_ns}".encode()
+
+    @staticmethod
+    def _lire_index(cache: Path, signature: bytes):
+        """
+        Relit l'index (isbn -> position, numéros des lignes invalides), ou None s'il est absent
+        ou ne correspond plus au fichier.
+        """
+        try:
+            donnees = cache.read_bytes()
+        except OSError:
+            return None
+        entete, _, reste = donnees.partition(b"\n")
+        # En-tête : version, signature (taille et date de modification de livres.txt), nombre
+        # d'entrées et de lignes invalides
+        champs = entete.rsplit(b" ", 2)
+        if len(champs) != 3 or champs[0] != _VERSION_INDEX + b" " + signature \
+                or not (champs[1].isdigit() and champs[2].isdigit()):
+            return None
+        nb, nb_ignorees = int(champs[1]), int(champs[2])
+        taille = 8 * (nb + nb_ignorees)
+        if len(reste) < taille:
+            return None
+        nombres = array("Q")
+        nombres.frombytes(reste[:taille])
+        isbns = reste[taille:].decode("utf-8").split("\n") if nb else []
+        if len(isbns) != nb:
+            return None
+        return dict(zip(isbns, nombres[:nb])), nombres[nb:].tolist()
+
+    @staticmethod
+    def _ecrire_index(cache: Path, signature: bytes, positions: dict[str, int], ignorees: list[int]):
+        tmp = cache.with_suffix(".idx.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(b" ".join([_VERSION_INDEX, signature, str(len(positions)).encode(),
+                                   str(len(ignorees)).encode()]) + b"\n")
+                f.write(array("Q", positions.values()).tobytes())
+                f.write(array("Q", ignorees).tobytes())
+                f.write("\n".join(positions).encode("utf-8"))
+            os.replace(tmp, cache)
+        except OSError:
+            # Le cache n'est qu'une accélération : sans lui, l'index sera reconstruit
+            pass
+
+    # ---------- lecture des lignes ----------
+
+    def _ligne(self, position: int):
+        fin = self._mmap.find(b"\n", position)
+        return self._mmap[position:fin if fin != -1 else len(self._mmap)]
+
+    def champs_indexes(self):
+        """(isbn, {titre, auteur, genre, statut}) pour chaque livre, sans créer les objets Livre."""
+        for isbn, entree in self._entrees.items():
+            if isinstance(entree, Livre):
+                yield isbn, {"titre": entree.titre, "auteur": entree.auteur, "genre": entree.genre,
+                             "statut": entree.statut}
+            else:
+                parts = self._ligne(entree).decode("utf-8").strip().split(";")
+                yield isbn, {"titre": parts[1], "auteur": parts[2], "genre": parts[4], "statut": parts[5]}
+
+    # ---------- interface dict ----------
+
+    def __getitem__(self, isbn):
+        entree = self._entrees[isbn]
+        if not isinstance(entree, Livre):
+            entree = self._entrees[isbn] = Livre.from_line(self._ligne(entree).decode("utf-8"))
+        return entree
+
+    def __setitem__(self, isbn, livre):
+        self._entrees[isbn] = livre
+
+    def __delitem__(self, isbn):
+        del self._entrees[isbn]
+
+    def __contains__(self, isbn):
+        return isbn in self._entrees
+
+    def __iter__(self):
+        return iter(self._entrees)
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def clear(self):
+        self.fermer()
+
+    # ---------- sauvegarde ----------
+
+    def sauvegarder(self, chemin: str | Path):
+        """
+        Réécrit le fichier : les lignes jamais lues sont recopiées telles quelles,
+        puis le fichier est de nouveau projeté et l'index mis à jour.
+        """
+        chemin = Path(chemin)
+        tmp = chemin.with_suffix(".tmp")
+        positions = {}
+        with open(tmp, "wb") as f:
+            position = 0
+            for isbn, entree in self._entrees.items():
+                if isinstance(entree, Livre):
+                    ligne = entree.to_line().encode("utf-8")
+                else:
+                    ligne = self._ligne(entree)
+                positions[isbn] = position
+                f.write(ligne)
+                f.write(b"\n")
+                position += len(ligne) + 1
+        # Le fichier projeté doit être fermé avant d'être remplacé (Windows)
+        entrees, ignorees = self._entrees, self.lignes_ignorees
+        self.fermer()
+        try:
+            _remplacer(tmp, chemin)
+        except OSError:
+            # Fichier inchangé : le catalogue reste adossé à l'ancienne version
+            self._projeter(chemin)
+            self._entrees, self.lignes_ignorees = entrees, ignorees
+            raise
+        self._rouvrir(chemin, entrees, positions)
+
+    def _rouvrir(self, chemin: Path, entrees: dict, positions: dict[str, int]):
+        self._ecrire_index(self._chemin_index(chemin), self._signature(chemin), positions, [])
+        self._projeter(chemin)
+        # Les livres déjà lus restent en mémoire, les autres pointent vers leur nouvelle ligne
+        self._entrees = {
+            isbn: entree if isinstance(entree, Livre) else positions[isbn]
+            for isbn, entree in entrees.items()
+        }
+
+
+def _remplacer(tmp: Path, chemin: Path, essais: int = 20):
+    """
+    os.replace ; sous Windows, réessaie pendant quelques secondes tant qu'un autre
+    programme (antivirus, indexation, ancien poste) garde le fichier ouvert.
+    """
+    for essai in range(essais):
+        try:
+            os.replace(tmp, chemin)
+            return
+        except PermissionError:
+            if essai == essais - 1:
+                raise
+            time.sleep(0.05 * (essai + 1))
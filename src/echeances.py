@@ -0,0 +1,338 @@
+"""
+Dates de retour, échéancier des emprunts en cours et amendes de retard.
+
+La date de retour d'un emprunt est sa date d'emprunt plus la durée de prêt fixée par
+data/regles_pret.json (par membre, sinon par genre, sinon la durée par défaut) :
+
+    {"duree_defaut": 21, "durees_genres": {"Roman": 28}, "durees_membres": {"12": 42},
+     "amende_par_jour": 0.20, "amende_max": 10.00, "delai_reservation": 3}
+
+Un livre réservé mis de côté à son retour attend son réservataire delai_reservation jours.
+
+Les amendes (en centimes) sont inscrites dans data/amendes.csv, en ajout seul :
+une ligne par retour en retard et une ligne par paiement.
+
+Usage :
+    python src/echeances.py avis [--date AAAA-MM-JJ] [--sortie avis.csv]   avis de retard
+    python src/echeances.py a-rendre [--jours 7]                          emprunts bientôt à rendre
+    python src/echeances.py payer ID_MEMBRE MONTANT                       paiement d'une amende
+"""
+import argparse
+import csv
+import datetime
+import heapq
+import json
+import os
+import sys
+from pathlib import Path
+
+from import_export import ecrire_enregistrements
+from index_texte import normaliser
+
+
+def _centimes(euros):
+    return round(float(euros) * 100)
+
+
+def formater_montant(centimes: int):
+    return f"{centimes / 100:.2f} €"
+
+
+def jours_entre(debut: str, fin: str):
+    """Nombre de jours de debut à fin (dates ISO)."""
+    return (datetime.date.fromisoformat(fin) - datetime.date.fromisoformat(debut)).days
+
+
+# ===================== CLASSE ReglesPret =====================
+
+class ReglesPret:
+    """Durées de prêt et de mise de côté des réservations (en jours), barème des amendes."""
+
+    def __init__(self, duree_defaut: int = 21, durees_genres: dict[str, int] | None = None,
+                 durees_membres: dict[str, int] | None = None, amende_par_jour: int = 20, amende_max: int = 1000,
+                 delai_reservation: int = 3):
+        self.duree_defaut = duree_defaut
+        # Genres comparés sans majuscules ni accents, comme dans les index du catalogue
+        self.durees_genres = {normaliser(genre): duree for genre, duree in (durees_genres or {}).items()}
+        self.durees_membres = dict(durees_membres or {})
+        # Montants en centimes ; amende_max plafonne l'amende d'un emprunt (0 : sans plafond)
+        self.amende_par_jour = amende_par_jour
+        self.amende_max = amende_max
+        self.delai_reservation = delai_reservation
+
+    @classmethod
+    def charger(cls, chemin: str | Path):
+        """Lit le fichier de règles ; sans fichier, les valeurs par défaut s'appliquent."""
+        chemin = Path(chemin)
+        if not chemin.exists():
+            return cls()
+        donnees = json.loads(chemin.read_text(encoding="utf-8"))
+        return cls(
+            duree_defaut=int(donnees.get("duree_defaut", 21)),
+            durees_genres={g: int(d) for g, d in donnees.get("durees_genres", {}).items()},
+            durees_membres={str(m): int(d) for m, d in donnees.get("durees_membres", {}).items()},
+            amende_par_jour=_centimes(donnees.get("amende_par_jour", 0.20)),
+            amende_max=_centimes(donnees.get("amende_max", 10.00)),
+            delai_reservation=int(donnees.get("delai_reservation", 3)),
+        )
+
+    def duree(self, genre: str, id_membre: str):
+        if id_membre in self.durees_membres:
+            return self.durees_membres[id_membre]
+        return self.durees_genres.get(normaliser(genre), self.duree_defaut)
+
+    def echeance(self, date_emprunt: str, genre: str, id_membre: str):
+        """Date de retour prévue (ISO), ou "" si la date d'emprunt est inconnue."""
+        try:
+            debut = datetime.date.fromisoformat(date_emprunt)
+        except ValueError:
+            return ""
+        return (debut + datetime.timedelta(days=self.duree(genre, id_membre))).isoformat()
+
+    def expiration_reservation(self, date_retour: str):
+        """Dernier jour où un livre mis de côté le date_retour attend son réservataire."""
+        return (datetime.date.fromisoformat(date_retour) + datetime.timedelta(days=self.delai_reservation)).isoformat()
+
+    def amende(self, jours_retard: int):
+        if jours_retard <= 0:
+            return 0
+        montant = jours_retard * self.amende_par_jour
+        return min(montant, self.amende_max) if self.amende_max else montant
+
+
+# ===================== CLASSE Echeancier =====================
+
+class Echeancier:
+    """
+    Emprunts en cours rangés par date de retour : un tas des dates (les plus proches en
+    premier) et, pour chaque date, le seau des emprunts qui tombent ce jour-là. Les retards
+    se lisent depuis le sommet du tas et les échéances d'une semaine dans sept seaux :
+    le coût dépend du nombre de résultats, pas du nombre d'emprunts en cours.
+    """
+
+    def __init__(self):
+        # Tas des dates ; chaque date du tas a un seau (vide en attendant d'être écarté)
+        self._jours = []
+        self._seaux = {}
+        # (isbn, id_membre) -> date de retour : plusieurs exemplaires d'un titre peuvent être prêtés
+        self._echeances = {}
+        self._source = None
+
+    def vider(self):
+        self._jours.clear()
+        self._seaux.clear()
+        self._echeances.clear()
+        self._source = None
+
+    def differer(self, source):
+        """
+        Reporte la construction à la première requête : source() retourne alors les
+        triplets (isbn, id_membre, echeance) des emprunts en cours. D'ici là, les mises à
+        jour sont ignorées, la source reflétant déjà l'état courant.
+        """
+        self.vider()
+        self._source = source
+
+    def _construire(self):
+        source, self._source = self._source, None
+        for isbn, id_membre, echeance in source():
+            self.ajouter(isbn, id_membre, echeance)
+
+    # ---------- mises à jour ----------
+
+    def ajouter(self, isbn: str, id_membre: str, echeance: str):
+        if self._source is not None or not echeance:
+            return
+        self.retirer(isbn, id_membre)
+        seau = self._seaux.get(echeance)
+        if seau is None:
+            seau = self._seaux[echeance] = {}
+            heapq.heappush(self._jours, echeance)
+        seau[isbn, id_membre] = None
+        self._echeances[isbn, id_membre] = echeance
+
+    def retirer(self, isbn: str, id_membre: str):
+        if self._source is not None:
+            return
+        echeance = self._echeances.pop((isbn, id_membre), None)
+        if echeance is None:
+            return
+        del self._seaux[echeance][isbn, id_membre]
+        # Les seaux vidés restent dans le tas ; on les écarte du sommet, ou tous d'un coup
+        # quand ils deviennent majoritaires
+        while self._jours and not self._seaux[self._jours[0]]:
+            del self._seaux[heapq.heappop(self._jours)]
+        if len(self._jours) > 64 and len(self._jours) > 2 * len(self._echeances):
+            self._seaux = {jour: seau for jour, seau in self._seaux.items() if seau}
+            self._jours = list(self._seaux)
+            heapq.heapify(self._jours)
+
+    # ---------- requêtes ----------
+
+    def _pret(self):
+        if self._source is not None:
+            self._construire()
+
+    def echeance(self, isbn: str, id_membre: str):
+        self._pret()
+        return self._echeances.get((isbn, id_membre))
+
+    def avant(self, date: str):
+        """Emprunts dont la date de retour est antérieure à date : [(echeance, isbn, id_membre)], les plus anciens d'abord."""
+        self._pret()
+        resultats = []
+        jours = self._jours
+        # Parcours du tas dans l'ordre, sans le modifier : un sous-arbre n'est ouvert que si sa racine précède date
+        frontiere = [(jours[0], 0)] if jours else []
+        while frontiere:
+            jour, i = heapq.heappop(frontiere)
+            if jour >= date:
+                continue
+            resultats.extend((jour, isbn, id_membre) for isbn, id_membre in self._seaux[jour])
+            for enfant in (2 * i + 1, 2 * i + 2):
+                if enfant < len(jours):
+                    heapq.heappush(frontiere, (jours[enfant], enfant))
+        return resultats
+
+    def entre(self, debut: str, fin: str):
+        """Emprunts à rendre de debut à fin inclus : [(echeance, isbn, id_membre)], par date."""
+        self._pret()
+        resultats = []
+        jour = datetime.date.fromisoformat(debut)
+        dernier = datetime.date.fromisoformat(fin)
+        while jour <= dernier:
+            cle = jour.isoformat()
+            resultats.extend((cle, isbn, id_membre) for isbn, id_membre in self._seaux.get(cle, ()))
+            jour += datetime.timedelta(days=1)
+        return resultats
+
+    def __len__(self):
+        self._pret()
+        return len(self._echeances)
+
+
+# ===================== CLASSE Amendes =====================
+
+class Amendes:
+    """
+    Registre des amendes en ajout seul (amendes.csv) : date, id_membre, nature
+    ("retard" ou "paiement"), isbn, montant en centimes (négatif pour un paiement).
+    Les soldes par membre sont calculés à la première consultation puis tenus à jour.
+    """
+
+    ENTETE = ["date", "id_membre", "nature", "isbn", "montant"]
+
+    def __init__(self, chemin: str | Path):
+        self.chemin = Path(chemin)
+        self._soldes = None
+
+    def recharger(self):
+        """Oublie les soldes : le fichier a pu être complété par un autre processus."""
+        self._soldes = None
+
+    def __iter__(self):
+        if not self.chemin.exists():
+            return
+        with open(self.chemin, "r", newline="", encoding="utf-8") as f:
+            for enr in csv.DictReader(f):
+                try:
+                    yield enr["date"], enr["id_membre"], enr["nature"], enr["isbn"], int(enr["montant"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+    def ajouter(self, date: str, id_membre: str, nature: str, isbn: str, montant: int):
+        nouveau = not self.chemin.exists()
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.chemin, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if nouveau:
+                writer.writerow(self.ENTETE)
+            writer.writerow([date, id_membre, nature, isbn, montant])
+            f.flush()
+            os.fsync(f.fileno())
+        if self._soldes is not None:
+            self._soldes[id_membre] = self._soldes.get(id_membre, 0) + montant
+
+    def soldes(self):
+        """{id_membre: montant dû en centimes} (membres à solde nul compris)."""
+        if self._soldes is None:
+            soldes = {}
+            for _, id_membre, _, _, montant in self:
+                soldes[id_membre] = soldes.get(id_membre, 0) + montant
+            self._soldes = soldes
+        return self._soldes
+
+    def solde(self, id_membre: str):
+        return self.soldes().get(id_membre, 0)
+
+    def mouvements(self, id_membre: str):
+        return [mouvement for mouvement in self if mouvement[1] == id_membre]
+
+
+# ===================== Avis de retard =====================
+
+CHAMPS_AVIS = ["id_membre", "nom", "isbn", "titre", "date_emprunt", "echeance", "jours_retard",
+               "amende_a_ce_jour", "solde_amendes"]
+
+
+def avis_de_retard(biblio, date: str | None = None):
+    """Un avis (dict) par emprunt en retard à la date donnée, regroupés par membre."""
+    date = date or datetime.date.today().isoformat()
+    retards = sorted(biblio.emprunts_en_retard(date), key=lambda r: (r[2], r[0]))
+    for echeance, isbn, id_membre in retards:
+        membre = biblio.membres.get(id_membre)
+        livre = biblio.livres.get(isbn)
+        jours = jours_entre(echeance, date)
+        yield {
+            "id_membre": id_membre,
+            "nom": membre.nom if membre else "Nom inconnu",
+            "isbn": isbn,
+            "titre": livre.titre if livre else "Titre inconnu",
+            "date_emprunt": membre.livres_empruntes.get(isbn, "") if membre else "",
+            "echeance": echeance,
+            "jours_retard": jours,
+            "amende_a_ce_jour": formater_montant(biblio.regles_pret.amende(jours)),
+            "solde_amendes": formater_montant(biblio.amendes.solde(id_membre)),
+        }
+
+
+def ecrire_avis(biblio, chemin: str | Path, date: str | None = None):
+    """Écrit les avis de retard en CSV (ou JSON Lines selon l'extension) ; retourne leur nombre."""
+    return ecrire_enregistrements(chemin, avis_de_retard(biblio, date), CHAMPS_AVIS)
+
+
+if __name__ == "__main__":
+    from bibliotheque import STOCKAGES, ouvrir_bibliotheque
+    from exceptions import MembreInexistantError
+
+    ROOT_DIR = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Échéances des emprunts, avis de retard et amendes")
+    parser.add_argument("--data", default=ROOT_DIR / "data", type=Path)
+    parser.add_argument("--stockage", default=os.environ.get("BIBLIO_STOCKAGE", "texte"), choices=STOCKAGES)
+    sous = parser.add_subparsers(dest="commande", required=True)
+    p = sous.add_parser("avis", help="Écrit les avis de retard dans un fichier")
+    p.add_argument("--date", default=None, help="Date de référence AAAA-MM-JJ (défaut : aujourd'hui)")
+    p.add_argument("--sortie", default=None, type=Path, help="Fichier CSV ou .jsonl (défaut : DATA/avis-DATE.csv)")
+    p = sous.add_parser("a-rendre", help="Emprunts à rendre dans les prochains jours")
+    p.add_argument("--jours", default=7, type=int)
+    p = sous.add_parser("payer", help="Enregistre le paiement d'une amende")
+    p.add_argument("id_membre")
+    p.add_argument("montant", type=float, help="Montant en euros")
+    args = parser.parse_args()
+
+    biblio = ouvrir_bibliotheque(args.data, stockage=args.stockage, partage=True, paresseux=True)
+    biblio.charger_tout()
+    if args.commande == "avis":
+        date = args.date or datetime.date.today().isoformat()
+        sortie = args.sortie or args.data / f"avis-{date}.csv"
+        print(f"{ecrire_avis(biblio, sortie, date)} avis de retard écrits dans {sortie}")
+    elif args.commande == "a-rendre":
+        for echeance, isbn, id_membre in biblio.emprunts_a_rendre(args.jours):
+            titre = biblio.livres[isbn].titre if isbn in biblio.livres else "Titre inconnu"
+            print(f"{echeance} - '{titre}' (ISBN {isbn}) - membre {id_membre}")
+    else:
+        try:
+            biblio.payer_amende(args.id_membre, _centimes(args.montant))
+        except (MembreInexistantError, ValueError) as e:
+            print(f"[!] {e}", file=sys.stderr)
+            raise SystemExit(1)
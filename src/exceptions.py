@@ -18,3 +18,23 @@ class LivreInexistantError(Exception):
     def __init__(self, message="Le livre n'existe pas."):
         super().__init__(message)
 
+
+class EmpruntInexistantError(Exception):
+    """Levée quand on retourne un livre que le membre n'a pas emprunté."""
+    def __init__(self, message="Ce livre n'est pas emprunté par ce membre."):
+        super().__init__(message)
+
+class ReservationImpossibleError(Exception):
+    """Levée quand un livre ne peut pas être réservé (disponible, déjà emprunté ou déjà réservé par le membre)."""
+    def __init__(self, message="Ce livre ne peut pas être réservé."):
+        super().__init__(message)
+
+class ReservationInexistanteError(Exception):
+    """Levée quand on annule une réservation que le membre n'a pas faite."""
+    def __init__(self, message="Ce membre n'a pas réservé ce livre."):
+        super().__init__(message)
+
+class InstantaneCorrompuError(Exception):
+    """Levée quand un instantané binaire est illisible ou ne correspond pas à sa somme de contrôle."""
+    def __init__(self, message="L'instantané binaire est corrompu."):
+        super().__init__(message)
@@ -0,0 +1,299 @@
+"""
+Exemplaires physiques des livres : chaque titre (isbn) regroupe des exemplaires identifiés
+par leur code-barres, et tient ses compteurs d'exemplaires disponibles et au total.
+
+Un titre sans exemplaire déclaré en a un seul, dont le code-barres est l'isbn : son état se
+déduit du statut du livre, si bien que les catalogues existants se lisent sans migration.
+Seuls les titres à plusieurs exemplaires (ou renumérotés) figurent dans data/exemplaires.txt :
+
+    code_barres;isbn;etat;id_membre      etat : disponible, emprunté ou réservé
+
+Les livres saisis en double sous de faux isbns (un par exemplaire) se regroupent avec la
+commande fusionner : les faux isbns deviennent les codes-barres des exemplaires du titre.
+
+Usage :
+    python src/exemplaires.py ajouter ISBN [--nombre 3] [--codes C1 C2 ...]   nouveaux exemplaires
+    python src/exemplaires.py retirer CODE_BARRES                           exemplaire perdu ou réformé
+    python src/exemplaires.py etat ISBN                                     exemplaires d'un titre
+    python src/exemplaires.py fusionner [--appliquer]                       regroupe les titres en double
+"""
+import argparse
+import os
+from pathlib import Path
+
+from index_texte import normaliser
+
+# Détenteur d'un exemplaire sorti d'après le statut du livre, sans emprunteur ni réservataire
+# connu (catalogues d'avant le suivi des emprunts par membre)
+DETENTEUR_INCONNU = ""
+
+
+# ===================== CLASSE Stock =====================
+
+class Stock:
+    """
+    Exemplaires d'un titre. Les exemplaires libres forment une pile : un emprunt prend celui
+    du sommet et un retour l'y remet, en O(1) quel que soit le nombre d'exemplaires ; les
+    compteurs disponibles et total sont les longueurs des listes.
+    """
+
+    __slots__ = ("codes", "libres", "prets", "reserves")
+
+    def __init__(self, codes=()):
+        # Codes-barres dans l'ordre d'entrée au catalogue
+        self.codes = list(codes)
+        # Pile des exemplaires libres, le premier code au sommet
+        self.libres = self.codes[::-1]
+        # id_membre -> code-barres de l'exemplaire prêté ou mis de côté pour lui
+        self.prets = {}
+        self.reserves = {}
+
+    @property
+    def disponibles(self):
+        return len(self.libres)
+
+    @property
+    def total(self):
+        return len(self.codes)
+
+    @property
+    def statut(self):
+        """Statut du titre : disponible tant qu'il reste un exemplaire libre."""
+        if self.libres:
+            return "disponible"
+        return "réservé" if self.reserves else "emprunté"
+
+    def prendre(self, code: str | None = None):
+        """Retire un exemplaire libre (code s'il l'est, sinon celui du sommet) ; retourne son code."""
+        if code is not None and code != self.libres[-1] and code in self.libres:
+            # Relecture du journal : l'exemplaire noté lors de l'emprunt
+            self.libres.remove(code)
+            return code
+        return self.libres.pop()
+
+    def etats(self):
+        """(code_barres, etat, id_membre) de chaque exemplaire, dans l'ordre des codes."""
+        occupants = {code: ("emprunté", idm) for idm, code in self.prets.items()}
+        occupants.update((code, ("réservé", idm)) for idm, code in self.reserves.items())
+        for code in self.codes:
+            yield (code, *occupants.get(code, ("disponible", "")))
+
+    def repartir(self, emprunteurs, reservataires):
+        """
+        Réattribue les exemplaires aux emprunteurs puis aux réservataires donnés : ceux qui
+        avaient déjà un exemplaire le gardent, les autres prennent les exemplaires restants.
+        """
+        anciens = {**self.reserves, **self.prets}
+        occupes = set()
+        prets, reserves, a_placer = {}, {}, []
+        for cible, membres in ((prets, emprunteurs), (reserves, reservataires)):
+            for idm in membres:
+                code = anciens.get(idm)
+                if code is not None and code not in occupes:
+                    cible[idm] = code
+                    occupes.add(code)
+                else:
+                    a_placer.append((cible, idm))
+        libres = [code for code in reversed(self.codes) if code not in occupes]
+        for cible, idm in a_placer:
+            # Plus d'emprunts que d'exemplaires : l'anomalie reste signalée par verifier_coherence
+            if libres:
+                cible[idm] = libres.pop()
+        self.prets, self.reserves, self.libres = prets, reserves, libres
+
+
+# ===================== CLASSE Exemplaires =====================
+
+class Exemplaires:
+    """
+    Stocks des titres, créés à la première consultation par la fabrique fournie par la
+    bibliothèque (exemplaire unique pour un titre jamais déclaré) ou lus dans
+    exemplaires.txt. Un emprunt ou un retour ne touche que le stock de son titre.
+    """
+
+    def __init__(self, fabrique):
+        # isbn -> Stock, pour les titres déclarés et ceux déjà consultés
+        self._stocks = {}
+        # code-barres -> isbn des exemplaires des stocks chargés
+        self._isbns = {}
+        self._fabrique = fabrique
+
+    def vider(self):
+        self._stocks.clear()
+        self._isbns.clear()
+
+    def stock(self, isbn: str):
+        stock = self._stocks.get(isbn)
+        if stock is None:
+            stock = self._stocks[isbn] = self._fabrique(isbn)
+            for code in stock.codes:
+                self._isbns[code] = isbn
+        return stock
+
+    def charge(self, isbn: str):
+        """Stock du titre s'il est déjà en mémoire, sinon None (sans le fabriquer)."""
+        return self._stocks.get(isbn)
+
+    def charges(self):
+        return self._stocks.items()
+
+    def isbn_de(self, code: str):
+        """Isbn de l'exemplaire parmi les stocks chargés, ou None."""
+        return self._isbns.get(code)
+
+    # ---------- exemplaires ----------
+
+    def ajouter(self, isbn: str, codes: list[str]):
+        stock = self.stock(isbn)
+        for code in codes:
+            # Relecture du journal : un exemplaire déjà ajouté ne l'est pas deux fois
+            if self._isbns.get(code) != isbn:
+                stock.codes.append(code)
+                stock.libres.append(code)
+                self._isbns[code] = isbn
+
+    def retirer(self, isbn: str, code: str):
+        """Retire un exemplaire libre ; KeyError s'il n'est pas libre (ou déjà retiré)."""
+        stock = self.stock(isbn)
+        if code not in stock.libres:
+            raise KeyError(code)
+        stock.libres.remove(code)
+        stock.codes.remove(code)
+        del self._isbns[code]
+
+    def fusionner(self, isbn: str, autre: str):
+        """Range les exemplaires du titre autre sous isbn (un membre n'en détient qu'un par titre)."""
+        stock, source = self.stock(isbn), self.stock(autre)
+        del self._stocks[autre]
+        stock.codes += source.codes
+        stock.libres[:0] = source.libres
+        stock.prets.update(source.prets)
+        stock.reserves.update(source.reserves)
+        for code in source.codes:
+            self._isbns[code] = isbn
+
+    def oublier(self, isbn: str):
+        """Titre supprimé du catalogue : ses exemplaires disparaissent avec lui."""
+        stock = self._stocks.pop(isbn, None)
+        if stock is not None:
+            for code in stock.codes:
+                self._isbns.pop(code, None)
+
+    # ---------- lignes du fichier exemplaires.txt ----------
+
+    @staticmethod
+    def declare(isbn: str, stock: Stock):
+        """Faux pour l'exemplaire unique implicite d'un titre, qui n'a pas à être écrit."""
+        return stock.codes != [isbn]
+
+    def lignes_de(self, isbn: str):
+        stock = self._stocks.get(isbn)
+        if stock is None or not self.declare(isbn, stock):
+            return
+        for code, etat, id_membre in stock.etats():
+            yield code, isbn, etat, id_membre
+
+    def lignes(self):
+        """(code_barres, isbn, etat, id_membre) des exemplaires des titres déclarés."""
+        for isbn in self._stocks:
+            yield from self.lignes_de(isbn)
+
+    @staticmethod
+    def stock_depuis(lignes):
+        """Stock construit depuis les (code_barres, etat, id_membre) d'un titre, dans l'ordre."""
+        stock = Stock()
+        for code, etat, id_membre in lignes:
+            stock.codes.append(code)
+            if etat == "emprunté":
+                stock.prets[id_membre] = code
+            elif etat == "réservé":
+                stock.reserves[id_membre] = code
+            else:
+                stock.libres.append(code)
+        stock.libres.reverse()
+        return stock
+
+    def charger_lignes(self, lignes):
+        self.vider()
+        par_titre = {}
+        for code, isbn, etat, id_membre in lignes:
+            par_titre.setdefault(isbn, []).append((code, etat, id_membre))
+        for isbn, lignes_titre in par_titre.items():
+            self._stocks[isbn] = self.stock_depuis(lignes_titre)
+            for code, _, _ in lignes_titre:
+                self._isbns[code] = isbn
+
+    def charger(self, chemin: str | Path):
+        chemin = Path(chemin)
+        if not chemin.exists():
+            # Catalogue d'avant les exemplaires : un exemplaire implicite par titre
+            self.vider()
+            return
+        with open(chemin, "r", encoding="utf-8") as f:
+            self.charger_lignes(tuple(ligne.rstrip("\n").split(";")) for ligne in f if ligne.count(";") == 3)
+
+    def sauvegarder(self, chemin: str | Path):
+        chemin = Path(chemin)
+        tmp = chemin.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for ligne in self.lignes():
+                f.write(";".join(ligne) + "\n")
+        tmp.replace(chemin)
+
+
+# ===================== Titres en double =====================
+
+def titres_en_double(biblio):
+    """
+    Livres saisis plusieurs fois (titre, auteur, année et genre identiques, sans tenir compte
+    des majuscules ni des accents) : [[isbn conservé, autres isbns...]], le plus petit isbn d'abord.
+    """
+    groupes = {}
+    for livre in biblio.livres.values():
+        cle = (normaliser(livre.titre), normaliser(livre.auteur), livre.annee, normaliser(livre.genre))
+        groupes.setdefault(cle, []).append(livre.isbn)
+    return [sorted(isbns) for isbns in groupes.values() if len(isbns) > 1]
+
+
+if __name__ == "__main__":
+    from bibliotheque import STOCKAGES, ouvrir_bibliotheque
+    from exceptions import LivreInexistantError, LivreIndisponibleError
+
+    ROOT_DIR = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Exemplaires des livres")
+    parser.add_argument("--data", default=ROOT_DIR / "data", type=Path)
+    parser.add_argument("--stockage", default=os.environ.get("BIBLIO_STOCKAGE", "texte"), choices=STOCKAGES)
+    sous = parser.add_subparsers(dest="commande", required=True)
+    p = sous.add_parser("ajouter", help="Ajoute des exemplaires à un titre")
+    p.add_argument("isbn")
+    p.add_argument("--nombre", default=1, type=int)
+    p.add_argument("--codes", nargs="+", default=None, help="Codes-barres (défaut : ISBN-2, ISBN-3...)")
+    p = sous.add_parser("retirer", help="Retire un exemplaire libre")
+    p.add_argument("code")
+    p = sous.add_parser("etat", help="Exemplaires d'un titre")
+    p.add_argument("isbn")
+    p = sous.add_parser("fusionner", help="Regroupe les livres saisis en double sous un seul isbn")
+    p.add_argument("--appliquer", action="store_true", help="Sans cette option, les groupes sont seulement listés")
+    args = parser.parse_args()
+
+    biblio = ouvrir_bibliotheque(args.data, stockage=args.stockage, partage=True)
+    biblio.charger_tout()
+    try:
+        if args.commande == "ajouter":
+            biblio.ajouter_exemplaires(args.isbn, args.nombre, args.codes)
+        elif args.commande == "retirer":
+            biblio.retirer_exemplaire(args.code)
+        elif args.commande == "etat":
+            disponibles, total = biblio.disponibilite(args.isbn)
+            print(f"{biblio.livres[args.isbn]} : {disponibles}/{total} exemplaires disponibles")
+            for code, etat, id_membre in biblio.exemplaires.stock(args.isbn).etats():
+                print(f"- {code} : {etat}" + (f" ({id_membre})" if id_membre else ""))
+        else:
+            for isbns in titres_en_double(biblio):
+                print(f"'{biblio.livres[isbns[0]].titre}' : {', '.join(isbns)}")
+                if args.appliquer:
+                    biblio.fusionner_titres(isbns[0], isbns[1:])
+    except (LivreInexistantError, LivreIndisponibleError, ValueError) as e:
+        print(f"[!] {e}")
+        raise SystemExit(1)
+    biblio.sauvegarder_tout()
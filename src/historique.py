@@ -0,0 +1,467 @@
+import argparse
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+
+from verrou import VerrouFichier
+
+_MOIS = re.compile(r"\d{4}-\d{2}")
+
+
+def _lignes_depuis_la_fin(f, taille_bloc: int):
+    """Lignes (bytes) d'un fichier binaire positionnable, de la dernière à la première."""
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    reste = b""
+    while position > 0:
+        lecture = min(taille_bloc, position)
+        position -= lecture
+        f.seek(position)
+        lignes = (f.read(lecture) + reste).split(b"\n")
+        # La première ligne du bloc peut être incomplète : on la garde pour le tour suivant
+        reste = lignes.pop(0)
+        yield from reversed(lignes)
+    yield reste
+
+
+# ===================== CLASSE Historique =====================
+
+class Historique:
+    """
+    Historique des emprunts et retours conservé en journal CSV sur disque.
+    Les nouveaux événements sont mis en tampon puis ajoutés en fin de fichier ;
+    la lecture se fait à la demande (itérateur ou lecture depuis la fin).
+    """
+
+    ENTETE = ["date", "isbn", "id_membre", "action"]
+    TAILLE_BLOC = 64 * 1024
+
+    def __init__(self, chemin: str | Path, taille_tampon: int = 1000):
+        self.chemin = Path(chemin)
+        self.taille_tampon = taille_tampon
+        self._tampon = []
+        self._nb_fichier = None
+
+    @staticmethod
+    def _valide(rec):
+        return len(rec) >= 4 and all(champ.strip() for champ in rec[:4])
+
+    def recharger(self):
+        """Oublie les événements non enregistrés et le compteur de lignes."""
+        self._tampon.clear()
+        self._nb_fichier = None
+
+    def ajouter(self, rec: tuple[str, str, str, str]):
+        self._tampon.append(tuple(rec))
+        if len(self._tampon) >= self.taille_tampon:
+            self.vider()
+
+    # Compatibilité avec l'ancienne liste de tuples
+    append = ajouter
+
+    def vider(self):
+        """Écrit les événements en tampon à la fin du fichier (coût proportionnel au tampon seul)."""
+        if not self._tampon:
+            return
+        self._ecrire(self.chemin, self._tampon, self.ENTETE)
+        if self._nb_fichier is not None:
+            self._nb_fichier += len(self._tampon)
+        self._tampon.clear()
+
+    @staticmethod
+    def _ecrire(chemin: Path, enregistrements: list, entete: list[str] | None):
+        nouveau = not chemin.exists() or chemin.stat().st_size == 0
+        fin_de_ligne = nouveau or Historique._termine_par_saut_de_ligne(chemin)
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        with open(chemin, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if nouveau and entete:
+                writer.writerow(entete)
+            elif not fin_de_ligne:
+                f.write("\r\n")
+            writer.writerows(enregistrements)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _termine_par_saut_de_ligne(chemin: Path):
+        with open(chemin, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def __iter__(self):
+        for row in self._iter_fichier():
+            yield tuple(champ.strip() for champ in row[:4])
+        yield from list(self._tampon)
+
+    def __reversed__(self):
+        """Parcourt l'historique du plus récent au plus ancien en lisant le fichier par la fin."""
+        yield from reversed(list(self._tampon))
+        if not self.chemin.exists():
+            return
+        with open(self.chemin, "rb") as f:
+            for ligne in _lignes_depuis_la_fin(f, self.TAILLE_BLOC):
+                rec = self._decoder(ligne)
+                if rec:
+                    yield rec
+
+    def _decoder(self, ligne: bytes):
+        # Même analyse qu'à l'écriture (csv.writer) : un champ peut contenir des virgules entre guillemets
+        row = next(csv.reader([ligne.decode("utf-8").rstrip("\r\n")]), [])
+        if row == self.ENTETE or not self._valide(row):
+            return None
+        return tuple(champ.strip() for champ in row[:4])
+
+    @staticmethod
+    def _retenu(rec, date_min, date_max, isbn, id_membre):
+        return ((not date_min or rec[0] >= date_min) and (not date_max or rec[0] <= date_max)
+                and (isbn is None or rec[1] == isbn) and (id_membre is None or rec[2] == id_membre))
+
+    def chercher(self, date_min: str | None = None, date_max: str | None = None, isbn: str | None = None,
+                 id_membre: str | None = None, recents_d_abord: bool = True):
+        """
+        Événements filtrés, du plus récent au plus ancien par défaut. Le fichier étant
+        chronologique, la lecture s'arrête dès que la plage de dates est dépassée.
+        """
+        source = reversed(self) if recents_d_abord else iter(self)
+        for rec in source:
+            date = rec[0]
+            if recents_d_abord and date_min and date < date_min:
+                break
+            if not recents_d_abord and date_max and date > date_max:
+                break
+            if self._retenu(rec, date_min, date_max, isbn, id_membre):
+                yield rec
+
+    def dernieres(self, n: int):
+        """Retourne les n derniers événements, dans l'ordre chronologique."""
+        derniers = []
+        for rec in reversed(self):
+            if len(derniers) >= n:
+                break
+            derniers.append(rec)
+        derniers.reverse()
+        return derniers
+
+    def __len__(self):
+        if self._nb_fichier is None:
+            self._nb_fichier = sum(1 for _ in self._iter_fichier())
+        return self._nb_fichier + len(self._tampon)
+
+    def _iter_fichier(self):
+        if not self.chemin.exists():
+            return
+        with open(self.chemin, "r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if self._valide(row):
+                    yield row
+
+    def __bool__(self):
+        if self._tampon:
+            return True
+        return self.chemin.exists() and next(self._iter_fichier(), None) is not None
+
+    # ---------- réécriture ----------
+
+    @staticmethod
+    def _renommer(enregistrements, correspondance: dict[str, str]):
+        for date, isbn, id_membre, action in enregistrements:
+            yield date, correspondance.get(isbn, isbn), id_membre, action
+
+    def remplacer_isbns(self, correspondance: dict[str, str]):
+        """Réécrit l'historique en remplaçant des isbns (titres fusionnés)."""
+        self.vider()
+        if not self.chemin.exists():
+            return
+        tmp = self.chemin.with_suffix(".tmp")
+        tmp.unlink(missing_ok=True)
+        self._ecrire(tmp, self._renommer(iter(self), correspondance), self.ENTETE)
+        os.replace(tmp, self.chemin)
+
+
+# ===================== CLASSE HistoriquePartitionne =====================
+
+class HistoriquePartitionne(Historique):
+    """
+    Historique découpé en partitions mensuelles (AAAA-MM.csv dans un dossier), chacune
+    avec son index isbn / id_membre -> positions des lignes. Les recherches par période,
+    par membre ou par livre ne lisent que les partitions concernées, et seulement les
+    lignes indexées. Les anciennes partitions peuvent être compressées (AAAA-MM.csv.gz).
+    L'index d'un mois terminé est écrit à côté de sa partition (AAAA-MM.idx) ;
+    celui du mois en cours est tenu en mémoire.
+    """
+
+    def __init__(self, dossier: str | Path, taille_tampon: int = 1000):
+        super().__init__(Path(dossier), taille_tampon)
+        self.dossier = self.chemin
+        # Clé de partition -> {"taille", "nb", "isbn": {isbn: [positions]}, "id_membre": {...}}
+        self._index = {}
+
+    @staticmethod
+    def cle_partition(date: str):
+        # Dates illisibles : regroupées dans une partition placée avant toutes les autres
+        return date[:7] if _MOIS.match(date) else "0000-00"
+
+    def _partitions(self):
+        """Clés des partitions existantes, dans l'ordre chronologique."""
+        if not self.dossier.is_dir():
+            return []
+        cles = set()
+        for chemin in self.dossier.iterdir():
+            if chemin.name.endswith(".csv.gz"):
+                cles.add(chemin.name[:-len(".csv.gz")])
+            elif chemin.name.endswith(".csv"):
+                cles.add(chemin.name[:-len(".csv")])
+        return sorted(cles)
+
+    def _chemin(self, cle: str):
+        return self.dossier / f"{cle}.csv"
+
+    def _chemin_archive(self, cle: str):
+        return self.dossier / f"{cle}.csv.gz"
+
+    def _chemin_index(self, cle: str):
+        return self.dossier / f"{cle}.idx"
+
+    def _ouvrir(self, cle: str):
+        """Contenu de la partition en binaire, décompressé si elle est archivée."""
+        chemin = self._chemin(cle)
+        if chemin.exists():
+            return open(chemin, "rb")
+        archive = self._chemin_archive(cle)
+        if archive.exists():
+            # Une partition ne couvre qu'un mois : elle tient en mémoire une fois décompressée
+            return io.BytesIO(gzip.decompress(archive.read_bytes()))
+        return io.BytesIO()
+
+    # ---------- écriture ----------
+
+    def vider(self):
+        if not self._tampon:
+            return
+        par_partition = {}
+        for rec in self._tampon:
+            par_partition.setdefault(self.cle_partition(rec[0]), []).append(rec)
+        for cle, enregistrements in par_partition.items():
+            if not self._chemin(cle).exists() and self._chemin_archive(cle).exists():
+                # Événement daté d'un mois archivé : la partition redevient un CSV
+                self._desarchiver(cle)
+            self._ecrire(self._chemin(cle), enregistrements, None)
+        self._tampon.clear()
+
+    def migrer_depuis(self, chemin_csv: str | Path):
+        """Répartit un historique.csv existant dans les partitions puis le renomme en .migre."""
+        chemin_csv = Path(chemin_csv)
+        for rec in Historique(chemin_csv):
+            self._tampon.append(rec)
+            if len(self._tampon) >= 100_000:
+                self.vider()
+        self.vider()
+        os.replace(chemin_csv, chemin_csv.with_name(chemin_csv.name + ".migre"))
+
+    def remplacer_isbns(self, correspondance: dict[str, str]):
+        """Réécrit les seules partitions où figurent ces isbns (d'après leur index), puis leur index."""
+        self.vider()
+        for cle in self._partitions():
+            if not any(isbn in self._index_de(cle)["isbn"] for isbn in correspondance):
+                continue
+            tmp = self.dossier / f"{cle}.tmp"
+            tmp.unlink(missing_ok=True)
+            self._ecrire(tmp, self._renommer(self._enregistrements(cle), correspondance), None)
+            if self._chemin(cle).exists():
+                os.replace(tmp, self._chemin(cle))
+            else:
+                # Partition archivée : elle le reste
+                archive = self._chemin_archive(cle)
+                tmp_archive = archive.with_name(archive.name + ".tmp")
+                with open(tmp, "rb") as source, gzip.open(tmp_archive, "wb") as cible:
+                    shutil.copyfileobj(source, cible)
+                os.replace(tmp_archive, archive)
+                tmp.unlink()
+            self._chemin_index(cle).unlink(missing_ok=True)
+            self._index.pop(cle, None)
+
+    # ---------- archivage ----------
+
+    def archiver(self, avant: str):
+        """Compresse les partitions des mois antérieurs à avant ("AAAA-MM") ; retourne leurs clés."""
+        archivees = []
+        for cle in self._partitions():
+            chemin = self._chemin(cle)
+            if cle >= avant or not chemin.exists():
+                continue
+            # L'index est écrit avant la compression, pour ne plus relire l'archive
+            self._index_de(cle)
+            archive = self._chemin_archive(cle)
+            tmp = archive.with_name(archive.name + ".tmp")
+            with open(chemin, "rb") as source, gzip.open(tmp, "wb") as cible:
+                shutil.copyfileobj(source, cible)
+            os.replace(tmp, archive)
+            chemin.unlink()
+            archivees.append(cle)
+        return archivees
+
+    def _desarchiver(self, cle: str):
+        archive = self._chemin_archive(cle)
+        tmp = self._chemin(cle).with_suffix(".tmp")
+        with gzip.open(archive, "rb") as source, open(tmp, "wb") as cible:
+            shutil.copyfileobj(source, cible)
+        os.replace(tmp, self._chemin(cle))
+        archive.unlink()
+
+    # ---------- index par partition ----------
+
+    def _index_de(self, cle: str):
+        """Index de la partition, complété par les lignes ajoutées depuis sa dernière mise à jour."""
+        index = self._index.get(cle) or self._lire_index(cle)
+        chemin = self._chemin(cle)
+        if chemin.exists():
+            taille = chemin.stat().st_size
+        elif index["taille"] == 0 and self._chemin_archive(cle).exists():
+            taille = None  # archive jamais indexée
+        else:
+            taille = index["taille"]
+        if taille != index["taille"]:
+            if taille is not None and taille < index["taille"]:
+                # Fichier remplacé : l'index repart de zéro
+                index = self._index_vide()
+            self._indexer(cle, index)
+            if cle < datetime.date.today().isoformat()[:7]:
+                self._ecrire_index(cle, index)
+        self._index[cle] = index
+        return index
+
+    @staticmethod
+    def _index_vide():
+        return {"taille": 0, "nb": 0, "isbn": {}, "id_membre": {}}
+
+    def _indexer(self, cle: str, index: dict):
+        with self._ouvrir(cle) as f:
+            position = index["taille"]
+            f.seek(position)
+            for ligne in f:
+                if not ligne.endswith(b"\n"):
+                    break  # ligne en cours d'écriture par un autre processus
+                rec = self._decoder(ligne)
+                if rec:
+                    index["nb"] += 1
+                    index["isbn"].setdefault(rec[1], []).append(position)
+                    index["id_membre"].setdefault(rec[2], []).append(position)
+                position += len(ligne)
+            index["taille"] = position
+
+    def _lire_index(self, cle: str):
+        try:
+            index = json.loads(self._chemin_index(cle).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return self._index_vide()
+        if not isinstance(index, dict) or index.keys() != self._index_vide().keys():
+            return self._index_vide()
+        return index
+
+    def _ecrire_index(self, cle: str, index: dict):
+        chemin = self._chemin_index(cle)
+        tmp = chemin.with_suffix(".idx.tmp")
+        try:
+            tmp.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, chemin)
+        except OSError:
+            # L'index n'est qu'une accélération : il sera reconstruit
+            pass
+
+    # ---------- lecture ----------
+
+    def _enregistrements(self, cle: str, inverse: bool = False):
+        with self._ouvrir(cle) as f:
+            lignes = _lignes_depuis_la_fin(f, self.TAILLE_BLOC) if inverse else f
+            for ligne in lignes:
+                rec = self._decoder(ligne)
+                if rec:
+                    yield rec
+
+    def _lire_positions(self, cle: str, positions):
+        with self._ouvrir(cle) as f:
+            for position in positions:
+                f.seek(position)
+                rec = self._decoder(f.readline())
+                if rec:
+                    yield rec
+
+    def __iter__(self):
+        for cle in self._partitions():
+            yield from self._enregistrements(cle)
+        yield from list(self._tampon)
+
+    def __reversed__(self):
+        yield from reversed(list(self._tampon))
+        for cle in reversed(self._partitions()):
+            yield from self._enregistrements(cle, inverse=True)
+
+    def __len__(self):
+        return sum(self._index_de(cle)["nb"] for cle in self._partitions()) + len(self._tampon)
+
+    def __bool__(self):
+        return bool(self._tampon) or next(iter(self), None) is not None
+
+    def chercher(self, date_min: str | None = None, date_max: str | None = None, isbn: str | None = None,
+                 id_membre: str | None = None, recents_d_abord: bool = True):
+        """
+        Événements filtrés, du plus récent au plus ancien par défaut. Seules les partitions
+        de la plage de dates sont ouvertes ; avec un isbn ou un membre, seules les lignes
+        données par leur index sont lues.
+        """
+        # Une partition AAAA-MM ne contient que des dates commençant par sa clé
+        cles = [cle for cle in self._partitions()
+                if (not date_min or cle >= date_min[:7]) and (not date_max or cle <= date_max[:7])]
+        tampon = [rec for rec in self._tampon if self._retenu(rec, date_min, date_max, isbn, id_membre)]
+        if recents_d_abord:
+            cles.reverse()
+            yield from reversed(tampon)
+        for cle in cles:
+            if isbn is None and id_membre is None:
+                enregistrements = self._enregistrements(cle, inverse=recents_d_abord)
+            else:
+                index = self._index_de(cle)
+                positions = None
+                for champ, valeur in (("isbn", isbn), ("id_membre", id_membre)):
+                    if valeur is not None:
+                        trouvees = index[champ].get(valeur, [])
+                        positions = trouvees if positions is None else sorted(set(positions) & set(trouvees))
+                enregistrements = self._lire_positions(cle, reversed(positions) if recents_d_abord else positions)
+            for rec in enregistrements:
+                if self._retenu(rec, date_min, date_max, isbn, id_membre):
+                    yield rec
+        if not recents_d_abord:
+            yield from tampon
+
+
+if __name__ == "__main__":
+    ROOT_DIR = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Partitions mensuelles de l'historique")
+    parser.add_argument("commande", choices=["partitionner", "archiver"])
+    parser.add_argument("--data", default=ROOT_DIR / "data", type=Path)
+    parser.add_argument("--avant", default=None,
+                        help="archiver : mois AAAA-MM, les partitions antérieures sont compressées (défaut : il y a un an)")
+    args = parser.parse_args()
+
+    historique = HistoriquePartitionne(args.data / "historique")
+    # Même verrou que les bibliothèques en mode partagé
+    with VerrouFichier(args.data / "bibliotheque.lock"):
+        if args.commande == "partitionner":
+            source = args.data / "historique.csv"
+            if not source.exists():
+                parser.error(f"{source} introuvable")
+            historique.migrer_depuis(source)
+            print(f"Historique réparti en {len(historique._partitions())} partitions dans {historique.dossier}")
+        else:
+            avant = args.avant or (datetime.date.today() - datetime.timedelta(days=365)).isoformat()[:7]
+            archivees = historique.archiver(avant)
+            print(f"{len(archivees)} partitions archivées : {', '.join(archivees) or 'aucune'}")
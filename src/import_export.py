@@ -0,0 +1,159 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+CHAMPS_LIVRES = ["isbn", "titre", "auteur", "annee", "genre", "statut"]
+CHAMPS_MEMBRES = ["id_membre", "nom"]
+
+ISBN_VALIDE = re.compile(r"(\d{10}|\d{13})")
+
+
+def format_fichier(chemin: str | Path, format: str | None = None):
+    if format:
+        return format
+    return "jsonl" if Path(chemin).suffix.lower() in (".jsonl", ".ndjson", ".json") else "csv"
+
+
+def lire_enregistrements(chemin: str | Path, format: str | None = None):
+    """Lit un fichier CSV (avec en-tête) ou JSON Lines ligne par ligne, sans tout charger."""
+    format = format_fichier(chemin, format)
+    with open(chemin, "r", newline="", encoding="utf-8") as f:
+        if format == "csv":
+            yield from csv.DictReader(f)
+            return
+        for ligne in f:
+            if not ligne.strip():
+                continue
+            try:
+                yield json.loads(ligne)
+            except ValueError:
+                # Ligne illisible : transmise telle quelle pour être rejetée avec sa raison
+                yield {"_erreur": "JSON invalide", "_ligne": ligne.strip()}
+
+
+def ecrire_enregistrements(chemin: str | Path, enregistrements, champs: list[str], format: str | None = None):
+    """Écrit les enregistrements (dicts) au fil de l'eau et retourne leur nombre."""
+    format = format_fichier(chemin, format)
+    nb = 0
+    with open(chemin, "w", newline="", encoding="utf-8") as f:
+        if format == "csv":
+            writer = csv.DictWriter(f, fieldnames=champs, extrasaction="ignore")
+            writer.writeheader()
+            for enr in enregistrements:
+                writer.writerow(enr)
+                nb += 1
+        else:
+            for enr in enregistrements:
+                f.write(json.dumps({c: enr[c] for c in champs}, ensure_ascii=False) + "\n")
+                nb += 1
+    return nb
+
+
+def _texte(enr: dict, champ: str):
+    valeur = enr.get(champ)
+    return str(valeur).strip() if valeur is not None else ""
+
+
+def valider_livre(enr: dict):
+    """Retourne (isbn, titre, auteur, annee, genre) ou lève ValueError avec la raison du rejet."""
+    if "_erreur" in enr:
+        raise ValueError(enr["_erreur"])
+    isbn, titre, auteur, annee, genre = (_texte(enr, c) for c in CHAMPS_LIVRES[:5])
+    if not all([isbn, titre, auteur, annee, genre]):
+        raise ValueError("champ manquant")
+    if not ISBN_VALIDE.fullmatch(isbn):
+        raise ValueError(f"ISBN invalide '{isbn}'")
+    try:
+        annee = int(annee)
+    except ValueError:
+        raise ValueError(f"année invalide '{annee}'")
+    return isbn, titre, auteur, annee, genre
+
+
+def valider_membre(enr: dict):
+    """Retourne (id_membre, nom) ou lève ValueError avec la raison du rejet."""
+    if "_erreur" in enr:
+        raise ValueError(enr["_erreur"])
+    id_membre, nom = _texte(enr, "id_membre"), _texte(enr, "nom")
+    if not id_membre or not nom:
+        raise ValueError("champ manquant")
+    return id_membre, nom
+
+
+# ===================== CLASSE RapportImport =====================
+
+class RapportImport:
+    """
+    Bilan d'un import : compteurs, premiers rejets gardés en mémoire et,
+    si demandé, tous les rejets écrits dans un fichier CSV.
+    """
+
+    MAX_EXEMPLES = 100
+
+    def __init__(self, fichier_rejets: str | Path | None = None):
+        self.acceptes = 0
+        self.rejetes = 0
+        self.exemples = []
+        self._fichier = open(fichier_rejets, "w", newline="", encoding="utf-8") if fichier_rejets else None
+        self._writer = None
+        if self._fichier:
+            self._writer = csv.writer(self._fichier)
+            self._writer.writerow(["ligne", "raison", "donnees"])
+
+    def rejeter(self, numero: int, enr: dict, raison: str):
+        self.rejetes += 1
+        if len(self.exemples) < self.MAX_EXEMPLES:
+            self.exemples.append((numero, raison))
+        if self._writer:
+            self._writer.writerow([numero, raison, json.dumps(enr, ensure_ascii=False, default=str)])
+
+    def fermer(self):
+        if self._fichier:
+            self._fichier.close()
+            self._fichier = None
+
+    def __str__(self):
+        return f"{self.acceptes} acceptés, {self.rejetes} rejetés"
+
+
+if __name__ == "__main__":
+    from bibliotheque import STOCKAGES, ouvrir_bibliotheque
+
+    ROOT_DIR = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Import / export en masse du catalogue et des membres")
+    parser.add_argument("--data", default=ROOT_DIR / "data", type=Path)
+    parser.add_argument("--stockage", default=os.environ.get("BIBLIO_STOCKAGE", "texte"), choices=STOCKAGES)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None)
+    sous = parser.add_subparsers(dest="commande", required=True)
+    p_imp = sous.add_parser("importer", help="Importe un fichier CSV ou JSON Lines")
+    p_imp.add_argument("type", choices=["livres", "membres"])
+    p_imp.add_argument("fichier", type=Path)
+    p_imp.add_argument("--rejets", type=Path, default=None, help="Fichier CSV recevant les lignes rejetées")
+    p_exp = sous.add_parser("exporter", help="Exporte vers un fichier CSV ou JSON Lines")
+    p_exp.add_argument("type", choices=["livres", "membres"])
+    p_exp.add_argument("fichier", type=Path)
+    args = parser.parse_args()
+
+    # Mode partagé comme les autres postes : l'import écrit sous le verrou du dossier
+    biblio = ouvrir_bibliotheque(args.data, stockage=args.stockage, partage=True)
+    biblio.charger_tout()
+    if args.commande == "importer":
+        enregistrements = lire_enregistrements(args.fichier, args.format)
+        if args.type == "livres":
+            rapport = biblio.importer_livres(enregistrements, fichier_rejets=args.rejets)
+        else:
+            rapport = biblio.importer_membres(enregistrements, fichier_rejets=args.rejets)
+        print(f"Import {args.type} : {rapport}")
+        for numero, raison in rapport.exemples[:20]:
+            print(f"  [!] ligne {numero} : {raison}")
+        sys.exit(1 if rapport.rejetes and not rapport.acceptes else 0)
+    else:
+        if args.type == "livres":
+            nb = biblio.exporter_livres(args.fichier, args.format)
+        else:
+            nb = biblio.exporter_membres(args.fichier, args.format)
+        print(f"Export {args.type} : {nb} enregistrements -> {args.fichier}")
@@ -0,0 +1,125 @@
+from functools import lru_cache
+
+from index_texte import normaliser
+
+# Genres et auteurs se répètent : leur forme normalisée est gardée en cache
+_cle = lru_cache(maxsize=65536)(normaliser)
+
+
+# ===================== CLASSE IndexCatalogue =====================
+
+class IndexCatalogue:
+    """
+    Index secondaires du catalogue : genre -> isbns, auteur -> isbns (sans tenir compte
+    des majuscules ni des accents) et statut -> isbns. Tenus à jour à chaque ajout,
+    suppression, emprunt ou retour, ils répondent en O(résultat) au lieu de parcourir
+    tout le catalogue.
+    """
+
+    def __init__(self):
+        self._genres = {}
+        self._auteurs = {}
+        self._statuts = {"disponible": set(), "emprunté": set()}
+        # Genre normalisé -> libellé tel qu'il a été saisi la première fois (pour l'affichage)
+        self._libelles = {}
+        # Construction différée : fonction qui fournit les (isbn, champs) à indexer
+        self._source = None
+
+    def vider(self):
+        self._genres.clear()
+        self._auteurs.clear()
+        for isbns in self._statuts.values():
+            isbns.clear()
+        self._libelles.clear()
+        self._source = None
+
+    def differer(self, source):
+        """
+        Reporte la construction à la première requête : source() retourne alors les couples
+        (isbn, champs) avec les champs genre, auteur et statut. D'ici là, les mises à jour
+        sont ignorées, la source reflétant déjà l'état courant.
+        """
+        self.vider()
+        self._source = source
+
+    def _construire(self):
+        source, self._source = self._source, None
+        for isbn, champs in source():
+            self.ajouter(isbn, champs["genre"], champs["auteur"], champs["statut"])
+
+    # ---------- mises à jour ----------
+
+    def ajouter(self, isbn: str, genre: str, auteur: str, statut: str):
+        if self._source is not None:
+            return
+        cle_genre = _cle(genre)
+        if cle_genre not in self._genres:
+            self._genres[cle_genre] = set()
+            self._libelles[cle_genre] = genre
+        self._genres[cle_genre].add(isbn)
+        self._auteurs.setdefault(_cle(auteur), set()).add(isbn)
+        self._statuts.setdefault(statut, set()).add(isbn)
+
+    def retirer(self, isbn: str, genre: str, auteur: str, statut: str):
+        if self._source is not None:
+            return
+        cle_genre = _cle(genre)
+        if self._retirer_de(self._genres, cle_genre, isbn):
+            del self._libelles[cle_genre]
+        self._retirer_de(self._auteurs, _cle(auteur), isbn)
+        self._statuts.get(statut, set()).discard(isbn)
+
+    @staticmethod
+    def _retirer_de(index: dict[str, set], cle: str, isbn: str):
+        """Retire isbn de index[cle] ; retourne True si la clé n'a plus aucun livre."""
+        isbns = index.get(cle)
+        if isbns is None:
+            return False
+        isbns.discard(isbn)
+        if not isbns:
+            del index[cle]
+            return True
+        return False
+
+    def changer_statut(self, isbn: str, statut: str):
+        if self._source is not None:
+            return
+        for valeur, isbns in self._statuts.items():
+            if valeur != statut:
+                isbns.discard(isbn)
+        self._statuts.setdefault(statut, set()).add(isbn)
+
+    # ---------- requêtes ----------
+
+    def _ensembles(self, genre: str | None, auteur: str | None, statut: str | None):
+        if self._source is not None:
+            self._construire()
+        ensembles = []
+        if genre:
+            ensembles.append(self._genres.get(_cle(genre), set()))
+        if auteur:
+            ensembles.append(self._auteurs.get(_cle(auteur), set()))
+        if statut:
+            ensembles.append(self._statuts.get(statut, set()))
+        return ensembles
+
+    def isbns(self, genre: str | None = None, auteur: str | None = None, statut: str | None = None):
+        """Ensemble des isbns qui satisfont tous les critères fournis, ou None sans critère."""
+        ensembles = self._ensembles(genre, auteur, statut)
+        if not ensembles:
+            return None
+        # L'intersection part du plus petit ensemble
+        ensembles.sort(key=len)
+        return ensembles[0].intersection(*ensembles[1:])
+
+    def compter(self, genre: str | None = None, auteur: str | None = None, statut: str | None = None):
+        ensembles = self._ensembles(genre, auteur, statut)
+        if len(ensembles) == 1:
+            return len(ensembles[0])
+        return len(self.isbns(genre, auteur, statut))
+
+    def repartition_genres(self):
+        """Nombre de livres par genre : {libellé: nombre}."""
+        if self._source is not None:
+            self._construire()
+        return {self._libelles[cle]: len(isbns) for cle, isbns in self._genres.items()}
@@ -0,0 +1,140 @@
+import bisect
+import re
+import unicodedata
+from functools import lru_cache
+
+_MOT = re.compile(r"\w+")
+
+
+def normaliser(texte: str):
+    """Passe en minuscules et retire les accents ("Poésie" -> "poesie")."""
+    if texte.isascii():
+        return texte.lower()
+    decompose = unicodedata.normalize("NFKD", texte)
+    return "".join(c for c in decompose if not unicodedata.combining(c)).casefold()
+
+
+# Auteurs et genres se répètent beaucoup : on garde les découpages récents en cache
+@lru_cache(maxsize=65536)
+def tokeniser(texte: str):
+    return tuple(_MOT.findall(normaliser(texte)))
+
+
+# ===================== CLASSE IndexTexte =====================
+
+class IndexTexte:
+    """
+    Index inversé jeton -> documents, mis à jour à chaque ajout ou retrait.
+    Chaque champ indexé a un poids ; la recherche accepte plusieurs termes
+    (tous requis) et les préfixes, et classe les résultats par score.
+    """
+
+    def __init__(self, champs: dict[str, int]):
+        # Un bit par champ pour savoir dans quels champs apparaît un jeton
+        self.poids = dict(champs)
+        self.bits = {nom: 1 << i for i, nom in enumerate(champs)}
+        self._postings = {}
+        self._documents = {}
+        # Vocabulaire trié pour la recherche par préfixe, reconstruit à la demande
+        self._vocabulaire = None
+        # Construction différée : fonction qui fournit les (clé, champs) à indexer
+        self._source = None
+
+    def __len__(self):
+        if self._source is not None:
+            self._construire()
+        return len(self._documents)
+
+    def vider(self):
+        self._postings.clear()
+        self._documents.clear()
+        self._vocabulaire = None
+        self._source = None
+
+    def differer(self, source):
+        """
+        Reporte la construction de l'index à la première recherche : source() retourne
+        alors les couples (clé, champs) à indexer. D'ici là, ajouts et retraits sont
+        ignorés, la source reflétant déjà l'état courant.
+        """
+        self.vider()
+        self._source = source
+
+    def _construire(self):
+        source, self._source = self._source, None
+        for cle, champs in source():
+            self.ajouter(cle, **champs)
+
+    def ajouter(self, cle: str, **champs: str):
+        if self._source is not None:
+            return
+        if cle in self._documents:
+            self.retirer(cle)
+        jetons = {}
+        for nom, texte in champs.items():
+            bit = self.bits.get(nom)
+            if bit is None:
+                # Champ fourni par une source partagée (statut...) mais non indexé ici
+                continue
+            for jeton in tokeniser(texte or ""):
+                jetons[jeton] = jetons.get(jeton, 0) | bit
+        self._documents[cle] = (tuple(jetons), len(jetons))
+        for jeton, masque in jetons.items():
+            docs = self._postings.get(jeton)
+            if docs is None:
+                docs = self._postings[jeton] = {}
+                if self._vocabulaire is not None:
+                    bisect.insort(self._vocabulaire, jeton)
+            docs[cle] = masque
+
+    def retirer(self, cle: str):
+        if self._source is not None:
+            return
+        jetons, _ = self._documents.pop(cle, ((), 0))
+        for jeton in jetons:
+            docs = self._postings[jeton]
+            del docs[cle]
+            if not docs:
+                del self._postings[jeton]
+                if self._vocabulaire is not None:
+                    i = bisect.bisect_left(self._vocabulaire, jeton)
+                    del self._vocabulaire[i]
+
+    def _jetons_prefixe(self, prefixe: str):
+        if self._vocabulaire is None:
+            self._vocabulaire = sorted(self._postings)
+        debut = bisect.bisect_left(self._vocabulaire, prefixe)
+        fin = bisect.bisect_left(self._vocabulaire, prefixe + "\U0010ffff")
+        return self._vocabulaire[debut:fin]
+
+    def _score(self, masque: int, filtre: int):
+        return max((p for nom, p in self.poids.items() if masque & filtre & self.bits[nom]), default=0)
+
+    def chercher(self, requete: str, champs: tuple[str, ...] | None = None, limite: int | None = None):
+        """Retourne les clés correspondant à tous les termes, triées par pertinence."""
+        if self._source is not None:
+            self._construire()
+        termes = tokeniser(requete)
+        if not termes:
+            return []
+        filtre = sum(self.bits[nom] for nom in (champs or self.poids))
+        scores_par_terme = []
+        for terme in termes:
+            scores = {}
+            for jeton in self._jetons_prefixe(terme):
+                # Correspondance exacte du jeton : double poids par rapport à un préfixe
+                facteur = 2 if jeton == terme else 1
+                for cle, masque in self._postings[jeton].items():
+                    score = self._score(masque, filtre) * facteur
+                    if score > scores.get(cle, 0):
+                        scores[cle] = score
+            if not scores:
+                return []
+            scores_par_terme.append(scores)
+        # Intersection en partant du terme le plus sélectif
+        scores_par_terme.sort(key=len)
+        resultats = scores_par_terme[0]
+        for scores in scores_par_terme[1:]:
+            resultats = {cle: s + scores[cle] for cle, s in resultats.items() if cle in scores}
+        classes = sorted(resultats, key=lambda cle: (-resultats[cle], self._documents[cle][1], cle))
+        return classes[:limite] if limite is not None else classes
@@ -0,0 +1,216 @@
+"""
+Instantanés binaires du catalogue (livres.bin) et des membres (membres.bin).
+
+Format (petit-boutiste), version 1 :
+    en-tête   : "BIBL", version (u16), contenu (u16 : 1 livres, 2 membres), crc32 du corps (u32)
+    corps     : nombre de colonnes (u32), taille de la table de chaînes (u32),
+                table de chaînes (UTF-8, séparées par \\0),
+                puis chaque colonne : type ("I" ou "i"), nombre de valeurs (u32), valeurs sur 4 octets
+Les chaînes (isbn, titres, auteurs, noms...) sont désignées par leur numéro dans la table.
+
+Les conversions replient d'abord le journal (sous le verrou du dossier, qui peut rester en
+service) ; historique.csv, les réservations et les exemplaires restent en texte. Une fois
+converti, le dossier s'ouvre avec --stockage binaire (ou BIBLIO_STOCKAGE=binaire) par tous
+les postes : un poste en stockage texte ne mettrait pas les instantanés binaires à jour.
+
+Usage : python src/instantane_binaire.py vers-binaire|vers-texte [--data DOSSIER]
+"""
+import argparse
+import contextlib
+import gc
+import os
+import struct
+import sys
+import zlib
+from array import array
+from pathlib import Path
+
+from bibliotheque import Livre, Membre, ouvrir_bibliotheque
+from catalogue_colonnes import TableChaines
+from exceptions import InstantaneCorrompuError
+
+MAGIQUE = b"BIBL"
+VERSION = 1
+LIVRES, MEMBRES = 1, 2
+_ENTETE = struct.Struct("<4sHHI")
+_TAILLES = struct.Struct("<II")
+_COLONNE = struct.Struct("<cI")
+
+
+# ===================== Écriture =====================
+
+def _ecrire(chemin: Path, contenu: int, chaines: TableChaines, colonnes: list[array]):
+    blob = "\0".join(chaines.valeurs).encode("utf-8")
+    morceaux = [_TAILLES.pack(len(colonnes), len(blob)), blob]
+    for colonne in colonnes:
+        if sys.byteorder == "big":
+            colonne = array(colonne.typecode, colonne)
+            colonne.byteswap()
+        morceaux.append(_COLONNE.pack(colonne.typecode.encode(), len(colonne)))
+        morceaux.append(colonne.tobytes())
+    corps = b"".join(morceaux)
+    tmp = chemin.with_name(chemin.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_ENTETE.pack(MAGIQUE, VERSION, contenu, zlib.crc32(corps)))
+        f.write(corps)
+    os.replace(tmp, chemin)
+
+
+def _code(chaines: TableChaines, valeur: str):
+    if "\0" in valeur:
+        raise ValueError(f"Caractère nul interdit dans '{valeur!r}'")
+    return chaines.code(valeur)
+
+
+def ecrire_livres(chemin: str | Path, livres):
+    chaines = TableChaines()
+    isbns, titres, auteurs, genres, statuts = (array("I") for _ in range(5))
+    annees = array("i")
+    for livre in livres:
+        isbns.append(_code(chaines, livre.isbn))
+        titres.append(_code(chaines, livre.titre))
+        auteurs.append(_code(chaines, livre.auteur))
+        genres.append(_code(chaines, livre.genre))
+        statuts.append(_code(chaines, livre.statut))
+        annees.append(livre.annee)
+    _ecrire(Path(chemin), LIVRES, chaines, [isbns, titres, auteurs, genres, statuts, annees])
+
+
+def ecrire_membres(chemin: str | Path, membres):
+    chaines = TableChaines()
+    ids, noms, nb_emprunts, emprunts_isbns, emprunts_dates = (array("I") for _ in range(5))
+    quotas = array("i")
+    for membre in membres:
+        ids.append(_code(chaines, membre.id_membre))
+        noms.append(_code(chaines, membre.nom))
+        quotas.append(membre.quota_max)
+        nb_emprunts.append(len(membre.livres_empruntes))
+        for isbn, date in membre.livres_empruntes.items():
+            emprunts_isbns.append(_code(chaines, isbn))
+            emprunts_dates.append(_code(chaines, date))
+    _ecrire(Path(chemin), MEMBRES, chaines, [ids, noms, quotas, nb_emprunts, emprunts_isbns, emprunts_dates])
+
+
+# ===================== Lecture =====================
+
+def _lire(chemin: Path, contenu: int):
+    """Vérifie l'en-tête et la somme de contrôle puis retourne (chaînes, colonnes)."""
+    donnees = Path(chemin).read_bytes()
+    if len(donnees) < _ENTETE.size:
+        raise InstantaneCorrompuError(f"{chemin} : fichier tronqué.")
+    magique, version, contenu_lu, crc = _ENTETE.unpack_from(donnees)
+    if magique != MAGIQUE:
+        raise InstantaneCorrompuError(f"{chemin} : ce n'est pas un instantané de la bibliothèque.")
+    if version > VERSION:
+        raise InstantaneCorrompuError(f"{chemin} : version {version} non prise en charge (max {VERSION}).")
+    if contenu_lu != contenu:
+        raise InstantaneCorrompuError(f"{chemin} : contenu inattendu ({contenu_lu} au lieu de {contenu}).")
+    corps = memoryview(donnees)[_ENTETE.size:]
+    if zlib.crc32(corps) != crc:
+        raise InstantaneCorrompuError(f"{chemin} : somme de contrôle invalide, fichier corrompu.")
+    try:
+        nb_colonnes, taille_blob = _TAILLES.unpack_from(corps)
+        pos = _TAILLES.size
+        chaines = str(corps[pos:pos + taille_blob], "utf-8").split("\0")
+        pos += taille_blob
+        colonnes = []
+        for _ in range(nb_colonnes):
+            typecode, nb = _COLONNE.unpack_from(corps, pos)
+            pos += _COLONNE.size
+            colonne = array(typecode.decode())
+            colonne.frombytes(corps[pos:pos + nb * colonne.itemsize])
+            if len(colonne) != nb:
+                raise ValueError("colonne tronquée")
+            pos += nb * colonne.itemsize
+            if sys.byteorder == "big":
+                colonne.byteswap()
+            colonnes.append(colonne)
+    except (struct.error, ValueError, UnicodeDecodeError) as e:
+        raise InstantaneCorrompuError(f"{chemin} : structure invalide ({e}).") from e
+    return chaines, colonnes
+
+
+@contextlib.contextmanager
+def _sans_ramasse_miettes():
+    # Des millions d'objets créés d'un coup, sans cycle : le ramasse-miettes ne ferait que ralentir
+    actif = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if actif:
+            gc.enable()
+
+
+def lire_livres(chemin: str | Path):
+    chaines, colonnes = _lire(chemin, LIVRES)
+    try:
+        isbns, titres, auteurs, genres, statuts, annees = colonnes
+        with _sans_ramasse_miettes():
+            return [
+                Livre(chaines[i], chaines[t], chaines[a], annee, chaines[g], chaines[s])
+                for i, t, a, g, s, annee in zip(isbns, titres, auteurs, genres, statuts, annees, strict=True)
+            ]
+    except (ValueError, IndexError) as e:
+        raise InstantaneCorrompuError(f"{chemin} : références invalides ({e}).") from e
+
+
+def lire_membres(chemin: str | Path):
+    chaines, colonnes = _lire(chemin, MEMBRES)
+    try:
+        ids, noms, quotas, nb_emprunts, emprunts_isbns, emprunts_dates = colonnes
+        membres = []
+        k = 0
+        with _sans_ramasse_miettes():
+            for i, n, quota, nb in zip(ids, noms, quotas, nb_emprunts, strict=True):
+                membre = Membre(chaines[i], chaines[n], quota)
+                for j in range(k, k + nb):
+                    membre.livres_empruntes[chaines[emprunts_isbns[j]]] = chaines[emprunts_dates[j]]
+                k += nb
+                membres.append(membre)
+        if k != len(emprunts_isbns) or k != len(emprunts_dates):
+            raise ValueError("nombre d'emprunts incohérent")
+        return membres
+    except (ValueError, IndexError) as e:
+        raise InstantaneCorrompuError(f"{chemin} : références invalides ({e}).") from e
+
+
+# ===================== Conversion =====================
+
+def convertir_vers_binaire(data_dir: str | Path):
+    """
+    Écrit livres.bin et membres.bin à partir de livres.txt, membres.txt et du journal : le
+    dossier peut être en service, la conversion se fait sous son verrou après repli du journal.
+    """
+    source = ouvrir_bibliotheque(data_dir, partage=True)
+    source.charger_tout()
+    with source.verrou:
+        source.compacter()
+        ecrire_livres(source.file_livres_bin, source.livres.values())
+        ecrire_membres(source.file_membres_bin, source.membres.values())
+    print(f"Conversion terminée : {len(source.livres)} livres, {len(source.membres)} membres -> {source.data_dir}")
+
+
+def convertir_vers_texte(data_dir: str | Path):
+    """Réécrit livres.txt et membres.txt à partir de livres.bin, membres.bin et du journal."""
+    cible = ouvrir_bibliotheque(data_dir, stockage="binaire", partage=True)
+    cible.charger_tout()
+    with cible.verrou:
+        cible.compacter()
+        # Instantanés texte écrits depuis le même état que les binaires
+        cible.binaire = False
+        cible.sauvegarder_livres()
+        cible.sauvegarder_membres()
+    print(f"Conversion terminée : {len(cible.livres)} livres, {len(cible.membres)} membres -> {cible.data_dir}")
+
+
+if __name__ == "__main__":
+    ROOT_DIR = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Instantanés binaires de la bibliothèque")
+    parser.add_argument("commande", choices=["vers-binaire", "vers-texte"])
+    parser.add_argument("--data", default=ROOT_DIR / "data", type=Path)
+    args = parser.parse_args()
+    if args.commande == "vers-binaire":
+        convertir_vers_binaire(args.data)
+    else:
+        convertir_vers_texte(args.data)
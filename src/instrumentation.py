@@ -0,0 +1,196 @@
+"""
+Mesures des opérations de la bibliothèque, activées par variable d'environnement :
+
+    BIBLIO_MESURES=1                 compte les appels, leurs durées et les octets lus / écrits
+    BIBLIO_MESURES=mesures.json      ... et les écrit à la sortie (JSON, ou texte Prometheus si .prom)
+    BIBLIO_PROFIL=session.prof       capture cProfile de toute la session (python -m pstats session.prof)
+
+Sans BIBLIO_MESURES, le décorateur mesurer retourne la fonction telle quelle : aucun coût.
+Les octets sont ceux du thread qui exécute l'opération (/proc/thread-self/io) : les lectures
+et écritures des autres threads (interface Tk, API) ne lui sont pas comptées. Ils ne sont
+mesurés que sous Linux ; ailleurs ils valent None et ne sont pas exportés.
+"""
+import atexit
+import bisect
+import cProfile
+import json
+import os
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+
+# Bornes (en secondes) des intervalles de l'histogramme des durées
+BORNES = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_CHEMIN_MESURES = os.environ.get("BIBLIO_MESURES", "")
+ACTIVE = _CHEMIN_MESURES not in ("", "0")
+_IO = Path("/proc/thread-self/io")
+# Compteurs d'octets par thread disponibles (Linux)
+OCTETS_MESURES = _IO.exists()
+
+
+def _octets_io():
+    """
+    (octets lus, octets écrits, taille de cette lecture) depuis le début du thread courant.
+    La lecture de /proc/thread-self/io compte elle-même dans les octets lus du relevé suivant.
+    """
+    donnees = _IO.read_bytes()
+    compteurs = dict(ligne.split(b": ") for ligne in donnees.split(b"\n") if b": " in ligne)
+    return int(compteurs.get(b"rchar", 0)), int(compteurs.get(b"wchar", 0)), len(donnees)
+
+
+# ===================== CLASSE Operation =====================
+
+class Operation:
+    __slots__ = ("appels", "duree_totale", "histogramme", "octets_lus", "octets_ecrits")
+
+    def __init__(self):
+        self.appels = 0
+        self.duree_totale = 0.0
+        # Un compteur par borne, plus un pour les durées au-delà de la dernière
+        self.histogramme = [0] * (len(BORNES) + 1)
+        self.octets_lus = 0 if OCTETS_MESURES else None
+        self.octets_ecrits = 0 if OCTETS_MESURES else None
+
+    def enregistrer(self, duree: float, lus: int, ecrits: int):
+        self.appels += 1
+        self.duree_totale += duree
+        self.histogramme[bisect.bisect_left(BORNES, duree)] += 1
+        if OCTETS_MESURES:
+            self.octets_lus += lus
+            self.octets_ecrits += ecrits
+
+    def quantile(self, q: float):
+        """Borne supérieure de l'intervalle qui contient le quantile q (None au-delà de la dernière)."""
+        seuil = q * self.appels
+        cumul = 0
+        for borne, nombre in zip(BORNES, self.histogramme):
+            cumul += nombre
+            if cumul >= seuil:
+                return borne
+        return None
+
+    def resume(self):
+        return {
+            "appels": self.appels,
+            "duree_totale_s": self.duree_totale,
+            "duree_moyenne_s": self.duree_totale / self.appels if self.appels else 0.0,
+            "p50_s": self.quantile(0.5),
+            "p95_s": self.quantile(0.95),
+            "histogramme": dict(zip([*map(str, BORNES), "+Inf"], self.histogramme)),
+            "octets_lus": self.octets_lus,
+            "octets_ecrits": self.octets_ecrits,
+        }
+
+
+# ===================== Registre =====================
+
+_operations = {}
+_verrou = threading.Lock()
+
+
+def enregistrer(nom: str, duree: float, lus: int = 0, ecrits: int = 0):
+    with _verrou:
+        operation = _operations.get(nom)
+        if operation is None:
+            operation = _operations[nom] = Operation()
+        operation.enregistrer(duree, lus, ecrits)
+
+
+def mesurer(fonction):
+    """Décorateur : mesure chaque appel sous le nom Classe.methode (sans effet si désactivé)."""
+    if not ACTIVE:
+        return fonction
+    nom = fonction.__qualname__
+
+    if not OCTETS_MESURES:
+        @wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            debut = time.perf_counter()
+            try:
+                return fonction(*args, **kwargs)
+            finally:
+                enregistrer(nom, time.perf_counter() - debut)
+        return enveloppe
+
+    @wraps(fonction)
+    def enveloppe(*args, **kwargs):
+        lus, ecrits, releve = _octets_io()
+        debut = time.perf_counter()
+        try:
+            return fonction(*args, **kwargs)
+        finally:
+            duree = time.perf_counter() - debut
+            lus_fin, ecrits_fin, _ = _octets_io()
+            enregistrer(nom, duree, lus_fin - lus - releve, ecrits_fin - ecrits)
+    return enveloppe
+
+
+def resume():
+    """{nom de l'opération: statistiques}, trié par durée totale décroissante."""
+    with _verrou:
+        operations = sorted(_operations.items(), key=lambda item: -item[1].duree_totale)
+        return {nom: operation.resume() for nom, operation in operations}
+
+
+def reinitialiser():
+    with _verrou:
+        _operations.clear()
+
+
+# ===================== Export =====================
+
+def exporter_json(chemin: str | Path):
+    Path(chemin).write_text(json.dumps(resume(), indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def texte_prometheus():
+    lignes = [
+        "# TYPE biblio_operation_duree_secondes histogram",
+    ]
+    compteurs = []
+    with _verrou:
+        operations = list(_operations.items())
+        for nom, operation in operations:
+            cumul = 0
+            for borne, nombre in zip([*map(str, BORNES), "+Inf"], operation.histogramme):
+                cumul += nombre
+                lignes.append(f'biblio_operation_duree_secondes_bucket{{operation="{nom}",le="{borne}"}} {cumul}')
+            lignes.append(f'biblio_operation_duree_secondes_sum{{operation="{nom}"}} {operation.duree_totale}')
+            lignes.append(f'biblio_operation_duree_secondes_count{{operation="{nom}"}} {operation.appels}')
+            compteurs.append((nom, operation.octets_lus, operation.octets_ecrits))
+    if not OCTETS_MESURES:
+        return "\n".join(lignes) + "\n"
+    lignes.append("# TYPE biblio_operation_octets_lus_total counter")
+    lignes += [f'biblio_operation_octets_lus_total{{operation="{nom}"}} {lus}' for nom, lus, _ in compteurs]
+    lignes.append("# TYPE biblio_operation_octets_ecrits_total counter")
+    lignes += [f'biblio_operation_octets_ecrits_total{{operation="{nom}"}} {ecrits}' for nom, _, ecrits in compteurs]
+    return "\n".join(lignes) + "\n"
+
+
+def exporter_prometheus(chemin: str | Path):
+    Path(chemin).write_text(texte_prometheus(), encoding="utf-8")
+
+
+def exporter(chemin: str | Path):
+    """Format choisi par l'extension : .prom (texte Prometheus) ou JSON."""
+    if str(chemin).endswith(".prom"):
+        exporter_prometheus(chemin)
+    else:
+        exporter_json(chemin)
+
+
+if ACTIVE and _CHEMIN_MESURES != "1":
+    atexit.register(exporter, _CHEMIN_MESURES)
+
+_CHEMIN_PROFIL = os.environ.get("BIBLIO_PROFIL")
+if _CHEMIN_PROFIL:
+    # Profil du thread principal, de l'import de ce module jusqu'à la sortie
+    _profil = cProfile.Profile()
+    _profil.enable()
+
+    @atexit.register
+    def _ecrire_profil():
+        _profil.disable()
+        _profil.dump_stats(_CHEMIN_PROFIL)
@@ -2,21 +2,61 @@
 import tkinter as tk
 from tkinter import messagebox
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+import threading
 import re
 
 from ttkbootstrap import Style
-from ttkbootstrap.widgets import Frame, Button, Label, Entry, Notebook, Treeview, Labelframe
+from ttkbootstrap.widgets import Frame, Button, Label, Entry, Combobox, Notebook, Treeview, Labelframe, Progressbar
 
-from bibliotheque import Bibliotheque
-from exceptions import (
-    LivreIndisponibleError, QuotaEmpruntDepasseError,
-    MembreInexistantError, LivreInexistantError
-)
+from bibliotheque import ouvrir_bibliotheque
+from exceptions import LivreIndisponibleError
 import visualisations as vis
+import instrumentation
+
+
+def avec_biblio(handler):
+    """
+    Décorateur des actions de l'utilisateur qui lisent la bibliothèque (les mutations
+    partent ensuite sur le thread de travail, voir _modifier) : prend le verrou partagé
+    avec le thread de travail, sans geler l'interface si une tâche est en cours.
+    """
+    @wraps(handler)
+    def wrapper(self, *args, **kwargs):
+        if not self._verrou.acquire(timeout=0.1):
+            messagebox.showinfo("Patientez", "Une opération est en cours, réessayez dans un instant.")
+            return None
+        try:
+            return handler(self, *args, **kwargs)
+        finally:
+            self._verrou.release()
+    return wrapper
+
+
+def affichage_biblio(handler):
+    """
+    Décorateur des rafraîchissements de l'affichage : si le thread de travail tient la
+    bibliothèque, le rafraîchissement est repris un peu plus tard, sans message.
+    """
+    @wraps(handler)
+    def wrapper(self, *args, **kwargs):
+        if not self._verrou.acquire(blocking=False):
+            self.after(100, lambda: wrapper(self, *args, **kwargs))
+            return None
+        try:
+            return handler(self, *args, **kwargs)
+        finally:
+            self._verrou.release()
+    return wrapper
 
 
 class BibliothequeGUI(tk.Tk):
-    def __init__(self, data_dir: Path):
+    # Nombre de lignes affichées à la fois dans les listes (le reste est paginé)
+    TAILLE_PAGE = 200
+    DELAI_SYNCHRO = 3000  # ms entre deux relectures du journal partagé
+
+    def __init__(self, data_dir: Path, stockage: str = "texte"):
         super().__init__()
         #Configuration principale de la fenêtre
         self.title("Gestion de Bibliothèque")
@@ -43,15 +83,44 @@ class BibliothequeGUI(tk.Tk):
         #Création de la barre de titre
         header = Frame(self, style='Header.TFrame', height=60)
         header.pack(fill="x")
-        Label(header, text="Bibliothèque Bayt al-Hikma", style='Header.TLabel').pack(pady=15, padx=20)
+        Label(header, text="Bibliothèque Bayt al-Hikma", style='Header.TLabel').pack(side="left", pady=15, padx=20)
+
+        #Indicateur d'activité, visible pendant les tâches en arrière-plan
+        self.busy = Progressbar(header, mode="indeterminate", bootstyle="light-striped", length=120)
+        self.lbl_busy = Label(header, text="", style='Header.TLabel', font=('Segoe UI', 10))
 
         #Création du notebook pour les onglets
         self.notebook = Notebook(self, bootstyle="light")
         self.notebook.pack(fill="both", expand=True, padx=10, pady=10)
 
-        #Chargement des données via la classe Bibliotheque
-        self.biblio = Bibliotheque(data_dir)
-        self.biblio.charger_tout()
+        #Création de la bibliothèque (les données sont chargées en arrière-plan plus bas)
+        self.biblio = ouvrir_bibliotheque(data_dir, stockage=stockage, partage=True, paresseux=True)
+        # Cache des graphiques rendus en images
+        self.dossier_graphiques = Path(data_dir) / "graphiques"
+        self.data_dir = Path(data_dir)
+
+        #Un seul thread de travail pour les accès disque et les calculs de statistiques ;
+        #le verrou protège la bibliothèque entre ce thread et l'interface
+        self._executeur = ThreadPoolExecutor(max_workers=1, thread_name_prefix="biblio")
+        self._verrou = threading.RLock()
+        self._taches_en_cours = 0
+        # Vrai une fois les données chargées : la fermeture ne replie le journal qu'à cette condition
+        self._charge = False
+        self.protocol("WM_DELETE_WINDOW", self._fermer)
+
+        # Lignes actuellement affichées : clé -> identifiant d'item du Treeview
+        self._items_livres = {}
+        self._items_membres = {}
+        # Pile des curseurs des pages visitées (le dernier est celui de la page affichée)
+        # et curseur de la page suivante, None à la dernière page
+        self._curseurs_livres = [None]
+        self._suivant_livres = None
+        self._curseurs_membres = [None]
+        self._suivant_membres = None
+        # Filtres et tri du catalogue, et nombre de livres correspondants
+        self._filtres_livres = {}
+        self._tri_livres = None
+        self._total_livres = 0
 
         #Construction des onglets
         self._build_tab_livres()
@@ -60,6 +129,103 @@ class BibliothequeGUI(tk.Tk):
         self._build_tab_retour()
         self._build_tab_stats()
 
+        #Chargement des données hors du thread de l'interface
+        self._lancer_tache(self._charger, "Chargement…", rappel=lambda _: (self._refresh_livres(), self._refresh_membres()))
+        self.after(self.DELAI_SYNCHRO, self._synchroniser)
+
+    # ===== Tâches en arrière-plan =====
+    def _lancer_tache(self, fonction, message: str, rappel=None, echec=None):
+        """
+        Exécute fonction sur le thread de travail puis, de retour dans la boucle Tk
+        (via after), appelle rappel avec son résultat, ou echec avec l'exception levée
+        (par défaut, un message d'erreur).
+        """
+        self._taches_en_cours += 1
+        self._maj_busy(message)
+        future = self._executeur.submit(fonction)
+
+        def verifier():
+            if not future.done():
+                self.after(50, verifier)
+                return
+            self._taches_en_cours -= 1
+            self._maj_busy()
+            try:
+                resultat = future.result()
+            except Exception as e:
+                if echec is not None:
+                    echec(e)
+                else:
+                    messagebox.showerror("Erreur", str(e))
+                return
+            if rappel is not None:
+                rappel(resultat)
+
+        self.after(50, verifier)
+
+    def _maj_busy(self, message: str = ""):
+        if self._taches_en_cours:
+            if message:
+                self.lbl_busy.configure(text=message)
+            if not self.busy.winfo_manager():
+                self.busy.pack(side="right", padx=20)
+                self.lbl_busy.pack(side="right")
+                self.busy.start(10)
+        else:
+            self.busy.stop()
+            self.busy.pack_forget()
+            self.lbl_busy.pack_forget()
+
+    def _sous_verrou(self, fonction, *args):
+        with self._verrou:
+            return fonction(*args)
+
+    def _charger(self):
+        self._sous_verrou(self.biblio.charger_tout)
+        self._charge = True
+
+    def _modifier(self, mutation, message: str, rappel=None, echec=None):
+        """
+        Applique une mutation sur le thread de travail, puis l'enregistre : l'attente du
+        verrou des autres postes et l'écriture du journal ne gèlent pas l'interface.
+        """
+        def tache():
+            with self._verrou:
+                resultat = mutation()
+                self.biblio.sauvegarder_tout()
+                return resultat
+
+        self._lancer_tache(tache, message, rappel, echec)
+
+    def _synchroniser(self):
+        """Reprend régulièrement, sans indicateur d'activité, les modifications des autres postes."""
+        try:
+            future = self._executeur.submit(self._sous_verrou, self.biblio.synchroniser)
+        except RuntimeError:
+            # Fenêtre en cours de fermeture
+            return
+
+        def verifier():
+            if not future.done():
+                self.after(50, verifier)
+                return
+            if future.exception() is None and future.result():
+                self._refresh_livres()
+                self._refresh_membres()
+            self.after(self.DELAI_SYNCHRO, self._synchroniser)
+
+        self.after(50, verifier)
+
+    def _fermer(self):
+        """
+        Attend la fin des tâches en cours puis, comme à la sortie de la console, replie le
+        journal dans les fichiers de données avant de fermer la fenêtre.
+        """
+        if self._charge:
+            self._executeur.submit(self._sous_verrou, self.biblio.compacter)
+        self._executeur.shutdown(wait=True)
+        self.destroy()
+
     def _make_card(self, parent, title: str):
         """
         Crée et retourne un cadre stylisé (card) avec un titre.
@@ -76,13 +242,29 @@ class BibliothequeGUI(tk.Tk):
 
         # Liste des livres sous forme de Treeview
         card = self._make_card(tab, "Liste des Livres")
-        cols = ("ISBN", "Titre", "Auteur", "Année", "Genre", "Statut")
+
+        # Filtres : genre, statut et tri
+        filtref = Frame(card)
+        filtref.pack(fill="x", pady=(0,5))
+        Label(filtref, text="Genre").pack(side="left")
+        self.entry_filtre_genre = Entry(filtref, width=15)
+        self.entry_filtre_genre.pack(side="left", padx=5)
+        Label(filtref, text="Statut").pack(side="left")
+        self.combo_filtre_statut = Combobox(filtref, values=("", "disponible", "emprunté", "réservé"), width=12, state="readonly")
+        self.combo_filtre_statut.pack(side="left", padx=5)
+        Label(filtref, text="Tri").pack(side="left")
+        self.combo_tri_livres = Combobox(filtref, values=("", "titre", "auteur", "annee", "isbn"), width=10, state="readonly")
+        self.combo_tri_livres.pack(side="left", padx=5)
+        Button(filtref, text="Filtrer", bootstyle="info", command=self._filtrer_livres).pack(side="left", padx=5)
+
+        cols = ("ISBN", "Titre", "Auteur", "Année", "Genre", "Statut", "Exemplaires")
         self.tree_livres = Treeview(card, columns=cols, show="headings", bootstyle="info")
         for c in cols:
             self.tree_livres.heading(c, text=c)
             width = 200 if c == "Titre" else 100
             self.tree_livres.column(c, width=width, anchor="center")
         self.tree_livres.pack(fill="both", expand=True, pady=5)
+        self.lbl_page_livres = self._make_pager(card, self._changer_page_livres)
 
         # Boutons d'ajout et de suppression
         btnf = Frame(card)
@@ -104,18 +286,95 @@ class BibliothequeGUI(tk.Tk):
         # Chargement initial des livres
         self._refresh_livres()
 
+    def _make_pager(self, parent, commande):
+        """
+        Crée la barre de pagination (précédent / suivant) sous une liste
+        et retourne le label qui affiche la page courante.
+        """
+        navf = Frame(parent)
+        navf.pack(fill="x", pady=(0,5))
+        Button(navf, text="◀", bootstyle="info", command=lambda: commande(-1)).pack(side="left")
+        label = Label(navf, text="")
+        label.pack(side="left", padx=10)
+        Button(navf, text="▶", bootstyle="info", command=lambda: commande(1)).pack(side="left")
+        return label
+
+    def _nb_pages(self, total: int):
+        return max(1, -(-total // self.TAILLE_PAGE))
+
+    def _valeurs_livre(self, livre):
+        statut = {"disponible": "Disponible", "réservé": "Réservé"}.get(livre.statut, "Emprunté")
+        # Compteurs tenus à jour par titre : exemplaires disponibles / total
+        disponibles, total = self.biblio.disponibilite(livre.isbn)
+        return (livre.isbn, livre.titre, livre.auteur, livre.annee, livre.genre, statut, f"{disponibles}/{total}")
+
+    @avec_biblio
+    def _filtrer_livres(self):
+        """Applique les filtres saisis et revient à la première page."""
+        filtres = {"genre": self.entry_filtre_genre.get().strip(), "statut": self.combo_filtre_statut.get()}
+        self._filtres_livres = {cle: valeur for cle, valeur in filtres.items() if valeur}
+        self._tri_livres = self.combo_tri_livres.get() or None
+        self._curseurs_livres = [None]
+        self._refresh_livres()
+
+    @affichage_biblio
     def _refresh_livres(self):
-        """Efface et recharge la liste des livres depuis la bibliothèque."""
-        for item in self.tree_livres.get_children():
-            self.tree_livres.delete(item)
-        for livre in self.biblio.livres.values():
-            statut = "Disponible" if livre.statut == "disponible" else "Emprunté"
-            self.tree_livres.insert("", "end", values=(livre.isbn, livre.titre, livre.auteur, livre.annee, livre.genre, statut))
+        """Affiche la page courante des livres : seules ces lignes sont créées dans le Treeview."""
+        livres, self._suivant_livres = self.biblio.page_livres(
+            self._curseurs_livres[-1], self.TAILLE_PAGE, self._tri_livres, **self._filtres_livres)
+        if not livres and len(self._curseurs_livres) > 1:
+            # La page courante s'est vidée (suppressions) : on recule d'une page
+            self._curseurs_livres.pop()
+            return self._refresh_livres()
+        self._total_livres = self.biblio.compter_livres(**self._filtres_livres)
+        self.tree_livres.delete(*self.tree_livres.get_children())
+        self._items_livres.clear()
+        for livre in livres:
+            self._items_livres[livre.isbn] = self.tree_livres.insert("", "end", values=self._valeurs_livre(livre))
+        self._maj_page_livres()
+
+    def _maj_page_livres(self):
+        total = self._total_livres
+        self.lbl_page_livres.configure(
+            text=f"Page {len(self._curseurs_livres)} / {self._nb_pages(total)} ({total} livres)")
+
+    @avec_biblio
+    def _changer_page_livres(self, pas: int):
+        if pas > 0 and self._suivant_livres is not None:
+            self._curseurs_livres.append(self._suivant_livres)
+        elif pas < 0 and len(self._curseurs_livres) > 1:
+            self._curseurs_livres.pop()
+        else:
+            return
+        self._refresh_livres()
+
+    @affichage_biblio
+    def _maj_livre(self, isbn: str):
+        """Répercute la modification d'un seul livre (ajout, suppression, emprunt, retour)."""
+        if self._filtres_livres or self._tri_livres:
+            # Le livre peut entrer dans le filtre, en sortir ou changer de place : on relit la page
+            self._refresh_livres()
+            return
+        livre = self.biblio.livres.get(isbn)
+        item = self._items_livres.get(isbn)
+        if item is not None:
+            if livre is None:
+                self.tree_livres.delete(item)
+                del self._items_livres[isbn]
+            else:
+                self.tree_livres.item(item, values=self._valeurs_livre(livre))
+        elif livre is not None and self._suivant_livres is None:
+            # Un nouveau livre arrive en fin de catalogue : visible seulement depuis la dernière page
+            self._refresh_livres()
+            return
+        self._total_livres = len(self.biblio.livres)
+        self._maj_page_livres()
 
     def _show_add_livre(self):
         """Affiche le formulaire d'ajout de livre."""
         self.add_livre_frame.pack(fill="x", padx=10, pady=5)
 
+    @avec_biblio
     def _add_livre(self):
         """Récupère les données du formulaire, valide et ajoute un livre."""
         isbn  = self.entry_isbn.get().strip()
@@ -134,15 +393,14 @@ class BibliothequeGUI(tk.Tk):
         except ValueError:
             messagebox.showerror("Erreur", "Année invalide.")
             return
-        try:
-            self.biblio.ajouter_livre(isbn, titre, auteur, annee, genre)
-            self.biblio.sauvegarder_tout()
+        def fait(_):
             messagebox.showinfo("Succès", f"Livre '{titre}' ajouté.")
-            self._refresh_livres()
+            self._maj_livre(isbn)
             self.add_livre_frame.pack_forget()
-        except Exception as e:
-            messagebox.showerror("Erreur", str(e))
 
+        self._modifier(lambda: self.biblio.ajouter_livre(isbn, titre, auteur, annee, genre), "Enregistrement…", fait)
+
+    @avec_biblio
     def _delete_livre(self):
         """Supprime le livre sélectionné après confirmation."""
         sel = self.tree_livres.selection()
@@ -152,13 +410,11 @@ class BibliothequeGUI(tk.Tk):
         values = self.tree_livres.item(sel[0], 'values')
         isbn, titre = values[0], values[1]
         if messagebox.askyesno("Confirmation", f"Supprimer le livre '{titre}' (ISBN {isbn}) ?"):
-            try:
-                self.biblio.supprimer_livre(isbn)
-                self.biblio.sauvegarder_tout()
+            def fait(_):
                 messagebox.showinfo("Succès", f"Livre '{titre}' supprimé.")
-                self._refresh_livres()
-            except LivreInexistantError as e:
-                messagebox.showerror("Erreur", str(e))
+                self._maj_livre(isbn)
+
+            self._modifier(lambda: self.biblio.supprimer_livre(isbn), "Enregistrement…", fait)
 
     # ===== Onglet Gestion des Membres =====
     def _build_tab_membres(self):
@@ -173,6 +429,7 @@ class BibliothequeGUI(tk.Tk):
             self.tree_membres.heading(c, text=c)
             self.tree_membres.column(c, width=200, anchor="center")
         self.tree_membres.pack(fill="both", expand=True, pady=5)
+        self.lbl_page_membres = self._make_pager(card, self._changer_page_membres)
 
         # Bouton d'ajout
         btnf = Frame(card)
@@ -194,17 +451,52 @@ class BibliothequeGUI(tk.Tk):
         # Chargement initial des membres
         self._refresh_membres()
 
+    @affichage_biblio
     def _refresh_membres(self):
-        """Efface et recharge la liste des membres."""
-        for item in self.tree_membres.get_children():
-            self.tree_membres.delete(item)
-        for membre in self.biblio.membres.values():
-            self.tree_membres.insert("", "end", values=(membre.id_membre, membre.nom))
+        """Affiche la page courante des membres."""
+        membres, self._suivant_membres = self.biblio.page_membres(self._curseurs_membres[-1], self.TAILLE_PAGE)
+        if not membres and len(self._curseurs_membres) > 1:
+            self._curseurs_membres.pop()
+            return self._refresh_membres()
+        self.tree_membres.delete(*self.tree_membres.get_children())
+        self._items_membres.clear()
+        for membre in membres:
+            self._items_membres[membre.id_membre] = self.tree_membres.insert("", "end", values=(membre.id_membre, membre.nom))
+        self._maj_page_membres()
+
+    def _maj_page_membres(self):
+        total = len(self.biblio.membres)
+        self.lbl_page_membres.configure(
+            text=f"Page {len(self._curseurs_membres)} / {self._nb_pages(total)} ({total} membres)")
+
+    @avec_biblio
+    def _changer_page_membres(self, pas: int):
+        if pas > 0 and self._suivant_membres is not None:
+            self._curseurs_membres.append(self._suivant_membres)
+        elif pas < 0 and len(self._curseurs_membres) > 1:
+            self._curseurs_membres.pop()
+        else:
+            return
+        self._refresh_membres()
+
+    @affichage_biblio
+    def _maj_membre(self, id_membre: str):
+        """Ajoute ou met à jour la ligne d'un seul membre."""
+        membre = self.biblio.membres.get(id_membre)
+        item = self._items_membres.get(id_membre)
+        if item is not None and membre is not None:
+            self.tree_membres.item(item, values=(membre.id_membre, membre.nom))
+        elif membre is not None and self._suivant_membres is None:
+            # Nouveau membre en fin de liste : on relit la dernière page
+            self._refresh_membres()
+            return
+        self._maj_page_membres()
 
     def _show_add_membre(self):
         """Affiche le formulaire d'ajout de membre."""
         self.add_membre_frame.pack(fill="x", padx=10, pady=5)
 
+    @avec_biblio
     def _add_membre(self):
         """Récupère les infos du formulaire et enregistre un nouveau membre."""
         idm = self.entry_idm.get().strip()
@@ -212,14 +504,12 @@ class BibliothequeGUI(tk.Tk):
         if not idm or not nom:
             messagebox.showerror("Erreur", "Tous les champs sont requis.")
             return
-        try:
-            self.biblio.enregistrer_membre(id_membre=idm, nom=nom)
-            self.biblio.sauvegarder_tout()
+        def fait(_):
             messagebox.showinfo("Succès", f"Membre '{nom}' ajouté.")
-            self._refresh_membres()
+            self._maj_membre(idm)
             self.add_membre_frame.pack_forget()
-        except Exception as e:
-            messagebox.showerror("Erreur", str(e))
+
+        self._modifier(lambda: self.biblio.enregistrer_membre(id_membre=idm, nom=nom), "Enregistrement…", fait)
 
     # ===== Onglet Emprunt =====
     def _build_tab_emprunt(self):
@@ -239,6 +529,7 @@ class BibliothequeGUI(tk.Tk):
         # Bouton de validation d'emprunt
         Button(tab, text="Emprunter", style='Accent.TButton', command=self._emprunter).pack(pady=15)
 
+    @avec_biblio
     def _emprunter(self):
         """Traite l'emprunt d'un livre par un membre."""
         titre = self.entry_emp_titre.get().strip()
@@ -256,14 +547,27 @@ class BibliothequeGUI(tk.Tk):
             messagebox.showerror("Erreur", f"Aucun membre trouvé pour '{nom}'.")
             return
         livre, membre = livres[0], membres[0]
-        try:
-            self.biblio.emprunter(livre.isbn, membre.id_membre)
-            self.biblio.sauvegarder_tout()
-            messagebox.showinfo("Succès", f"Le livre '{livre.titre}' a été emprunté par {membre.nom}.")
-            self._refresh_livres()
-            self._refresh_membres()
-        except (LivreIndisponibleError, QuotaEmpruntDepasseError, MembreInexistantError, LivreInexistantError) as e:
-            messagebox.showerror("Erreur", str(e))
+
+        def fait(code):
+            exemplaire = f" (exemplaire {code})" if code != livre.isbn else ""
+            messagebox.showinfo("Succès", f"Le livre '{livre.titre}'{exemplaire} a été emprunté par {membre.nom}.")
+            self._maj_livre(livre.isbn)
+
+        def echec(e):
+            # Le membre peut se placer dans la file d'attente du livre
+            if isinstance(e, LivreIndisponibleError):
+                if messagebox.askyesno("Livre indisponible", f"{e}\n\nRéserver ce livre pour {membre.nom} ?"):
+                    self._reserver(livre, membre)
+            else:
+                messagebox.showerror("Erreur", str(e))
+
+        self._modifier(lambda: self.biblio.emprunter(livre.isbn, membre.id_membre), "Emprunt…", fait, echec)
+
+    def _reserver(self, livre, membre):
+        def fait(rang):
+            messagebox.showinfo("Réservation", f"{membre.nom} est n°{rang} en attente pour '{livre.titre}'.")
+
+        self._modifier(lambda: self.biblio.reserver(livre.isbn, membre.id_membre), "Réservation…", fait)
 
     # ===== Onglet Retour =====
     def _build_tab_retour(self):
@@ -283,6 +587,7 @@ class BibliothequeGUI(tk.Tk):
         # Bouton de validation de retour
         Button(tab, text="Retourner", style='Accent.TButton', command=self._retourner).pack(pady=15)
 
+    @avec_biblio
     def _retourner(self):
         """Traite le retour d'un livre par un membre."""
         titre = self.entry_ret_titre.get().strip()
@@ -300,32 +605,85 @@ class BibliothequeGUI(tk.Tk):
             messagebox.showerror("Erreur", f"Aucun membre trouvé pour '{nom}'.")
             return
         livre, membre = livres[0], membres[0]
-        try:
+
+        def retourner():
+            # Réservataires servis par ce retour : (nom, date limite)
+            deja_de_cote = self.biblio.reservations.mises_de_cote(livre.isbn)
             self.biblio.retourner(livre.isbn, membre.id_membre)
-            self.biblio.sauvegarder_tout()
-            messagebox.showinfo("Succès", f"Le livre '{livre.titre}' a été retourné par {membre.nom}.")
-            self._refresh_livres()
-            self._refresh_membres()
-        except (MembreInexistantError, LivreInexistantError) as e:
-            messagebox.showerror("Erreur", str(e))
+            return [(self.biblio.membres[id_membre].nom, expiration)
+                    for id_membre, expiration in self.biblio.reservations.mises_de_cote(livre.isbn).items()
+                    if id_membre not in deja_de_cote]
+
+        def fait(servis):
+            message = f"Le livre '{livre.titre}' a été retourné par {membre.nom}."
+            for nom_reservataire, expiration in servis:
+                message += f"\nÀ mettre de côté pour {nom_reservataire} jusqu'au {expiration}."
+            messagebox.showinfo("Succès", message)
+            self._maj_livre(livre.isbn)
+
+        self._modifier(retourner, "Retour…", fait)
 
     # ===== Onglet Statistiques =====
     def _build_tab_stats(self):
         tab = Frame(self.notebook)
         self.notebook.add(tab, text="Statistiques")
 
-        # Bouton diagramme des pourcentages par genre
-        Button(tab, text="Diagramme % Genres", bootstyle="info",
-               command=lambda: vis.diagramme_pourcentage_genres(self.biblio.livres)
-              ).pack(fill="x", padx=20, pady=5)
-        # Bouton top auteurs les plus empruntés
-        Button(tab, text="Top Auteurs", bootstyle="info",
-               command=lambda: vis.top_auteurs_populaires(self.biblio.historique, self.biblio.livres)
-              ).pack(fill="x", padx=20, pady=5)
-        # Bouton courbe d'activité des emprunts mensuels
-        Button(tab, text="Emprunts/Mois", bootstyle="info",
-               command=lambda: vis.courbe_activite_emprunts(self.biblio.historique)
-              ).pack(fill="x", padx=20, pady=5)
+        # Les données sont lues sous le verrou, l'image est rendue (ou reprise du cache)
+        # en arrière-plan, puis affichée dans le thread Tk
+        for texte, nom in (("Diagramme % Genres", "genres"),
+                           ("Top Auteurs", "top_auteurs"),
+                           ("Emprunts/Mois", "activite")):
+            Button(tab, text=texte, bootstyle="info",
+                   command=lambda nom=nom: self._lancer_tache(
+                       lambda: self._rendre_graphique(nom), "Calcul des statistiques…",
+                       rappel=self._afficher_graphique)
+                  ).pack(fill="x", padx=20, pady=5)
+
+        # Mesures des opérations (BIBLIO_MESURES=1)
+        cadre = Labelframe(tab, text="Mesures des opérations")
+        cadre.pack(fill="both", expand=True, padx=20, pady=10)
+        if not instrumentation.ACTIVE:
+            Label(cadre, text="Mesures désactivées : relancer avec BIBLIO_MESURES=1.").pack(padx=5, pady=5)
+            return
+        cols = ("Opération", "Appels", "Moyenne (ms)", "p95 (ms)", "Octets lus", "Octets écrits")
+        self.tree_mesures = Treeview(cadre, columns=cols, show="headings", bootstyle="info", height=8)
+        for c in cols:
+            self.tree_mesures.heading(c, text=c)
+            self.tree_mesures.column(c, width=260 if c == "Opération" else 100, anchor="center")
+        self.tree_mesures.pack(fill="both", expand=True, pady=5)
+        btnf = Frame(cadre)
+        btnf.pack(fill="x", pady=(0,5))
+        Button(btnf, text="Rafraîchir", bootstyle="info", command=self._refresh_mesures).pack(side="left", padx=5)
+        Button(btnf, text="Exporter", bootstyle="info", command=self._exporter_mesures).pack(side="left")
+
+    def _refresh_mesures(self):
+        self.tree_mesures.delete(*self.tree_mesures.get_children())
+        for nom, m in instrumentation.resume().items():
+            p95 = f"{m['p95_s'] * 1e3:.1f}" if m["p95_s"] is not None else "> 5000"
+            self.tree_mesures.insert("", "end", values=(
+                nom, m["appels"], f"{m['duree_moyenne_s'] * 1e3:.2f}", p95,
+                # Octets non mesurés hors Linux
+                "—" if m["octets_lus"] is None else m["octets_lus"],
+                "—" if m["octets_ecrits"] is None else m["octets_ecrits"]))
+
+    def _exporter_mesures(self):
+        instrumentation.exporter_json(self.data_dir / "mesures.json")
+        instrumentation.exporter_prometheus(self.data_dir / "mesures.prom")
+        messagebox.showinfo("Mesures", f"Mesures exportées dans {self.data_dir / 'mesures.json'} et mesures.prom.")
+
+    def _rendre_graphique(self, nom: str):
+        donnees = self._sous_verrou(vis.donnees_graphique, self.biblio, nom)
+        return vis.rendre_graphique(nom, donnees, self.dossier_graphiques)
+
+    def _afficher_graphique(self, chemin):
+        if chemin is None:
+            messagebox.showinfo("Statistiques", "Pas encore de données pour ce graphique.")
+            return
+        fenetre = tk.Toplevel(self)
+        fenetre.title("Statistiques")
+        # Garder une référence à l'image, sinon Tk l'efface
+        fenetre.image = tk.PhotoImage(file=str(chemin))
+        Label(fenetre, image=fenetre.image).pack(padx=10, pady=10)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,141 @@
+import json
+import os
+from pathlib import Path
+
+
+# ===================== CLASSE Journal =====================
+
+class Journal:
+    """
+    Journal d'écriture anticipée : chaque mutation est ajoutée sur une ligne JSON
+    puis forcée sur disque (fsync). Le point de contrôle mémorise le dernier numéro
+    de séquence déjà replié dans les fichiers instantanés (livres, membres, historique).
+    """
+
+    def __init__(self, chemin: str | Path, seuil_compaction: int = 1_000_000):
+        self.chemin = Path(chemin)
+        self.chemin_point = self.chemin.with_suffix(".ckpt")
+        self.seuil_compaction = seuil_compaction
+        self.point_controle = self._lire_point_controle()
+        self.seq = self.point_controle
+        # Position de lecture : fin du dernier enregistrement lu ou écrit
+        self.position = 0
+        self._fichier = None
+
+    def _lire_point_controle(self):
+        if not self.chemin_point.exists():
+            return 0
+        try:
+            return int(self.chemin_point.read_text(encoding="utf-8").strip() or 0)
+        except ValueError:
+            return 0
+
+    def ajouter(self, op: str, **donnees):
+        """Ajoute un enregistrement au journal et le force sur disque."""
+        if self._fichier is None:
+            self.chemin.parent.mkdir(parents=True, exist_ok=True)
+            # a+b : les écritures vont toujours en fin de fichier, la lecture sert à _retirer_ligne_tronquee
+            self._fichier = open(self.chemin, "a+b")
+        self._retirer_ligne_tronquee()
+        self.seq += 1
+        enregistrement = {"seq": self.seq, "op": op, **donnees}
+        self._fichier.write((json.dumps(enregistrement, ensure_ascii=False) + "\n").encode("utf-8"))
+        self._fichier.flush()
+        os.fsync(self._fichier.fileno())
+        self.position = self._fichier.tell()
+
+    def _retirer_ligne_tronquee(self):
+        """
+        Supprime une dernière ligne sans fin de ligne, laissée par un arrêt brutal
+        (de ce poste ou d'un autre) au milieu d'un ajout. Elle n'a jamais été validée ;
+        sans cela, l'enregistrement suivant la prolongerait et la relecture
+        s'arrêterait sur cette ligne invalide, perdant tout ce qui suit.
+        """
+        f = self._fichier
+        fin = f.seek(0, os.SEEK_END)
+        if fin == 0:
+            return
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return
+        debut = fin
+        while debut > 0:
+            taille_bloc = min(65536, debut)
+            f.seek(debut - taille_bloc)
+            saut = f.read(taille_bloc).rfind(b"\n")
+            if saut >= 0:
+                debut = debut - taille_bloc + saut + 1
+                break
+            debut -= taille_bloc
+        f.truncate(debut)
+
+    def relire(self):
+        """Parcourt les enregistrements postérieurs au point de contrôle."""
+        self.point_controle = self._lire_point_controle()
+        self.seq = self.point_controle
+        self.position = 0
+        yield from self._lire_depuis_position()
+
+    def nouveaux_enregistrements(self):
+        """
+        Enregistrements ajoutés (par un autre processus) depuis la dernière lecture.
+        Retourne None si le journal a été replié entre-temps alors que certains de
+        ses enregistrements n'avaient pas été lus : il faut alors tout recharger.
+        """
+        point = self._lire_point_controle()
+        if point != self.point_controle:
+            if point > self.seq:
+                return None
+            # Replié sans rien perdre : le journal a été vidé, on le relit depuis le début
+            self.point_controle = point
+            self.position = 0
+        return list(self._lire_depuis_position())
+
+    def _lire_depuis_position(self):
+        if not self.chemin.exists():
+            return
+        with open(self.chemin, "rb") as f:
+            f.seek(self.position)
+            for ligne in f:
+                if not ligne.endswith(b"\n"):
+                    # Ligne en cours d'écriture ou tronquée par un arrêt brutal : on s'arrête là
+                    break
+                try:
+                    enregistrement = json.loads(ligne)
+                except ValueError:
+                    break
+                self.position += len(ligne)
+                seq = enregistrement.get("seq", 0)
+                if seq <= self.seq:
+                    continue
+                self.seq = seq
+                yield enregistrement
+
+    def taille(self):
+        if self._fichier is not None:
+            return self._fichier.tell()
+        return self.chemin.stat().st_size if self.chemin.exists() else 0
+
+    def doit_compacter(self):
+        return self.taille() >= self.seuil_compaction
+
+    def marquer_point_controle(self):
+        """
+        À appeler une fois les instantanés écrits : mémorise le numéro de séquence
+        replié puis vide le journal.
+        """
+        tmp = self.chemin_point.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(self.seq))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.chemin_point)
+        self.point_controle = self.seq
+        self.fermer()
+        open(self.chemin, "w", encoding="utf-8").close()
+        self.position = 0
+
+    def fermer(self):
+        if self._fichier is not None:
+            self._fichier.close()
+            self._fichier = None
@@ -1,14 +1,75 @@
+import argparse
+import os
+import shlex
 import sys
 from pathlib import Path
 
-from bibliotheque import Bibliotheque
+from bibliotheque import STOCKAGES, ouvrir_bibliotheque
 from exceptions import (
     MembreInexistantError,
     LivreInexistantError,
     LivreIndisponibleError,
-    QuotaEmpruntDepasseError
+    QuotaEmpruntDepasseError,
+    ReservationImpossibleError,
+    EmpruntInexistantError
 )
-import visualisations as vis
+
+# Stockage choisi par variable d'environnement : "texte" (par défaut) ou "sqlite"
+STOCKAGE = os.environ.get("BIBLIO_STOCKAGE", "texte")
+# Nombre de lignes affichées avant de demander la page suivante
+TAILLE_PAGE = 20
+FILTRES_ENTIERS = ("annee_min", "annee_max")
+
+
+def lire_filtres(invite: str):
+    """
+    Lit des filtres de la forme cle=valeur séparés par des espaces
+    (ex. : genre=Roman statut=disponible auteur="Victor Hugo" tri=annee).
+    """
+    saisie = input(invite).strip()
+    try:
+        paires = shlex.split(saisie)
+    except ValueError:
+        paires = saisie.split()
+    filtres = {}
+    for paire in paires:
+        cle, sep, valeur = paire.partition("=")
+        if not sep:
+            continue
+        if cle in FILTRES_ENTIERS:
+            try:
+                valeur = int(valeur)
+            except ValueError:
+                print(f"[!] Valeur ignorée pour {cle} : '{valeur}'")
+                continue
+        filtres[cle] = valeur
+    return filtres
+
+
+def afficher_par_pages(charger_page, formater=str):
+    """
+    Affiche une requête page par page : charger_page(curseur) retourne (éléments, curseur_suivant).
+    Entrée affiche la page suivante, q revient au menu.
+    """
+    curseur = None
+    premiere = True
+    while True:
+        try:
+            elements, curseur = charger_page(curseur)
+        except (TypeError, ValueError) as e:
+            # Filtre ou tri inconnu
+            print(f"[!] Requête invalide : {e}")
+            return
+        if premiere and not elements:
+            print("Aucun résultat.")
+            return
+        premiere = False
+        for element in elements:
+            print(f"- {formater(element)}")
+        if curseur is None:
+            return
+        if input("[Entrée] page suivante, [q] retour au menu : ").strip().lower() == "q":
+            return
 
 
 def menu():
@@ -28,23 +89,28 @@ def menu():
     print("0. Quitter")
 
 
-def main(data_dir):
+def main(data_dir, stockage: str = STOCKAGE):
     """
     Fonction principale en mode console qui gère les interactions avec l'utilisateur.
     Charge les données, affiche le menu et exécute les actions choisies.
     """
     # Initialisber biblio
-    biblio = Bibliotheque(data_dir=data_dir)
+    # Mode partagé : d'autres postes peuvent utiliser le même dossier data/ en même temps
+    biblio = ouvrir_bibliotheque(data_dir, stockage=stockage, partage=True, paresseux=True)
     biblio.charger_tout()
 
     # Boucle infinie jusqu'à ce que l'utilisateur choisi de quitter
     while True:
         menu()
         choix = input("Choix: ").strip()
+        # Prend en compte les modifications faites par les autres postes pendant la saisie
+        biblio.synchroniser()
 
         if choix == "1":
-            # Affiche tous les livres
-            biblio.lister_livres()
+            # Affiche les livres page par page, avec des filtres facultatifs
+            filtres = lire_filtres("Filtres (genre= auteur= statut= annee_min= annee_max= tri=titre|auteur|annee|isbn), Entrée pour tout : ")
+            afficher_par_pages(lambda curseur: biblio.page_livres(curseur, TAILLE_PAGE, **filtres),
+                               biblio.decrire_livre)
 
         elif choix == "2":
             # Ajout d'un nouveau livre
@@ -70,8 +136,9 @@ def main(data_dir):
                 print(f"[!] {e}")
 
         elif choix == "4":
-            # Affiche tous les membres
-            biblio.lister_membres()
+            # Affiche les membres page par page
+            filtres = lire_filtres("Filtres (nom= tri=nom|id_membre|emprunts), Entrée pour tout : ")
+            afficher_par_pages(lambda curseur: biblio.page_membres(curseur, TAILLE_PAGE, **filtres))
 
         elif choix == "5":
             # Enregistrement d'un nouveau membre
@@ -87,7 +154,16 @@ def main(data_dir):
             try:
                 biblio.emprunter(isbn, idm)
                 biblio.sauvegarder_tout()
-            except (MembreInexistantError, LivreInexistantError, LivreIndisponibleError, QuotaEmpruntDepasseError) as e:
+            except LivreIndisponibleError as e:
+                print(f"[!] {e}")
+                # Le membre peut attendre le retour du livre
+                if input("Réserver ce livre ? (o/N) : ").strip().lower() == "o":
+                    try:
+                        biblio.reserver(isbn, idm)
+                        biblio.sauvegarder_tout()
+                    except ReservationImpossibleError as e:
+                        print(f"[!] {e}")
+            except (MembreInexistantError, LivreInexistantError, QuotaEmpruntDepasseError) as e:
                 print(f"[!] {e}")
 
         elif choix == "7":
@@ -97,22 +173,25 @@ def main(data_dir):
             try:
                 biblio.retourner(isbn, idm)
                 biblio.sauvegarder_tout()
-            except (MembreInexistantError, LivreInexistantError) as e:
+            except (MembreInexistantError, LivreInexistantError, EmpruntInexistantError) as e:
                 print(f"[!] {e}")
 
         elif choix == "8":
-            # Affiche l'historique des emprunts et retours
-            biblio.afficher_historique()
+            # Affiche l'historique des emprunts et retours, du plus récent au plus ancien
+            filtres = lire_filtres("Filtres (date_min=AAAA-MM-JJ date_max= isbn= id_membre= action=emprunt|retour), Entrée pour tout : ")
+            afficher_par_pages(lambda curseur: biblio.page_historique(curseur, TAILLE_PAGE, **filtres),
+                               biblio.decrire_evenement)
 
         elif choix == "9":
-            # Affiche les statistiques via les visualisations
-            vis.diagramme_pourcentage_genres(biblio.livres)
-            vis.top_auteurs_populaires(biblio.historique, biblio.livres)
-            vis.courbe_activite_emprunts(biblio.historique)
+            # Affiche les statistiques via les visualisations (matplotlib n'est chargé qu'ici)
+            import visualisations as vis
+            vis.diagramme_pourcentage_genres(biblio.index_catalogue)
+            vis.top_auteurs_populaires(biblio.statistiques)
+            vis.courbe_activite_emprunts(biblio.statistiques)
 
         elif choix == "0":
-            # Sauvegarde des données et sortie propre
-            biblio.sauvegarder_tout()
+            # Repli du journal dans les fichiers de données et sortie propre
+            biblio.compacter()
             print("Au revoir.")
             sys.exit(0)
 
@@ -121,17 +200,73 @@ def main(data_dir):
             print("[!] Choix invalide.")
 
 
+def commande(args):
+    """
+    Exécute une sous-commande sans menu (scripts, tâches planifiées) ; retourne le code de sortie.
+    """
+    biblio = ouvrir_bibliotheque(args.data, stockage=args.stockage, partage=True, paresseux=True)
+    biblio.charger_tout()
+
+    if args.commande in ("emprunter", "retourner", "reserver"):
+        operation = {"emprunter": biblio.emprunter, "retourner": biblio.retourner, "reserver": biblio.reserver}[args.commande]
+        try:
+            operation(args.isbn, args.id_membre)
+        except (MembreInexistantError, LivreInexistantError, LivreIndisponibleError, QuotaEmpruntDepasseError,
+                ReservationImpossibleError, EmpruntInexistantError) as e:
+            print(f"[!] {e}", file=sys.stderr)
+            return 1
+        biblio.sauvegarder_tout()
+        return 0
+
+    if args.commande == "chercher":
+        for livre in biblio.chercher_livres(" ".join(args.requete), limite=args.limite):
+            print(biblio.decrire_livre(livre))
+        return 0
+
+    if args.commande == "rapport":
+        import visualisations as vis
+        rendus = vis.rendre_rapports(biblio, args.sortie or Path(args.data) / "graphiques", tuple(args.format))
+        for (nom, format), chemin in rendus.items():
+            print(f"{nom} ({format}) : {chemin or 'aucune donnée'}")
+        return 0
+
+
 if __name__ == "__main__":
     # Définition des chemins relatifs au dossier racine
     ROOT_DIR = Path(__file__).resolve().parent.parent
     DATA_DIR = ROOT_DIR / "data"
 
-    # Choix du mode d'affichage : console ou interface graphique
-    choix_mode = input("Choisissez le mode (1=Console, 2=GUI): ").strip()
-    if choix_mode == "2":
+    parser = argparse.ArgumentParser(description="Gestion de la bibliothèque (sans argument : choix du mode)")
+    parser.add_argument("--data", default=DATA_DIR, type=Path)
+    parser.add_argument("--stockage", default=STOCKAGE, choices=STOCKAGES)
+    sous = parser.add_subparsers(dest="commande")
+    sous.add_parser("console", help="Menu en mode console")
+    sous.add_parser("gui", help="Interface graphique")
+    for nom in ("emprunter", "retourner", "reserver"):
+        p = sous.add_parser(nom, help=f"{nom.capitalize()} un livre")
+        p.add_argument("isbn")
+        p.add_argument("id_membre")
+    p = sous.add_parser("chercher", help="Recherche dans les titres, auteurs et genres")
+    p.add_argument("requete", nargs="+")
+    p.add_argument("--limite", type=int, default=None)
+    p = sous.add_parser("rapport", help="Écrit les graphiques dans des fichiers images")
+    p.add_argument("--sortie", default=None, type=Path, help="Dossier des images (défaut : DATA/graphiques)")
+    p.add_argument("--format", nargs="+", default=["png"], choices=["png", "svg"])
+    args = parser.parse_args()
+
+    commande_choisie = args.commande
+    if commande_choisie is None:
+        # Choix du mode d'affichage : console ou interface graphique
+        choix_mode = input("Choisissez le mode (1=Console, 2=GUI): ").strip()
+        commande_choisie = "gui" if choix_mode == "2" else "console"
+
+    if commande_choisie == "gui":
+        # ttkbootstrap n'est importé qu'ici
         from interface_tk import BibliothequeGUI
-        app = BibliothequeGUI(DATA_DIR)
+        app = BibliothequeGUI(args.data, stockage=args.stockage)
         app.mainloop()
         sys.exit(0)
+    elif commande_choisie == "console":
+        main(args.data, args.stockage)
     else:
-        main(DATA_DIR)
+        sys.exit(commande(args))
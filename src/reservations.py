@@ -0,0 +1,199 @@
+import heapq
+from collections import deque
+from pathlib import Path
+
+
+# ===================== CLASSE Reservations =====================
+
+class Reservations:
+    """
+    Réservations des livres empruntés : une file d'attente par isbn (premier arrivé, premier
+    servi) et les exemplaires mis de côté au retour pour le premier de la file, jusqu'à une
+    date d'expiration (un titre à plusieurs exemplaires peut en avoir plusieurs de côté). Une annulation laisse son entrée dans la file : les membres qui ne sont
+    plus en attente sont sautés au moment de servir, si bien qu'un retour coûte O(1) amorti quel
+    que soit le nombre de réservations. Les expirations sont tenues dans un tas.
+    """
+
+    def __init__(self):
+        # isbn -> deque des (numéro, id_membre) dans l'ordre d'arrivée, annulés compris
+        self._files = {}
+        # isbn -> {id_membre: (numéro, date de la demande)} : demandes encore en attente. Le
+        # numéro distingue une demande renouvelée après annulation de l'entrée annulée
+        self._demandes = {}
+        self._numero = 0
+        # isbn -> {id_membre: expiration} : exemplaires mis de côté
+        self._mises_de_cote = {}
+        # Tas (expiration, isbn, id_membre) ; une entrée n'est valable que si l'exemplaire est
+        # encore de côté pour ce membre à cette date
+        self._expirations = []
+        # id_membre -> isbns réservés (en attente ou mis de côté)
+        self._par_membre = {}
+
+    def vider(self):
+        self._numero = 0
+        self._files.clear()
+        self._demandes.clear()
+        self._mises_de_cote.clear()
+        self._expirations.clear()
+        self._par_membre.clear()
+
+    # ---------- files d'attente ----------
+
+    def ajouter(self, isbn: str, id_membre: str, date: str):
+        """Place le membre en fin de file ; retourne son rang (1 pour le premier)."""
+        demandes = self._demandes.setdefault(isbn, {})
+        if id_membre not in demandes:
+            self._numero += 1
+            demandes[id_membre] = (self._numero, date)
+            self._files.setdefault(isbn, deque()).append((self._numero, id_membre))
+            self._par_membre.setdefault(id_membre, set()).add(isbn)
+        return self.rang(isbn, id_membre)
+
+    def annuler(self, isbn: str, id_membre: str):
+        """Retire le membre de la file (l'entrée est sautée plus tard) ; retourne False s'il n'y était pas."""
+        demandes = self._demandes.get(isbn)
+        if not demandes or id_membre not in demandes:
+            return False
+        del demandes[id_membre]
+        if not demandes:
+            del self._demandes[isbn]
+            del self._files[isbn]
+        elif len(self._files[isbn]) > 2 * len(demandes) + 16:
+            # Trop d'entrées annulées : la file est recopiée sans elles
+            self._files[isbn] = deque(entree for entree in self._files[isbn] if self._valide(demandes, *entree))
+        self._oublier_pour_membre(isbn, id_membre)
+        return True
+
+    @staticmethod
+    def _valide(demandes: dict, numero: int, id_membre: str):
+        return demandes.get(id_membre, (None,))[0] == numero
+
+    def suivant(self, isbn: str):
+        """Retire et retourne le premier membre encore en attente pour isbn, ou None."""
+        demandes = self._demandes.get(isbn)
+        if not demandes:
+            return None
+        file = self._files[isbn]
+        while True:
+            numero, id_membre = file.popleft()
+            if self._valide(demandes, numero, id_membre):
+                break
+        del demandes[id_membre]
+        if not demandes:
+            del self._demandes[isbn]
+            del self._files[isbn]
+        self._oublier_pour_membre(isbn, id_membre)
+        return id_membre
+
+    def attente(self, isbn: str):
+        """Membres en attente pour isbn, dans l'ordre : [(id_membre, date de la demande)]."""
+        demandes = self._demandes.get(isbn, {})
+        return [(id_membre, demandes[id_membre][1]) for numero, id_membre in self._files.get(isbn, ())
+                if self._valide(demandes, numero, id_membre)]
+
+    def rang(self, isbn: str, id_membre: str):
+        for rang, (idm, _) in enumerate(self.attente(isbn), start=1):
+            if idm == id_membre:
+                return rang
+        return None
+
+    def nombre_en_attente(self, isbn: str):
+        return len(self._demandes.get(isbn, ()))
+
+    def en_attente(self, isbn: str, id_membre: str):
+        return id_membre in self._demandes.get(isbn, ())
+
+    # ---------- exemplaires mis de côté ----------
+
+    def mettre_de_cote(self, isbn: str, id_membre: str, expiration: str):
+        self._mises_de_cote.setdefault(isbn, {})[id_membre] = expiration
+        self._par_membre.setdefault(id_membre, set()).add(isbn)
+        heapq.heappush(self._expirations, (expiration, isbn, id_membre))
+
+    def mise_de_cote(self, isbn: str, id_membre: str):
+        """Expiration si un exemplaire est mis de côté pour le membre, sinon None."""
+        return self._mises_de_cote.get(isbn, {}).get(id_membre)
+
+    def mises_de_cote(self, isbn: str):
+        """{id_membre: expiration} des exemplaires du livre mis de côté."""
+        return dict(self._mises_de_cote.get(isbn, {}))
+
+    def retirer_mise_de_cote(self, isbn: str, id_membre: str):
+        mises = self._mises_de_cote.get(isbn)
+        if not mises or id_membre not in mises:
+            return None
+        expiration = mises.pop(id_membre)
+        if not mises:
+            del self._mises_de_cote[isbn]
+        self._oublier_pour_membre(isbn, id_membre)
+        return expiration
+
+    def expirees(self, date: str):
+        """(isbn, id_membre) mis de côté dont l'expiration précède date (retirés du tas, pas des mises de côté)."""
+        mises = []
+        while self._expirations and self._expirations[0][0] < date:
+            expiration, isbn, id_membre = heapq.heappop(self._expirations)
+            # Une mise de côté rétablie (annulation d'un lot) peut figurer deux fois dans le tas
+            if self.mise_de_cote(isbn, id_membre) == expiration and (isbn, id_membre) not in mises:
+                mises.append((isbn, id_membre))
+        return mises
+
+    # ---------- livres et membres ----------
+
+    def oublier_livre(self, isbn: str):
+        """Livre supprimé du catalogue : sa file et ses mises de côté disparaissent."""
+        for id_membre in self._demandes.pop(isbn, {}):
+            self._oublier_pour_membre(isbn, id_membre)
+        self._files.pop(isbn, None)
+        for id_membre in self.mises_de_cote(isbn):
+            self.retirer_mise_de_cote(isbn, id_membre)
+
+    def de_membre(self, id_membre: str):
+        """Réservations du membre : [(isbn, rang ou None, expiration de la mise de côté ou None)]."""
+        return [(isbn, self.rang(isbn, id_membre), self.mise_de_cote(isbn, id_membre))
+                for isbn in sorted(self._par_membre.get(id_membre, ()))]
+
+    def _oublier_pour_membre(self, isbn: str, id_membre: str):
+        # Le membre peut encore avoir le livre de côté ou en attente (cas de relecture du journal)
+        if self.en_attente(isbn, id_membre) or self.mise_de_cote(isbn, id_membre) is not None:
+            return
+        isbns = self._par_membre.get(id_membre)
+        if isbns is not None:
+            isbns.discard(isbn)
+            if not isbns:
+                del self._par_membre[id_membre]
+
+    # ---------- lignes du fichier reservations.txt ----------
+
+    def lignes(self):
+        """(isbn, "cote" ou "attente", id_membre, date) : mises de côté puis files, dans l'ordre."""
+        for isbn, mises in self._mises_de_cote.items():
+            for id_membre, expiration in mises.items():
+                yield isbn, "cote", id_membre, expiration
+        for isbn in self._files:
+            for id_membre, date in self.attente(isbn):
+                yield isbn, "attente", id_membre, date
+
+    def charger_lignes(self, lignes):
+        self.vider()
+        for isbn, nature, id_membre, date in lignes:
+            if nature == "cote":
+                self.mettre_de_cote(isbn, id_membre, date)
+            else:
+                self.ajouter(isbn, id_membre, date)
+
+    def charger(self, chemin: str | Path):
+        chemin = Path(chemin)
+        if not chemin.exists():
+            self.vider()
+            return
+        with open(chemin, "r", encoding="utf-8") as f:
+            self.charger_lignes(tuple(ligne.rstrip("\n").split(";")) for ligne in f if ligne.count(";") == 3)
+
+    def sauvegarder(self, chemin: str | Path):
+        chemin = Path(chemin)
+        tmp = chemin.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for ligne in self.lignes():
+                f.write(";".join(ligne) + "\n")
+        tmp.replace(chemin)
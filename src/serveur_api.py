@@ -0,0 +1,328 @@
+"""
+Service HTTP/JSON local pour les bornes de prêt (bibliothèque standard uniquement).
+
+    GET  /livres?taille=50&curseur=...   liste paginée du catalogue (tri, genre, auteur, statut)
+    GET  /livres/recherche?q=...&limite=  recherche plein texte
+    GET  /livres/<isbn>                   fiche d'un livre
+    GET  /membres?taille=50&curseur=...  liste paginée des membres (tri, nom)
+    GET  /historique?n=20                 derniers événements
+    GET  /historique?curseur=&taille=50   événements dans l'ordre chronologique (isbn, id_membre, date_min...)
+    POST /emprunts {"isbn", "id_membre"}  emprunt
+    POST /retours  {"isbn", "id_membre"}  retour
+    POST /lot      {"operations": [...]}  lot tout ou rien (voir Bibliotheque.traiter_lot)
+
+Les listes se parcourent avec le curseur rendu par chaque page (curseur_suivant, absent à
+la dernière) : une page coûte le même prix quel que soit son rang et les ajouts ne décalent
+pas les pages suivantes.
+
+Les emprunts et retours passent par une file lue par un seul écrivain, qui applique d'un
+coup ce qui s'est accumulé et ne sauvegarde qu'une fois par lot, dans son propre thread :
+l'écriture sur disque ne bloque pas la boucle asyncio. Les lectures ont aussi leur thread.
+En stockage texte, elles portent sur les mêmes objets que l'écrivain : un lot (ou une
+synchronisation) et une lecture ne s'exécutent jamais en même temps. En SQLite, elles
+passent par leur propre connexion, qui ne voit que les transactions validées ; seule la
+relecture de ses objets après un lot attend la fin des lectures en cours.
+
+Usage : python src/serveur_api.py [--data DOSSIER] [--hote 127.0.0.1] [--port 8080]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from bibliotheque import STOCKAGES, ouvrir_bibliotheque
+from stockage_sqlite import BibliothequeSQLite
+
+RAISONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 500: "Internal Server Error"}
+TAILLE_PAGE_MAX = 500
+
+
+class ErreurHTTP(Exception):
+    def __init__(self, statut: int, message: str):
+        super().__init__(message)
+        self.statut = statut
+
+
+def livre_json(livre, biblio):
+    disponibles, total = biblio.disponibilite(livre.isbn)
+    return {"isbn": livre.isbn, "titre": livre.titre, "auteur": livre.auteur,
+            "annee": livre.annee, "genre": livre.genre, "statut": livre.statut,
+            "exemplaires_disponibles": disponibles, "exemplaires": total}
+
+
+def membre_json(membre):
+    return {"id_membre": membre.id_membre, "nom": membre.nom, "emprunts": dict(membre.livres_empruntes)}
+
+
+def evenement_json(rec):
+    return dict(zip(("date", "isbn", "id_membre", "action"), rec))
+
+
+def _entier(params: dict, nom: str, defaut: int, maximum: int | None = None):
+    try:
+        valeur = int(params.get(nom, [defaut])[0])
+    except ValueError:
+        raise ErreurHTTP(400, f"Paramètre '{nom}' invalide")
+    if valeur < 0:
+        raise ErreurHTTP(400, f"Paramètre '{nom}' invalide")
+    return min(valeur, maximum) if maximum is not None else valeur
+
+
+def _page(requete, params: dict, tri_defaut: str, **filtres):
+    """Page demandée à page_livres ou page_membres (curseur, taille, tri) : (éléments, curseur_suivant)."""
+    taille = _entier(params, "taille", 50, TAILLE_PAGE_MAX) or 1
+    try:
+        return requete(params.get("curseur", [None])[0], taille, params.get("tri", [tri_defaut])[0], **filtres)
+    except (ValueError, TypeError):
+        raise ErreurHTTP(400, "Paramètre 'curseur' ou 'tri' invalide")
+
+
+# ===================== CLASSE ServeurAPI =====================
+
+class ServeurAPI:
+    def __init__(self, biblio, hote: str = "127.0.0.1", port: int = 8080,
+                 taille_lot_max: int = 500, delai_synchro: float = 2.0):
+        self.biblio = biblio
+        self.hote = hote
+        self.port = port
+        self.taille_lot_max = taille_lot_max
+        self.delai_synchro = delai_synchro
+        # (opérations, lot tout ou rien ?, future) en attente de l'écrivain
+        self._file = None
+        self._serveur = None
+        # Thread de l'écrivain : les lots et la synchronisation s'y appliquent l'un après l'autre
+        self._executeur = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ecrivain")
+        # Thread des lectures, hors de la boucle asyncio
+        self._lecteurs = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lecteur")
+        # Pris par chaque lecture et par l'écrivain quand il touche aux objets qu'elles lisent
+        self._acces = threading.Lock()
+        # SQLite : les lectures ont leur propre connexion, qui ne voit que les transactions validées
+        self.lecteur = biblio
+        if isinstance(biblio, BibliothequeSQLite):
+            self.lecteur = BibliothequeSQLite(biblio.chemin_db)
+            self.lecteur.charger_tout()
+
+    async def demarrer(self):
+        self._file = asyncio.Queue()
+        self._serveur = await asyncio.start_server(self._connexion, self.hote, self.port)
+        self.port = self._serveur.sockets[0].getsockname()[1]
+        self._taches = [asyncio.create_task(self._ecrivain())]
+        if getattr(self.biblio, "verrou", None) is not None:
+            self._taches.append(asyncio.create_task(self._synchronisation()))
+
+    async def servir(self):
+        await self.demarrer()
+        print(f"API de la bibliothèque sur http://{self.hote}:{self.port}")
+        async with self._serveur:
+            await self._serveur.serve_forever()
+
+    def fermer(self):
+        self._executeur.shutdown()
+        self._lecteurs.shutdown()
+        if self.lecteur is not self.biblio:
+            self.lecteur.fermer()
+
+    # ---------- écrivain unique ----------
+
+    async def _ecrivain(self):
+        suivant = None
+        while True:
+            attente = [suivant or await self._file.get()]
+            suivant = None
+            # Tout ce qui s'est accumulé pendant le lot précédent part dans le même lot ;
+            # un lot explicite (tout ou rien) est toujours appliqué seul, à son tour
+            while not attente[0][1] and not self._file.empty() and len(attente) < self.taille_lot_max:
+                element = self._file.get_nowait()
+                if element[1]:
+                    suivant = element
+                    break
+                attente.append(element)
+            try:
+                resultats = await asyncio.get_running_loop().run_in_executor(self._executeur, self._appliquer, attente)
+            except Exception as e:
+                for _, _, future in attente:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, _, future), resultat in zip(attente, resultats):
+                if not future.done():
+                    future.set_result(resultat)
+
+    @contextlib.contextmanager
+    def _ecriture(self):
+        """Écriture de l'écrivain, isolée des lectures (voir la documentation du module)."""
+        if self.lecteur is self.biblio:
+            with self._acces:
+                yield
+            return
+        try:
+            yield
+        finally:
+            with self._acces:
+                self.lecteur.actualiser()
+
+    def _appliquer(self, attente: list):
+        with self._ecriture():
+            if attente[0][1]:
+                return [self.biblio.traiter_lot(attente[0][0])]
+            operations = [operations[0] for operations, _, _ in attente]
+            resultats = self.biblio.traiter_lot(operations)
+            if any(r["statut"] != "ok" for r in resultats):
+                # Les demandes sont indépendantes : un échec ne doit pas annuler celles des autres bornes
+                resultats = [self.biblio.traiter_lot([op])[0] for op in operations]
+            return resultats
+
+    def _synchroniser(self):
+        with self._ecriture():
+            self.biblio.synchroniser()
+
+    async def _soumettre(self, operations: list, atomique: bool = False):
+        future = asyncio.get_running_loop().create_future()
+        await self._file.put((operations, atomique, future))
+        return await future
+
+    async def _synchronisation(self):
+        # Mode partagé : reprend les modifications des autres processus (console, interface Tk...)
+        while True:
+            await asyncio.sleep(self.delai_synchro)
+            await asyncio.get_running_loop().run_in_executor(self._executeur, self._synchroniser)
+
+    # ---------- HTTP ----------
+
+    async def _connexion(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                ligne = await reader.readline()
+                if not ligne:
+                    break
+                methode, cible, version = ligne.decode("latin-1").split()
+                entetes = {}
+                while True:
+                    ligne = await reader.readline()
+                    if ligne in (b"\r\n", b"\n", b""):
+                        break
+                    nom, _, valeur = ligne.decode("latin-1").partition(":")
+                    entetes[nom.strip().lower()] = valeur.strip()
+                corps = await reader.readexactly(int(entetes.get("content-length") or 0))
+                statut, reponse = await self._repondre(methode, cible, corps)
+                garder = version == "HTTP/1.1" and entetes.get("connection", "").lower() != "close"
+                donnees = json.dumps(reponse, ensure_ascii=False).encode("utf-8")
+                entete = [
+                    f"HTTP/1.1 {statut} {RAISONS[statut]}",
+                    "Content-Type: application/json; charset=utf-8",
+                    f"Content-Length: {len(donnees)}",
+                ]
+                if not garder:
+                    entete.append("Connection: close")
+                writer.write(("\r\n".join(entete) + "\r\n\r\n").encode("latin-1") + donnees)
+                await writer.drain()
+                if not garder:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _repondre(self, methode: str, cible: str, corps: bytes):
+        try:
+            url = urlsplit(cible)
+            params = parse_qs(url.query)
+            chemin = [unquote(p) for p in url.path.strip("/").split("/") if p]
+            if methode == "GET":
+                return 200, await asyncio.get_running_loop().run_in_executor(
+                    self._lecteurs, self._lire_isole, chemin, params)
+            if methode == "POST":
+                try:
+                    donnees = json.loads(corps or b"{}")
+                except ValueError:
+                    raise ErreurHTTP(400, "Corps JSON invalide")
+                return await self._ecrire(chemin, donnees)
+            raise ErreurHTTP(405, f"Méthode {methode} non prise en charge")
+        except ErreurHTTP as e:
+            return e.statut, {"erreur": str(e)}
+        except Exception as e:
+            return 500, {"erreur": str(e)}
+
+    def _lire_isole(self, chemin: list[str], params: dict):
+        with self._acces:
+            return self._lire(chemin, params)
+
+    def _lire(self, chemin: list[str], params: dict):
+        biblio = self.lecteur
+        if chemin == ["livres"]:
+            # Tri par isbn par défaut : le curseur est la clé du dernier livre rendu
+            filtres = {nom: params[nom][0] for nom in ("genre", "auteur", "statut") if nom in params}
+            livres, suivant = _page(biblio.page_livres, params, "isbn", **filtres)
+            return {"total": biblio.compter_livres(**filtres), "livres": [livre_json(l, biblio) for l in livres],
+                    "curseur_suivant": suivant}
+        if chemin == ["livres", "recherche"]:
+            requete = params.get("q", [""])[0]
+            limite = _entier(params, "limite", 50, TAILLE_PAGE_MAX)
+            return {"livres": [livre_json(l, biblio) for l in biblio.chercher_livres(requete, limite=limite)]}
+        if len(chemin) == 2 and chemin[0] == "livres":
+            if chemin[1] not in biblio.livres:
+                raise ErreurHTTP(404, f"ISBN {chemin[1]} introuvable.")
+            return livre_json(biblio.livres[chemin[1]], biblio)
+        if chemin == ["membres"]:
+            filtres = {"nom": params["nom"][0]} if "nom" in params else {}
+            membres, suivant = _page(biblio.page_membres, params, "id_membre", **filtres)
+            return {"total": len(biblio.membres), "membres": [membre_json(m) for m in membres],
+                    "curseur_suivant": suivant}
+        if chemin == ["historique"]:
+            filtres = {nom: params[nom][0] for nom in ("date_min", "date_max", "isbn", "id_membre", "action")
+                       if nom in params}
+            if not filtres and "curseur" not in params and "taille" not in params:
+                n = _entier(params, "n", 20, TAILLE_PAGE_MAX)
+                return {"evenements": [evenement_json(rec) for rec in biblio.historique.dernieres(n)]}
+            taille = _entier(params, "taille", 50, TAILLE_PAGE_MAX) or 1
+            try:
+                evenements, curseur = biblio.page_historique_chronologique(params.get("curseur", [None])[0],
+                                                                           taille, **filtres)
+            except (ValueError, TypeError):
+                raise ErreurHTTP(400, "Paramètre 'curseur' invalide")
+            return {"evenements": [evenement_json(rec) for rec in evenements], "curseur": curseur}
+        raise ErreurHTTP(404, "Ressource inconnue")
+
+    async def _ecrire(self, chemin: list[str], donnees: dict):
+        if chemin in (["emprunts"], ["retours"]):
+            if not isinstance(donnees, dict) or not donnees.get("isbn") or not donnees.get("id_membre"):
+                raise ErreurHTTP(400, "Champs 'isbn' et 'id_membre' requis")
+            operation = {"op": "emprunt" if chemin == ["emprunts"] else "retour",
+                         "isbn": str(donnees["isbn"]), "id_membre": str(donnees["id_membre"])}
+            resultat = await self._soumettre([operation])
+            return (200 if resultat["statut"] == "ok" else 409), resultat
+        if chemin == ["lot"]:
+            operations = donnees.get("operations") if isinstance(donnees, dict) else None
+            if not isinstance(operations, list):
+                raise ErreurHTTP(400, "Champ 'operations' requis")
+            resultats = await self._soumettre(operations, atomique=True)
+            ok = all(r["statut"] == "ok" for r in resultats)
+            return (200 if ok else 409), {"resultats": resultats}
+        raise ErreurHTTP(404, "Ressource inconnue")
+
+
+if __name__ == "__main__":
+    ROOT_DIR = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="API HTTP/JSON de la bibliothèque")
+    parser.add_argument("--data", default=ROOT_DIR / "data", type=Path)
+    parser.add_argument("--stockage", default=os.environ.get("BIBLIO_STOCKAGE", "texte"), choices=STOCKAGES)
+    parser.add_argument("--hote", default="127.0.0.1")
+    parser.add_argument("--port", default=8080, type=int)
+    args = parser.parse_args()
+
+    biblio = ouvrir_bibliotheque(args.data, stockage=args.stockage, partage=True, paresseux=True)
+    biblio.charger_tout()
+    serveur = ServeurAPI(biblio, args.hote, args.port)
+    try:
+        asyncio.run(serveur.servir())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.fermer()
+        biblio.compacter()
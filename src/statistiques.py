@@ -0,0 +1,61 @@
+import datetime
+from collections import Counter
+from collections.abc import Iterable
+from typing import Any
+
+
+# ===================== CLASSE Statistiques =====================
+
+class Statistiques:
+    """
+    Compteurs d'emprunts par auteur, genre, jour et membre. Ils sont reconstruits
+    en un seul passage sur l'historique puis mis à jour en O(1) à chaque emprunt.
+    """
+
+    def __init__(self):
+        self.par_auteur = Counter()
+        self.par_genre = Counter()
+        # Clé : date ISO telle qu'écrite dans l'historique (pas de conversion en date)
+        self.par_jour = Counter()
+        self.par_membre = Counter()
+        self.nb_emprunts = 0
+        self.nb_retours = 0
+
+    def enregistrer(self, date_iso: str, isbn: str, id_membre: str, action: str, livre=None):
+        if action != "emprunt":
+            self.nb_retours += 1
+            return
+        self.nb_emprunts += 1
+        self.par_jour[date_iso] += 1
+        self.par_membre[id_membre] += 1
+        if livre is not None:
+            if livre.auteur:  # éviter les auteurs vides
+                self.par_auteur[livre.auteur] += 1
+            self.par_genre[livre.genre] += 1
+
+    @classmethod
+    def depuis_historique(cls, historique: Iterable[tuple[str, str, str, str]], livres: dict[str, Any]):
+        stats = cls()
+        for (date, isbn, idm, action) in historique:
+            stats.enregistrer(date, isbn, idm, action, livres.get(isbn) if action == "emprunt" else None)
+        return stats
+
+    def top_auteurs(self, top_n: int = 10):
+        """Retourne [(auteur, emprunts), ...] en incluant les ex-aequo du dernier."""
+        top = []
+        seuil = 0
+        for auteur, count in self.par_auteur.most_common():
+            if len(top) < top_n:
+                top.append((auteur, count))
+                seuil = count
+            elif count == seuil:
+                top.append((auteur, count))
+            else:
+                break
+        return top
+
+    def activite(self, jours: int = 30, aujourdhui: datetime.date | None = None):
+        """Retourne (jours, emprunts par jour) sur les derniers jours, du plus ancien au plus récent."""
+        aujourdhui = aujourdhui or datetime.date.today()
+        jours_list = [aujourdhui - datetime.timedelta(days=i) for i in range(jours-1, -1, -1)]
+        return jours_list, [self.par_jour.get(d.isoformat(), 0) for d in jours_list]
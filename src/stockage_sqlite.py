@@ -0,0 +1,757 @@
+import argparse
+import contextlib
+import sqlite3
+from collections.abc import Mapping, MutableMapping
+from pathlib import Path
+
+from bibliotheque import Bibliotheque, Livre, Membre
+from index_texte import normaliser, tokeniser
+from instrumentation import mesurer
+from verrou import VerrouFichier
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS livres (
+    isbn   TEXT PRIMARY KEY,
+    titre  TEXT NOT NULL,
+    auteur TEXT NOT NULL,
+    annee  INTEGER NOT NULL,
+    genre  TEXT NOT NULL,
+    statut TEXT NOT NULL DEFAULT 'disponible'
+);
+CREATE INDEX IF NOT EXISTS idx_livres_auteur ON livres(auteur);
+CREATE INDEX IF NOT EXISTS idx_livres_genre ON livres(genre);
+CREATE INDEX IF NOT EXISTS idx_livres_statut ON livres(statut);
+
+CREATE TABLE IF NOT EXISTS membres (
+    id_membre TEXT PRIMARY KEY,
+    nom       TEXT NOT NULL,
+    quota_max INTEGER NOT NULL DEFAULT 5
+);
+CREATE INDEX IF NOT EXISTS idx_membres_nom ON membres(nom);
+
+-- Emprunts en cours : un livre par ligne, avec sa date d'emprunt
+CREATE TABLE IF NOT EXISTS emprunts (
+    id_membre TEXT NOT NULL,
+    isbn      TEXT NOT NULL,
+    date      TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_emprunts_membre ON emprunts(id_membre);
+CREATE INDEX IF NOT EXISTS idx_emprunts_isbn ON emprunts(isbn);
+
+-- Réservations : livres mis de côté (nature 'cote', date = expiration) puis files d'attente
+-- (nature 'attente', date = date de la demande), dans l'ordre des lignes
+CREATE TABLE IF NOT EXISTS reservations (
+    isbn      TEXT NOT NULL,
+    nature    TEXT NOT NULL,
+    id_membre TEXT NOT NULL,
+    date      TEXT NOT NULL
+);
+
+-- Exemplaires des titres déclarés (les autres en ont un seul, de code-barres l'isbn),
+-- dans l'ordre des lignes ; etat : 'disponible', 'emprunté' ou 'réservé'
+CREATE TABLE IF NOT EXISTS exemplaires (
+    code      TEXT PRIMARY KEY,
+    isbn      TEXT NOT NULL,
+    etat      TEXT NOT NULL DEFAULT 'disponible',
+    id_membre TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_exemplaires_isbn ON exemplaires(isbn);
+
+CREATE TABLE IF NOT EXISTS historique (
+    id        INTEGER PRIMARY KEY,
+    date      TEXT NOT NULL,
+    isbn      TEXT NOT NULL,
+    id_membre TEXT NOT NULL,
+    action    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_historique_date ON historique(date);
+CREATE INDEX IF NOT EXISTS idx_historique_isbn ON historique(isbn);
+CREATE INDEX IF NOT EXISTS idx_historique_membre ON historique(id_membre);
+"""
+
+# Recherche plein texte (sans accents, par préfixe) tenue à jour par des déclencheurs
+SCHEMA_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS livres_fts USING fts5(
+    isbn UNINDEXED, titre, auteur, genre, tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS livres_fts_ajout AFTER INSERT ON livres BEGIN
+    INSERT INTO livres_fts(isbn, titre, auteur, genre) VALUES (new.isbn, new.titre, new.auteur, new.genre);
+END;
+CREATE TRIGGER IF NOT EXISTS livres_fts_suppression AFTER DELETE ON livres BEGIN
+    DELETE FROM livres_fts WHERE isbn = old.isbn;
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS membres_fts USING fts5(
+    id_membre UNINDEXED, nom, tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS membres_fts_ajout AFTER INSERT ON membres BEGIN
+    INSERT INTO membres_fts(id_membre, nom) VALUES (new.id_membre, new.nom);
+END;
+CREATE TRIGGER IF NOT EXISTS membres_fts_suppression AFTER DELETE ON membres BEGIN
+    DELETE FROM membres_fts WHERE id_membre = old.id_membre;
+END;
+"""
+
+
+def ouvrir_connexion(chemin_db: str | Path):
+    # La connexion peut changer de thread (thread de travail de l'interface Tk, écrivain de l'API),
+    # jamais servir à deux threads à la fois : les lectures de l'API ont leur propre connexion
+    conn = sqlite3.connect(chemin_db, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    # Bases créées avant l'ajout de la date d'emprunt
+    colonnes = {row[1] for row in conn.execute("PRAGMA table_info(emprunts)")}
+    if "date" not in colonnes:
+        conn.execute("ALTER TABLE emprunts ADD COLUMN date TEXT NOT NULL DEFAULT ''")
+    try:
+        conn.executescript(SCHEMA_FTS)
+    except sqlite3.OperationalError:
+        # SQLite compilé sans FTS5 : la recherche se rabat sur LIKE
+        pass
+    return conn
+
+
+def _requete_fts(texte: str):
+    return " AND ".join(f'"{jeton}"*' for jeton in tokeniser(texte))
+
+
+# ===================== Vues paresseuses sur les tables =====================
+
+class TableLivres(MutableMapping):
+    """Dictionnaire isbn -> Livre dont les objets sont lus en base à la première consultation."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._cache = {}
+
+    def _construire(self, row):
+        isbn = row[0]
+        if isbn not in self._cache:
+            self._cache[isbn] = Livre(*row)
+        return self._cache[isbn]
+
+    def __getitem__(self, isbn):
+        if isbn in self._cache:
+            return self._cache[isbn]
+        row = self.conn.execute(
+            "SELECT isbn, titre, auteur, annee, genre, statut FROM livres WHERE isbn = ?", (isbn,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(isbn)
+        return self._construire(row)
+
+    def __setitem__(self, isbn, livre):
+        with self.conn:
+            self.conn.execute("DELETE FROM livres WHERE isbn = ?", (isbn,))
+            self.conn.execute(
+                "INSERT INTO livres (isbn, titre, auteur, annee, genre, statut) VALUES (?, ?, ?, ?, ?, ?)",
+                (isbn, livre.titre, livre.auteur, livre.annee, livre.genre, livre.statut),
+            )
+        self._cache[isbn] = livre
+
+    def __delitem__(self, isbn):
+        with self.conn:
+            cur = self.conn.execute("DELETE FROM livres WHERE isbn = ?", (isbn,))
+        if cur.rowcount == 0:
+            raise KeyError(isbn)
+        self._cache.pop(isbn, None)
+
+    def __contains__(self, isbn):
+        if isbn in self._cache:
+            return True
+        return self.conn.execute("SELECT 1 FROM livres WHERE isbn = ?", (isbn,)).fetchone() is not None
+
+    def __iter__(self):
+        for (isbn,) in self.conn.execute("SELECT isbn FROM livres ORDER BY rowid"):
+            yield isbn
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM livres").fetchone()[0]
+
+    def values(self):
+        # Une seule requête au lieu d'une par clé
+        for row in self.conn.execute("SELECT isbn, titre, auteur, annee, genre, statut FROM livres ORDER BY rowid"):
+            yield self._construire(row)
+
+    def oublier(self):
+        self._cache.clear()
+
+
+class TableMembres(MutableMapping):
+    """Dictionnaire id_membre -> Membre lu en base à la demande, emprunts en cours compris."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._cache = {}
+
+    def _construire(self, row):
+        id_membre, nom, quota_max = row
+        if id_membre not in self._cache:
+            membre = Membre(id_membre=id_membre, nom=nom, quota_max=quota_max)
+            membre.livres_empruntes = dict(self.conn.execute(
+                "SELECT isbn, date FROM emprunts WHERE id_membre = ? ORDER BY rowid", (id_membre,)
+            ))
+            self._cache[id_membre] = membre
+        return self._cache[id_membre]
+
+    def __getitem__(self, id_membre):
+        if id_membre in self._cache:
+            return self._cache[id_membre]
+        row = self.conn.execute(
+            "SELECT id_membre, nom, quota_max FROM membres WHERE id_membre = ?", (id_membre,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(id_membre)
+        return self._construire(row)
+
+    def __setitem__(self, id_membre, membre):
+        with self.conn:
+            self.conn.execute("DELETE FROM membres WHERE id_membre = ?", (id_membre,))
+            self.conn.execute("DELETE FROM emprunts WHERE id_membre = ?", (id_membre,))
+            self.conn.execute(
+                "INSERT INTO membres (id_membre, nom, quota_max) VALUES (?, ?, ?)",
+                (id_membre, membre.nom, membre.quota_max),
+            )
+            self.conn.executemany(
+                "INSERT INTO emprunts (id_membre, isbn, date) VALUES (?, ?, ?)",
+                [(id_membre, isbn, date) for isbn, date in membre.livres_empruntes.items()],
+            )
+        self._cache[id_membre] = membre
+
+    def __delitem__(self, id_membre):
+        with self.conn:
+            cur = self.conn.execute("DELETE FROM membres WHERE id_membre = ?", (id_membre,))
+            self.conn.execute("DELETE FROM emprunts WHERE id_membre = ?", (id_membre,))
+        if cur.rowcount == 0:
+            raise KeyError(id_membre)
+        self._cache.pop(id_membre, None)
+
+    def __contains__(self, id_membre):
+        if id_membre in self._cache:
+            return True
+        return self.conn.execute("SELECT 1 FROM membres WHERE id_membre = ?", (id_membre,)).fetchone() is not None
+
+    def __iter__(self):
+        for (id_membre,) in self.conn.execute("SELECT id_membre FROM membres ORDER BY rowid"):
+            yield id_membre
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM membres").fetchone()[0]
+
+    def values(self):
+        for row in self.conn.execute("SELECT id_membre, nom, quota_max FROM membres ORDER BY rowid").fetchall():
+            yield self._construire(row)
+
+    def oublier(self):
+        self._cache.clear()
+
+
+class VueEmprunteurs(Mapping):
+    """Index inverse isbn -> ids des emprunteurs, lu dans la table emprunts (indexée sur isbn)."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __getitem__(self, isbn):
+        ids = {idm for (idm,) in self.conn.execute("SELECT id_membre FROM emprunts WHERE isbn = ?", (isbn,))}
+        if not ids:
+            raise KeyError(isbn)
+        return ids
+
+    def __iter__(self):
+        for (isbn,) in self.conn.execute("SELECT DISTINCT isbn FROM emprunts"):
+            yield isbn
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(DISTINCT isbn) FROM emprunts").fetchone()[0]
+
+
+class IndexCatalogueSQLite:
+    """
+    Même interface que IndexCatalogue, répondue par les index SQL sur genre, auteur et
+    statut. Les valeurs distinctes (peu nombreuses) sont comparées sans majuscules ni
+    accents, puis les livres sont lus par un IN sur la colonne indexée.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def changer_statut(self, isbn: str, statut: str):
+        # La colonne statut est mise à jour dans la transaction de l'emprunt ou du retour
+        pass
+
+    def _valeurs(self, colonne: str, texte: str):
+        cible = normaliser(texte)
+        return [v for (v,) in self.conn.execute(f"SELECT DISTINCT {colonne} FROM livres") if normaliser(v) == cible]
+
+    def _condition(self, genre: str | None, auteur: str | None, statut: str | None):
+        clauses, params = [], []
+        for colonne, texte in (("genre", genre), ("auteur", auteur), ("statut", statut)):
+            if not texte:
+                continue
+            valeurs = [texte] if colonne == "statut" else self._valeurs(colonne, texte)
+            if not valeurs:
+                # Aucun livre de ce genre ou de cet auteur
+                return "0", []
+            clauses.append(f"{colonne} IN ({','.join('?' * len(valeurs))})")
+            params.extend(valeurs)
+        return " AND ".join(clauses), params
+
+    def isbns(self, genre: str | None = None, auteur: str | None = None, statut: str | None = None):
+        condition, params = self._condition(genre, auteur, statut)
+        if not condition:
+            return None
+        return {isbn for (isbn,) in self.conn.execute(f"SELECT isbn FROM livres WHERE {condition}", params)}
+
+    def compter(self, genre: str | None = None, auteur: str | None = None, statut: str | None = None):
+        condition, params = self._condition(genre, auteur, statut)
+        return self.conn.execute(f"SELECT COUNT(*) FROM livres WHERE {condition or 1}", params).fetchone()[0]
+
+    def repartition_genres(self):
+        repartition, libelles = {}, {}
+        for genre, nombre in self.conn.execute("SELECT genre, COUNT(*) FROM livres GROUP BY genre"):
+            libelle = libelles.setdefault(normaliser(genre), genre)
+            repartition[libelle] = repartition.get(libelle, 0) + nombre
+        return repartition
+
+
+class HistoriqueSQLite:
+    """Même interface que Historique, adossée à la table historique."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def recharger(self):
+        pass
+
+    def ajouter(self, rec: tuple[str, str, str, str]):
+        # Exécuté dans la transaction de l'emprunt ou du retour en cours
+        self.conn.execute("INSERT INTO historique (date, isbn, id_membre, action) VALUES (?, ?, ?, ?)", rec)
+
+    append = ajouter
+
+    def vider(self):
+        self.conn.commit()
+
+    def __iter__(self):
+        yield from self.conn.execute("SELECT date, isbn, id_membre, action FROM historique ORDER BY id")
+
+    def __reversed__(self):
+        yield from self.conn.execute("SELECT date, isbn, id_membre, action FROM historique ORDER BY id DESC")
+
+    def chercher(self, date_min: str | None = None, date_max: str | None = None, isbn: str | None = None,
+                 id_membre: str | None = None, recents_d_abord: bool = True):
+        # Les index sur date, isbn et id_membre choisissent les lignes
+        clauses, params = [], []
+        for condition, valeur in (("date >= ?", date_min), ("date <= ?", date_max),
+                                  ("isbn = ?", isbn), ("id_membre = ?", id_membre)):
+            if valeur:
+                clauses.append(condition)
+                params.append(valeur)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        yield from self.conn.execute(
+            f"SELECT date, isbn, id_membre, action FROM historique {where} "
+            f"ORDER BY id {'DESC' if recents_d_abord else 'ASC'}", params
+        )
+
+    def dernieres(self, n: int):
+        rows = self.conn.execute(
+            "SELECT date, isbn, id_membre, action FROM historique ORDER BY id DESC LIMIT ?", (n,)
+        ).fetchall()
+        rows.reverse()
+        return rows
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM historique").fetchone()[0]
+
+    def __bool__(self):
+        return self.conn.execute("SELECT 1 FROM historique LIMIT 1").fetchone() is not None
+
+
+# ===================== CLASSE BibliothequeSQLite =====================
+
+class BibliothequeSQLite(Bibliotheque):
+    """
+    Bibliothèque stockée dans une base SQLite : rien n'est chargé au démarrage,
+    chaque emprunt ou retour est une transaction qui ne touche que quelques lignes.
+    En mode partagé, les mutations passent par le verrou du dossier et les objets gardés en
+    mémoire sont relus dès qu'un autre processus a modifié la base.
+    """
+
+    def __init__(self, chemin_db: str | Path, partage: bool = False):
+        chemin_db = Path(chemin_db)
+        super().__init__(data_dir=chemin_db.parent)
+        self.chemin_db = chemin_db
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.conn = ouvrir_connexion(chemin_db)
+        self.fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'livres_fts'"
+        ).fetchone() is not None
+        self.livres = TableLivres(self.conn)
+        self.membres = TableMembres(self.conn)
+        self.historique = HistoriqueSQLite(self.conn)
+        self.emprunteurs = VueEmprunteurs(self.conn)
+        self.index_catalogue = IndexCatalogueSQLite(self.conn)
+        # Pendant traiter_lot, tout le lot est une seule transaction
+        self._dans_lot = False
+        self.verrou = VerrouFichier(self.data_dir / "bibliotheque.lock") if partage else None
+        # Change quand une autre connexion valide une transaction sur la base
+        self._version_base = self._lire_version_base()
+
+    def fermer(self):
+        self.conn.close()
+
+    def _lire_version_base(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    @mesurer
+    def synchroniser(self):
+        """
+        Mode partagé : si un autre processus a modifié la base depuis la dernière lecture, les
+        livres, membres, exemplaires et réservations gardés en mémoire sont relus.
+        Retourne True si l'état a changé.
+        """
+        if self.verrou is None:
+            return False
+        with self.verrou:
+            return self.actualiser()
+
+    def actualiser(self):
+        """
+        Relit les objets gardés en mémoire si une autre connexion a validé une transaction
+        depuis la dernière lecture ; sans verrou, pour une connexion qui ne fait que lire.
+        Retourne True si l'état a changé.
+        """
+        version = self._lire_version_base()
+        if version == self._version_base:
+            return False
+        self._version_base = version
+        self.charger_reservations()
+        self._oublier_caches()
+        self.amendes.recharger()
+        self._statistiques = None
+        return True
+
+    @contextlib.contextmanager
+    def _mutation(self):
+        with super()._mutation():
+            try:
+                yield
+            finally:
+                # Pas de journal : les réservations, tenues en mémoire, sont écrites pour les
+                # autres processus (un lot les écrit à sa fin, avec le reste de sa transaction)
+                if not self._dans_lot:
+                    self.sauvegarder_reservations()
+
+    @mesurer
+    def charger_livres(self):
+        self.livres.oublier()
+
+    @mesurer
+    def charger_membres(self):
+        self.membres.oublier()
+
+    @mesurer
+    def charger_reservations(self):
+        self.reservations.charger_lignes(
+            self.conn.execute("SELECT isbn, nature, id_membre, date FROM reservations ORDER BY rowid").fetchall()
+        )
+
+    @mesurer
+    def sauvegarder_reservations(self):
+        # Quelques lignes seulement : la table est réécrite en entier
+        with self.conn:
+            self.conn.execute("DELETE FROM reservations")
+            self.conn.executemany(
+                "INSERT INTO reservations (isbn, nature, id_membre, date) VALUES (?, ?, ?, ?)",
+                self.reservations.lignes(),
+            )
+
+    @mesurer
+    def charger_exemplaires(self):
+        # Chaque stock est lu dans la table exemplaires à la première consultation de son titre
+        self.exemplaires.vider()
+
+    @mesurer
+    def sauvegarder_exemplaires(self):
+        # Écrits dans la transaction de chaque mouvement (_ecrire_stock)
+        self.conn.commit()
+
+    @mesurer
+    def sauvegarder_livres(self):
+        self.conn.commit()
+
+    @mesurer
+    def sauvegarder_membres(self):
+        self.conn.commit()
+
+    # Les tables sont indexées par SQLite : pas d'index en mémoire à entretenir
+    def _inserer_livre(self, livre: Livre):
+        self.livres[livre.isbn] = livre
+
+    def _retirer_livre(self, isbn: str):
+        for id_membre in self.emprunteurs.get(isbn, ()):
+            self.echeancier.retirer(isbn, id_membre)
+        del self.livres[isbn]
+        self.reservations.oublier_livre(isbn)
+        self.exemplaires.oublier(isbn)
+        with self._transaction():
+            self.conn.execute("DELETE FROM exemplaires WHERE isbn = ?", (isbn,))
+
+    def _inserer_membre(self, membre: Membre):
+        self.membres[membre.id_membre] = membre
+
+    # La table emprunts sert d'index inverse
+    def _indexer_emprunt(self, isbn: str, id_membre: str):
+        pass
+
+    def _desindexer_emprunt(self, isbn: str, id_membre: str):
+        pass
+
+    def _reconstruire_emprunts(self, en_cours: dict[tuple[str, str], str]):
+        with self.conn:
+            self.conn.execute("DELETE FROM emprunts")
+            self.conn.executemany(
+                "INSERT INTO emprunts (id_membre, isbn, date) "
+                "SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM membres WHERE id_membre = ?)",
+                [(idm, isbn, date, idm) for (isbn, idm), date in en_cours.items()],
+            )
+            # Titres à exemplaire unique ; ceux à plusieurs exemplaires sont repris ci-dessous
+            self.conn.execute(
+                "UPDATE livres SET statut = CASE WHEN isbn IN (SELECT isbn FROM emprunts) THEN 'emprunté' "
+                "WHEN isbn IN (SELECT isbn FROM reservations WHERE nature = 'cote') THEN 'réservé' "
+                "ELSE 'disponible' END"
+            )
+        self.livres.oublier()
+        self.membres.oublier()
+        self.exemplaires.vider()
+        for (isbn,) in self.conn.execute("SELECT DISTINCT isbn FROM exemplaires").fetchall():
+            if isbn in self.livres:
+                stock = self.exemplaires.stock(isbn)
+                stock.repartir(self.emprunteurs.get(isbn, ()), self.reservations.mises_de_cote(isbn))
+                self._changer_statut(isbn, stock.statut)
+
+    def _emprunts_avec_genre(self):
+        return self.conn.execute(
+            "SELECT e.isbn, e.id_membre, e.date, l.genre FROM emprunts e JOIN livres l ON l.isbn = e.isbn"
+        ).fetchall()
+
+    def _isbns_existants(self, isbns: list[str]):
+        return self._cles_existantes("livres", "isbn", isbns)
+
+    def _ids_membres_existants(self, ids: list[str]):
+        return self._cles_existantes("membres", "id_membre", ids)
+
+    def _cles_existantes(self, table: str, colonne: str, cles: list[str]):
+        existantes = set()
+        # Par paquets pour rester sous la limite de paramètres de SQLite
+        for i in range(0, len(cles), 900):
+            paquet = cles[i:i + 900]
+            marques = ",".join("?" * len(paquet))
+            existantes.update(c for (c,) in self.conn.execute(
+                f"SELECT {colonne} FROM {table} WHERE {colonne} IN ({marques})", paquet
+            ))
+        return existantes
+
+    def _inserer_livres_lot(self, livres: list[Livre]):
+        # Une transaction par lot au lieu d'une par livre
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO livres (isbn, titre, auteur, annee, genre, statut) VALUES (?, ?, ?, ?, ?, ?)",
+                [(l.isbn, l.titre, l.auteur, l.annee, l.genre, l.statut) for l in livres],
+            )
+
+    def _inserer_membres_lot(self, membres: list[Membre]):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO membres (id_membre, nom, quota_max) VALUES (?, ?, ?)",
+                [(m.id_membre, m.nom, m.quota_max) for m in membres],
+            )
+
+    def _transaction(self):
+        return contextlib.nullcontext() if self._dans_lot else self.conn
+
+    def traiter_lot(self, operations):
+        self._dans_lot = True
+        try:
+            return super().traiter_lot(operations)
+        finally:
+            self._dans_lot = False
+
+    def _annuler_lot(self, annulations: list[tuple[str, str, str, str]]):
+        self.conn.rollback()
+        self.livres.oublier()
+        self.membres.oublier()
+        self.exemplaires.vider()
+        self.echeancier.differer(self._echeances_en_cours)
+        # Les réservations sont en mémoire : les livres remis de côté par l'annulation le redeviennent
+        for op, isbn, id_membre, expiration in annulations:
+            if op == "mise_de_cote":
+                self.reservations.mettre_de_cote(isbn, id_membre, expiration)
+
+    def _changer_statut(self, isbn: str, statut: str):
+        with self._transaction():
+            super()._changer_statut(isbn, statut)
+            self.conn.execute("UPDATE livres SET statut = ? WHERE isbn = ?", (statut, isbn))
+            self._ecrire_stock(isbn)
+
+    def _appliquer_emprunt(self, isbn: str, id_membre: str, date_iso: str, historiser: bool = True,
+                           code: str | None = None):
+        try:
+            with self._transaction():
+                code = super()._appliquer_emprunt(isbn, id_membre, date_iso, historiser, code)
+                self.conn.execute("UPDATE livres SET statut = ? WHERE isbn = ?", (self.livres[isbn].statut, isbn))
+                self.conn.execute(
+                    "INSERT INTO emprunts (id_membre, isbn, date) VALUES (?, ?, ?)", (id_membre, isbn, date_iso)
+                )
+                self._ecrire_stock(isbn)
+            return code
+        except sqlite3.Error:
+            # La base a été annulée : on relira les objets (et les échéances) depuis la base
+            self._oublier_caches()
+            raise
+
+    def _appliquer_retour(self, isbn: str, id_membre: str, date_iso: str, historiser: bool = True):
+        try:
+            with self._transaction():
+                super()._appliquer_retour(isbn, id_membre, date_iso, historiser)
+                self.conn.execute("UPDATE livres SET statut = ? WHERE isbn = ?", (self.livres[isbn].statut, isbn))
+                self.conn.execute("DELETE FROM emprunts WHERE id_membre = ? AND isbn = ?", (id_membre, isbn))
+                self._ecrire_stock(isbn)
+        except sqlite3.Error:
+            self._oublier_caches()
+            raise
+
+    def _oublier_caches(self):
+        self.livres.oublier()
+        self.membres.oublier()
+        self.exemplaires.vider()
+        self.echeancier.differer(self._echeances_en_cours)
+
+    # ---------- exemplaires ----------
+
+    def _stock_initial(self, isbn: str):
+        rows = self.conn.execute(
+            "SELECT code, etat, id_membre FROM exemplaires WHERE isbn = ? ORDER BY rowid", (isbn,)
+        ).fetchall()
+        return self.exemplaires.stock_depuis(rows) if rows else super()._stock_initial(isbn)
+
+    def _ecrire_stock(self, isbn: str):
+        # Dans la transaction en cours : les lignes du titre sont réécrites (aucune s'il n'a
+        # que son exemplaire implicite)
+        self.conn.execute("DELETE FROM exemplaires WHERE isbn = ?", (isbn,))
+        self.conn.executemany(
+            "INSERT INTO exemplaires (code, isbn, etat, id_membre) VALUES (?, ?, ?, ?)", self.exemplaires.lignes_de(isbn)
+        )
+
+    def _total_exemplaires(self, isbn: str):
+        stock = self.exemplaires.charge(isbn)
+        if stock is not None:
+            return stock.total
+        return self.conn.execute("SELECT COUNT(*) FROM exemplaires WHERE isbn = ?", (isbn,)).fetchone()[0] or 1
+
+    def isbn_exemplaire(self, code: str):
+        row = self.conn.execute("SELECT isbn FROM exemplaires WHERE code = ?", (code,)).fetchone()
+        if row is not None:
+            return row[0]
+        if code in self.livres and self.conn.execute(
+                "SELECT 1 FROM exemplaires WHERE isbn = ? LIMIT 1", (code,)).fetchone() is None:
+            return code
+        return None
+
+    def fusionner_titres(self, isbn: str, doublons: list[str]):
+        raise ValueError("Les titres en double se fusionnent dans les fichiers texte, avant la migration vers SQLite.")
+
+    @mesurer
+    def chercher_livre_par_titre(self, titre: str):
+        return self._chercher_livres(titre, "titre")
+
+    @mesurer
+    def chercher_livres(self, requete: str, limite: int | None = None):
+        return self._chercher_livres(requete, None, limite)
+
+    def _chercher_livres(self, requete: str, colonne: str | None, limite: int | None = None):
+        if self.fts:
+            expression = _requete_fts(requete)
+            if not expression:
+                return []
+            if colonne:
+                expression = f"{colonne} : ({expression})"
+            rows = self.conn.execute(
+                "SELECT isbn FROM livres_fts WHERE livres_fts MATCH ? ORDER BY bm25(livres_fts, 0, 3, 2, 1) LIMIT ?",
+                (expression, -1 if limite is None else limite),
+            )
+        else:
+            colonnes = [colonne] if colonne else ["titre", "auteur", "genre"]
+            condition = " OR ".join(f"{c} LIKE ?" for c in colonnes)
+            rows = self.conn.execute(
+                f"SELECT isbn FROM livres WHERE {condition} LIMIT ?",
+                [f"%{requete}%"] * len(colonnes) + [-1 if limite is None else limite],
+            )
+        return [self.livres[isbn] for (isbn,) in rows.fetchall()]
+
+    @mesurer
+    def chercher_membre_par_nom(self, nom: str):
+        if self.fts:
+            expression = _requete_fts(nom)
+            if not expression:
+                return []
+            rows = self.conn.execute(
+                "SELECT id_membre FROM membres_fts WHERE membres_fts MATCH ? ORDER BY rank", (expression,)
+            )
+        else:
+            rows = self.conn.execute("SELECT id_membre FROM membres WHERE nom LIKE ?", (f"%{nom}%",))
+        return [self.membres[idm] for (idm,) in rows.fetchall()]
+
+
+# ===================== Migration depuis data/ =====================
+
+def migrer(data_dir: str | Path, chemin_db: str | Path):
+    """
+    Importe livres.txt, membres.txt, reservations.txt, exemplaires.txt et historique.csv
+    (journal compris) dans une base SQLite.
+    """
+    # Mode partagé : aucun poste ne modifie ni ne replie les fichiers pendant la copie
+    source = Bibliotheque(data_dir, partage=True)
+    with source.verrou:
+        source.charger_tout()
+        conn = ouvrir_connexion(chemin_db)
+        with conn:
+            for table in ("livres", "membres", "emprunts", "reservations", "exemplaires", "historique"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.executemany(
+                "INSERT INTO livres (isbn, titre, auteur, annee, genre, statut) VALUES (?, ?, ?, ?, ?, ?)",
+                ((l.isbn, l.titre, l.auteur, l.annee, l.genre, l.statut) for l in source.livres.values()),
+            )
+            conn.executemany(
+                "INSERT INTO membres (id_membre, nom, quota_max) VALUES (?, ?, ?)",
+                ((m.id_membre, m.nom, m.quota_max) for m in source.membres.values()),
+            )
+            conn.executemany(
+                "INSERT INTO emprunts (id_membre, isbn, date) VALUES (?, ?, ?)",
+                ((m.id_membre, isbn, date) for m in source.membres.values() for isbn, date in m.livres_empruntes.items()),
+            )
+            conn.executemany(
+                "INSERT INTO reservations (isbn, nature, id_membre, date) VALUES (?, ?, ?, ?)", source.reservations.lignes()
+            )
+            conn.executemany(
+                "INSERT INTO exemplaires (code, isbn, etat, id_membre) VALUES (?, ?, ?, ?)", source.exemplaires.lignes()
+            )
+            conn.executemany("INSERT INTO historique (date, isbn, id_membre, action) VALUES (?, ?, ?, ?)", source.historique)
+    nb_livres = conn.execute("SELECT COUNT(*) FROM livres").fetchone()[0]
+    nb_membres = conn.execute("SELECT COUNT(*) FROM membres").fetchone()[0]
+    nb_historique = conn.execute("SELECT COUNT(*) FROM historique").fetchone()[0]
+    conn.close()
+    print(f"Migration terminée : {nb_livres} livres, {nb_membres} membres, {nb_historique} événements -> {chemin_db}")
+
+
+if __name__ == "__main__":
+    ROOT_DIR = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Stockage SQLite de la bibliothèque")
+    sous = parser.add_subparsers(dest="commande", required=True)
+    p_migrer = sous.add_parser("migrer", help="Importe les fichiers de data/ dans une base SQLite")
+    p_migrer.add_argument("--data", default=ROOT_DIR / "data", type=Path)
+    p_migrer.add_argument("--db", default=None, type=Path)
+    args = parser.parse_args()
+    if args.commande == "migrer":
+        migrer(args.data, args.db or args.data / "bibliotheque.db")
@@ -0,0 +1,69 @@
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# ===================== CLASSE VerrouFichier =====================
+
+class VerrouFichier:
+    """
+    Verrou exclusif consultatif sur un fichier, partagé entre processus
+    (fcntl.flock, ou msvcrt.locking sous Windows). Réentrant : un même
+    processus peut le reprendre, le verrou n'est relâché qu'à la dernière sortie.
+    """
+
+    def __init__(self, chemin: str | Path):
+        self.chemin = Path(chemin)
+        self._fichier = None
+        self._profondeur = 0
+        # Sérialise aussi les threads du processus (interface Tk)
+        self._local = threading.RLock()
+
+    def __enter__(self):
+        self._local.acquire()
+        if self._profondeur == 0:
+            try:
+                self._verrouiller()
+            except BaseException:
+                self._local.release()
+                raise
+        self._profondeur += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._profondeur -= 1
+        if self._profondeur == 0:
+            self._deverrouiller()
+        self._local.release()
+
+    def _verrouiller(self):
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        self._fichier = open(self.chemin, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self._fichier.fileno(), fcntl.LOCK_EX)
+            return
+        self._fichier.seek(0)
+        while True:
+            try:
+                # LK_LOCK réessaie pendant une dizaine de secondes puis abandonne : on insiste
+                msvcrt.locking(self._fichier.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                time.sleep(0.1)
+
+    def _deverrouiller(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fichier.fileno(), fcntl.LOCK_UN)
+            else:
+                self._fichier.seek(0)
+                msvcrt.locking(self._fichier.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._fichier.close()
+            self._fichier = None
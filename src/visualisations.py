@@ -1,99 +1,199 @@
-from collections import Counter
+import argparse
 import datetime
-import matplotlib.pyplot as plt
+import hashlib
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-from collections import Counter
-import matplotlib.pyplot as plt
+from instrumentation import mesurer
+from statistiques import Statistiques
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+# Chaque graphique est séparé en deux : le calcul des données (sans matplotlib,
+# exécutable hors du thread de l'interface) puis le tracé. Les graphiques d'emprunts
+# lisent les compteurs de Statistiques au lieu de reparcourir l'historique.
+# Le tracé dessine sur une Figure : affichée avec plt.show() en mode interactif,
+# ou enregistrée sans affichage (backend Agg) dans un cache d'images.
+# matplotlib n'est importé qu'au premier tracé : charger ce module reste instantané.
+
+@mesurer
+def calcul_repartition_genres(index):
+    """index : IndexCatalogue de la bibliothèque, qui tient déjà le nombre de livres par genre."""
+    repartition = index.repartition_genres()
+    return list(repartition.keys()), list(repartition.values())
+
+PALETTE = ['#2d1409', '#541308', '#643f24', '#846e51', '#b19c85']
 
 #diagramme circulaire % par genre
-def diagramme_pourcentage_genres(livres: dict[str, any]):
-    genres = [livre.genre for livre in livres.values()]
-    counts = Counter(genres)
-    labels = list(counts.keys())
-    sizes = list(counts.values())
+@mesurer
+def dessiner_repartition_genres(fig: "Figure", donnees: tuple[list[str], list[int]]):
+    labels, sizes = donnees
 
     if not labels:
-        print("Aucun livre pour générer le diagramme.")
-        return
-
-    # my palette
-    colors = ['#2d1409', '#541308', '#643f24', '#846e51', '#b19c85']
+        return "Aucun livre pour générer le diagramme."
 
     # Ajuste le nombre de couleurs à celui des genres
-    colors = colors[:len(labels)]
+    colors = PALETTE[:len(labels)]
 
-    plt.figure()
-    plt.pie(sizes, labels=labels, autopct='%1.1f%%', colors=colors)
-    plt.title("Répartition des livres par genre")
-    plt.tight_layout()
-    plt.show()
+    ax = fig.subplots()
+    ax.pie(sizes, labels=labels, autopct='%1.1f%%', colors=colors)
+    ax.set_title("Répartition des livres par genre")
 
-#Histogramme des 10 auteurs plus populaires
-def top_auteurs_populaires(historique: list[tuple[str, str, str, str]], livres: dict[str, any], top_n: int = 10):
-    emprunts = [isbn for (date, isbn, idm, action) in historique if action == "emprunt"]
-    if not emprunts:
-        print("Aucun emprunt pour générer le top auteurs.")
-        return
+def tracer_repartition_genres(donnees: tuple[list[str], list[int]]):
+    _afficher(dessiner_repartition_genres, donnees)
 
-    # Compter emprunts par auteur
-    auteur_counts = Counter()
-    for isbn in emprunts:
-        if isbn in livres:
-            auteur = livres[isbn].auteur
-            if auteur:  # éviter les auteurs vides
-                auteur_counts[auteur] += 1
+def diagramme_pourcentage_genres(index):
+    tracer_repartition_genres(calcul_repartition_genres(index))
 
-    if not auteur_counts:
-        print("Aucun auteur à afficher.")
-        return
+#Histogramme des 10 auteurs plus populaires
+@mesurer
+def dessiner_top_auteurs(fig: "Figure", donnees: tuple[int, list[tuple[str, int]]], top_n: int = 10):
+    """donnees : (nombre total d'emprunts, [(auteur, emprunts), ...])."""
+    nb_emprunts, top = donnees
 
-    # Trier par nombre d'emprunts décroissant
-    sorted_auteurs = auteur_counts.most_common()
-
-    # Inclure les ex-aequo du dernier
-    top = []
-    seuil = 0
-    for auteur, count in sorted_auteurs:
-        if len(top) < top_n:
-            top.append((auteur, count))
-            seuil = count
-        elif count == seuil:
-            top.append((auteur, count))
-        else:
-            break
+    if not nb_emprunts:
+        return "Aucun emprunt pour générer le top auteurs."
 
-    auteurs, emprunt_counts = zip(*top)
+    if not top:
+        return "Aucun auteur à afficher."
 
-    couleurs_palette = ['#2d1409', '#541308', '#643f24', '#846e51', '#b19c85']
-    couleurs = [couleurs_palette[i % len(couleurs_palette)] for i in range(len(auteurs))]
+    auteurs, emprunt_counts = zip(*top)
+    couleurs = [PALETTE[i % len(PALETTE)] for i in range(len(auteurs))]
 
-    plt.figure(figsize=(12, 6))
-    bars = plt.bar(auteurs, emprunt_counts, color=couleurs)
-    plt.xticks(rotation=45, ha='right', fontsize=10)
-    plt.title(f"Top {top_n} des auteurs les plus empruntés ", fontsize=14, fontweight='bold')
+    ax = fig.subplots()
+    bars = ax.bar(auteurs, emprunt_counts, color=couleurs)
+    ax.tick_params(axis='x', labelrotation=45, labelsize=10)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    ax.set_title(f"Top {top_n} des auteurs les plus empruntés ", fontsize=14, fontweight='bold')
 
     # Ajouter les valeurs au-dessus des barres
     for bar, count in zip(bars, emprunt_counts):
-        plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 0.2,
-                 str(count), ha='center', va='bottom', fontsize=9)
-
-    plt.tight_layout()
-    plt.show()
-
-#courbe des emprunts dans un mois     
-def courbe_activite_emprunts(historique: list[tuple[str,str,str,str]], jours: int = 30):
-    today = datetime.date.today()
-    dates = [datetime.date.fromisoformat(date) for (date, isbn, idm, action) in historique if action == "emprunt"]
-    if not dates:
-        print("Aucune activité d'emprunt pour la courbe.")
+        ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 0.2,
+                str(count), ha='center', va='bottom', fontsize=9)
+
+def tracer_top_auteurs(donnees: tuple[int, list[tuple[str, int]]], top_n: int = 10):
+    _afficher(lambda fig, d: dessiner_top_auteurs(fig, d, top_n), donnees, figsize=(12, 6))
+
+def top_auteurs_populaires(stats: Statistiques, top_n: int = 10):
+    tracer_top_auteurs((stats.nb_emprunts, stats.top_auteurs(top_n)), top_n)
+
+#courbe des emprunts dans un mois
+@mesurer
+def dessiner_activite_emprunts(fig: "Figure", donnees: tuple[int, tuple[list[datetime.date], list[int]]]):
+    # Sans aucun emprunt dans l'historique, pas de courbe ; une période calme se trace à zéro
+    nb_emprunts, (jours_list, counts) = donnees
+    if not nb_emprunts:
+        return "Aucune activité d'emprunt pour la courbe."
+    ax = fig.subplots()
+    ax.plot(jours_list, counts, marker='o')
+    fig.autofmt_xdate(rotation=45, ha='right')
+    ax.set_title("Activité des emprunts (30 derniers jours)")
+
+def tracer_activite_emprunts(donnees: tuple[int, tuple[list[datetime.date], list[int]]]):
+    _afficher(dessiner_activite_emprunts, donnees)
+
+def courbe_activite_emprunts(stats: Statistiques, jours: int = 30):
+    tracer_activite_emprunts((stats.nb_emprunts, stats.activite(jours)))
+
+def _afficher(dessiner, donnees, figsize=None):
+    # Mode interactif : une fenêtre matplotlib, ou un message s'il n'y a rien à tracer
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=figsize)
+    message = dessiner(fig, donnees)
+    if message:
+        plt.close(fig)
+        print(message)
         return
-    counter = Counter([d for d in dates if (today - d).days < jours])
-    jours_list = [today - datetime.timedelta(days=i) for i in range(jours-1, -1, -1)]
-    counts = [counter.get(d, 0) for d in jours_list]
-    plt.figure()
-    plt.plot(jours_list, counts, marker='o')
-    plt.xticks(rotation=45, ha='right')
-    plt.title("Activité des emprunts (30 derniers jours)")
-    plt.tight_layout()
+    fig.tight_layout()
     plt.show()
 
+
+# ===================== Rendu sans affichage, avec cache =====================
+
+# nom -> (fonction de tracé, taille de la figure)
+GRAPHIQUES = {
+    "genres": (dessiner_repartition_genres, None),
+    "top_auteurs": (dessiner_top_auteurs, (12, 6)),
+    "activite": (dessiner_activite_emprunts, None),
+}
+FORMATS = ("png", "svg")
+
+
+def empreinte(donnees):
+    """Version des données d'un graphique : même empreinte, même image."""
+    return hashlib.sha1(repr(donnees).encode("utf-8")).hexdigest()[:16]
+
+
+@mesurer
+def rendre_graphique(nom: str, donnees, dossier: str | Path, format: str = "png"):
+    """
+    Écrit le graphique nom dans dossier (sans fenêtre ni pyplot) et retourne son chemin,
+    ou None s'il n'y a rien à tracer. Le fichier porte l'empreinte des données : s'il
+    existe déjà, il est retourné sans rien redessiner.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Format inconnu : '{format}'")
+    dessiner, figsize = GRAPHIQUES[nom]
+    dossier = Path(dossier)
+    chemin = dossier / f"{nom}-{empreinte(donnees)}.{format}"
+    if chemin.exists():
+        return chemin
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    if dessiner(fig, donnees):
+        return None
+    fig.tight_layout()
+    dossier.mkdir(parents=True, exist_ok=True)
+    tmp = chemin.with_name(chemin.name + ".tmp")
+    fig.savefig(tmp, format=format)
+    os.replace(tmp, chemin)
+    # Les images des versions précédentes ne serviront plus
+    for ancien in dossier.glob(f"{nom}-*.{format}"):
+        if ancien != chemin:
+            ancien.unlink(missing_ok=True)
+    return chemin
+
+
+@mesurer
+def donnees_graphique(biblio, nom: str):
+    """Données du graphique nom, lues dans les index et les compteurs tenus à jour."""
+    if nom == "genres":
+        return calcul_repartition_genres(biblio.index_catalogue)
+    stats = biblio.statistiques
+    if nom == "top_auteurs":
+        return stats.nb_emprunts, stats.top_auteurs()
+    if nom == "activite":
+        return stats.nb_emprunts, stats.activite()
+    raise ValueError(f"Graphique inconnu : '{nom}'")
+
+
+def rendre_rapports(biblio, dossier: str | Path, formats: tuple[str, ...] = ("png",)):
+    """Rend tous les graphiques ; retourne {(nom, format): chemin ou None}."""
+    rendus = {}
+    for nom in GRAPHIQUES:
+        donnees = donnees_graphique(biblio, nom)
+        for format in formats:
+            rendus[nom, format] = rendre_graphique(nom, donnees, dossier, format)
+    return rendus
+
+
+if __name__ == "__main__":
+    from bibliotheque import STOCKAGES, ouvrir_bibliotheque
+
+    ROOT_DIR = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Rendu des graphiques de la bibliothèque en fichiers images")
+    parser.add_argument("--data", default=ROOT_DIR / "data", type=Path)
+    parser.add_argument("--stockage", default=os.environ.get("BIBLIO_STOCKAGE", "texte"), choices=STOCKAGES)
+    parser.add_argument("--sortie", default=None, type=Path, help="Dossier des images (défaut : DATA/graphiques)")
+    parser.add_argument("--format", nargs="+", default=["png"], choices=FORMATS)
+    args = parser.parse_args()
+
+    biblio = ouvrir_bibliotheque(args.data, stockage=args.stockage, partage=True, paresseux=True)
+    biblio.charger_tout()
+    for (nom, format), chemin in rendre_rapports(biblio, args.sortie or args.data / "graphiques", tuple(args.format)).items():
+        print(f"{nom} ({format}) : {chemin or 'aucune donnée'}")
@@ -0,0 +1,16 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+RACINE = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(RACINE / "src"), str(RACINE)]
+
+
+@pytest.fixture
+def donnees(tmp_path):
+    """Copie de data/ : les tests ne modifient jamais les fichiers livrés."""
+    dossier = tmp_path / "data"
+    shutil.copytree(RACINE / "data", dossier, ignore=shutil.ignore_patterns("*.lock", "journal.log"))
+    return dossier
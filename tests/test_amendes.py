@@ -0,0 +1,74 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import RACINE
+from bibliotheque import ouvrir_bibliotheque
+from echeances import ReglesPret
+from exceptions import MembreInexistantError
+
+ISBN = "2010000010"
+
+
+def test_bareme():
+    regles = ReglesPret(amende_par_jour=20, amende_max=100)
+    assert regles.amende(0) == 0
+    assert regles.amende(3) == 60
+    assert regles.amende(10) == 100
+    assert ReglesPret(amende_par_jour=20, amende_max=0).amende(10) == 200
+
+
+@pytest.fixture
+def en_retard(donnees):
+    # Le membre 1 doit rendre ses livres dix jours avant de les emprunter : tout retour est en retard
+    (donnees / "regles_pret.json").write_text(json.dumps(
+        {"durees_membres": {"1": -10}, "amende_par_jour": 0.50, "amende_max": 10.00}), encoding="utf-8")
+    return donnees
+
+
+def ouvrir(donnees):
+    biblio = ouvrir_bibliotheque(donnees, partage=True)
+    biblio.charger_tout()
+    return biblio
+
+
+def test_retour_en_retard_puis_paiement(en_retard, capsys):
+    biblio = ouvrir(en_retard)
+    biblio.emprunter(ISBN, "1")
+    assert biblio.emprunts_en_retard()[0][1:] == (ISBN, "1")
+    biblio.retourner(ISBN, "1")
+    assert biblio.solde_amendes("1") == 500
+    # Le retour est journalisé avant l'amende qu'il justifie
+    operations = [json.loads(ligne)["op"] for ligne in (en_retard / "journal.log").read_text().splitlines()]
+    assert operations[-2:] == ["emprunt", "retour"]
+
+    with pytest.raises(ValueError):
+        biblio.payer_amende("1", 600)
+    with pytest.raises(MembreInexistantError):
+        biblio.payer_amende("999", 100)
+    autre_poste = ouvrir(en_retard)
+    biblio.payer_amende("1", 200)
+    assert biblio.solde_amendes("1") == 300
+
+    autre_poste.synchroniser()
+    assert autre_poste.solde_amendes("1") == 300
+    assert ouvrir(en_retard).solde_amendes("1") == 300
+
+
+def test_lot_avec_retour_en_retard(en_retard, capsys):
+    biblio = ouvrir(en_retard)
+    biblio.emprunter(ISBN, "1")
+    resultats = biblio.traiter_lot([("retour", ISBN, "1")])
+    assert resultats[0]["statut"] == "ok"
+    assert biblio.solde_amendes("1") == 500
+
+
+@pytest.mark.parametrize("arguments", [["1", "5"], ["999", "5"], ["1", "-1"]])
+def test_commande_payer_refuse_sans_trace(donnees, arguments):
+    resultat = subprocess.run([sys.executable, str(RACINE / "src" / "echeances.py"), "--data", str(donnees),
+                               "payer", *arguments], capture_output=True, text=True, encoding="utf-8")
+    assert resultat.returncode == 1
+    assert resultat.stderr.startswith("[!]")
+    assert "Traceback" not in resultat.stderr
@@ -0,0 +1,73 @@
+import pytest
+
+from bibliotheque import Bibliotheque
+
+
+def test_lignes_invalides_signalees(donnees, capsys):
+    nb_livres = len((donnees / "livres.txt").read_text(encoding="utf-8").splitlines())
+    with open(donnees / "livres.txt", "a", encoding="utf-8") as f:
+        f.write("ligne sans champs\n\n")
+    with open(donnees / "membres.txt", "a", encoding="utf-8") as f:
+        f.write("99\n")
+    biblio = Bibliotheque(donnees)
+    biblio.charger_tout()
+    assert len(biblio.livres) == nb_livres
+    assert biblio.lignes_ignorees["livres.txt"] == [nb_livres + 1]
+    assert len(biblio.lignes_ignorees["membres.txt"]) == 1
+    assert "99" not in biblio.membres
+    erreurs = capsys.readouterr().err
+    assert "livres.txt : 1 ligne(s) invalide(s)" in erreurs and "membres.txt" in erreurs
+
+
+def test_fichiers_valides_sans_message(donnees, capsys):
+    biblio = Bibliotheque(donnees)
+    biblio.charger_tout()
+    assert biblio.lignes_ignorees == {"livres.txt": [], "membres.txt": []}
+    assert capsys.readouterr().err == ""
+
+
+def test_erreur_interne_non_masquee(donnees, monkeypatch):
+    def defaillant(self, livre):
+        raise RuntimeError("index")
+
+    monkeypatch.setattr(Bibliotheque, "_inserer_livre", defaillant)
+    with pytest.raises(RuntimeError):
+        Bibliotheque(donnees).charger_tout()
+
+
+def test_lignes_invalides_signalees_en_mode_paresseux(donnees, capsys):
+    nb_livres = len((donnees / "livres.txt").read_text(encoding="utf-8").splitlines())
+    with open(donnees / "livres.txt", "a", encoding="utf-8") as f:
+        f.write("ligne sans champs\n\n")
+    # Index construit puis relu depuis livres.idx : même signalement
+    for _ in range(2):
+        biblio = Bibliotheque(donnees, paresseux=True)
+        biblio.charger_tout()
+        assert len(biblio.livres) == nb_livres
+        assert biblio.lignes_ignorees["livres.txt"] == [nb_livres + 1]
+        assert "livres.txt : 1 ligne(s) invalide(s)" in capsys.readouterr().err
+    biblio.sauvegarder_livres()
+    assert biblio.livres.lignes_ignorees == []
+    relue = Bibliotheque(donnees, paresseux=True)
+    relue.charger_tout()
+    assert relue.lignes_ignorees["livres.txt"] == []
+
+
+def test_remplacement_refuse_en_mode_paresseux(donnees, monkeypatch, capsys):
+    import catalogue_paresseux
+
+    biblio = Bibliotheque(donnees, paresseux=True)
+    biblio.charger_tout()
+    isbn, dernier = list(biblio.livres)[0], list(biblio.livres)[-1]
+    avant = biblio.livres[isbn].titre
+
+    def refuse(tmp, chemin):
+        raise PermissionError("fichier ouvert par un autre processus")
+
+    monkeypatch.setattr(catalogue_paresseux.os, "replace", refuse)
+    monkeypatch.setattr(catalogue_paresseux.time, "sleep", lambda duree: None)
+    with pytest.raises(PermissionError):
+        biblio.sauvegarder_livres()
+    # Le catalogue reste lisible, adossé à l'ancien fichier
+    assert biblio.livres[isbn].titre == avant
+    assert biblio.livres[dernier].isbn == dernier
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import RACINE
+from bibliotheque import Bibliotheque
+from stockage_sqlite import migrer
+
+ISBN = "2010000043"
+
+
+def lancer(donnees, *arguments, stockage="texte"):
+    env = {k: v for k, v in os.environ.items() if k != "BIBLIO_STOCKAGE"}
+    return subprocess.run([sys.executable, str(RACINE / "src" / "main.py"), "--data", str(donnees),
+                           "--stockage", stockage, *arguments],
+                          capture_output=True, text=True, encoding="utf-8", env=env)
+
+
+def relire(donnees):
+    # Les commandes écrivent en mode partagé : le journal doit être rejoué
+    biblio = Bibliotheque(donnees, journal=True)
+    biblio.charger_tout()
+    return biblio
+
+
+@pytest.mark.parametrize("stockage", ["texte", "sqlite"])
+def test_emprunter_puis_retourner(donnees, stockage):
+    if stockage == "sqlite":
+        migrer(donnees, donnees / "bibliotheque.db")
+    resultat = lancer(donnees, "emprunter", ISBN, "1", stockage=stockage)
+    assert resultat.returncode == 0, resultat.stderr
+    assert "Emprunt : Youssef El Amrani (ID 1)" in resultat.stdout
+    # Déjà emprunté : refus, code 1, message sur la sortie d'erreur
+    resultat = lancer(donnees, "emprunter", ISBN, "2", stockage=stockage)
+    assert resultat.returncode == 1
+    assert resultat.stderr.startswith("[!] ")
+    assert lancer(donnees, "retourner", ISBN, "1", stockage=stockage).returncode == 0
+    resultat = lancer(donnees, "retourner", ISBN, "1", stockage=stockage)
+    assert resultat.returncode == 1 and "[!] " in resultat.stderr
+    if stockage == "texte":
+        assert relire(donnees).livres[ISBN].statut == "disponible"
+
+
+def test_erreurs_de_saisie(donnees):
+    for arguments in (["emprunter", "0000000000", "1"], ["emprunter", ISBN, "999"], ["retourner", ISBN, "1"]):
+        resultat = lancer(donnees, *arguments)
+        assert resultat.returncode == 1, arguments
+        assert resultat.stderr.startswith("[!] ")
+        assert resultat.stdout == ""
+    # Rien n'a été écrit
+    assert relire(donnees).livres[ISBN].statut == "disponible"
+    # Sous-commande incomplète : erreur d'argparse
+    assert lancer(donnees, "emprunter", ISBN).returncode == 2
+
+
+def test_reserver(donnees):
+    # Livre disponible : réservation refusée
+    assert lancer(donnees, "reserver", ISBN, "2").returncode == 1
+    assert lancer(donnees, "emprunter", ISBN, "1").returncode == 0
+    assert lancer(donnees, "reserver", ISBN, "2").returncode == 0
+    assert lancer(donnees, "reserver", ISBN, "2").returncode == 1
+    # Mis de côté au retour : seul le réservataire peut l'emprunter
+    assert lancer(donnees, "retourner", ISBN, "1").returncode == 0
+    assert lancer(donnees, "emprunter", ISBN, "3").returncode == 1
+    assert lancer(donnees, "emprunter", ISBN, "2").returncode == 0
+    assert ISBN in relire(donnees).membres["2"].livres_empruntes
+
+
+def test_chercher(donnees):
+    resultat = lancer(donnees, "chercher", "harry", "potter", "--limite", "1")
+    assert resultat.returncode == 0
+    assert len(resultat.stdout.splitlines()) == 1
+    assert "Harry Potter" in resultat.stdout
+    resultat = lancer(donnees, "chercher", "baudel")
+    assert resultat.stdout.startswith("Les Fleurs du mal (Charles Baudelaire, 1857)")
+    # Aucun résultat n'est pas une erreur
+    resultat = lancer(donnees, "chercher", "introuvable")
+    assert (resultat.returncode, resultat.stdout) == (0, "")
+
+
+def test_rapport(donnees, tmp_path):
+    pytest.importorskip("matplotlib")
+    sortie = tmp_path / "images"
+    resultat = lancer(donnees, "rapport", "--sortie", str(sortie), "--format", "png", "svg")
+    assert resultat.returncode == 0, resultat.stderr
+    assert len(resultat.stdout.splitlines()) == 6
+    assert len(list(sortie.glob("genres-*.svg"))) == 1
+    # Dossier par défaut : DATA/graphiques
+    assert lancer(donnees, "rapport").returncode == 0
+    assert list((donnees / "graphiques").glob("genres-*.png"))
@@ -0,0 +1,117 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import RACINE
+from bibliotheque import Bibliotheque
+from exceptions import LivreIndisponibleError
+from stockage_sqlite import BibliothequeSQLite, migrer
+
+# Emprunté d'après livres.txt, sans emprunteur dans membres.txt
+ETRANGER = "9782253002"
+# Disponible, un seul exemplaire
+LIBRE = "2010000043"
+
+
+def ouvrir(dossier):
+    biblio = Bibliotheque(dossier)
+    biblio.charger_tout()
+    return biblio
+
+
+def test_statut_sans_emprunteur_connu_reste_indisponible(donnees):
+    biblio = ouvrir(donnees)
+    assert biblio.disponibilite(ETRANGER) == (0, 1)
+    with pytest.raises(LivreIndisponibleError):
+        biblio.emprunter(ETRANGER, "1")
+    assert biblio.disponibilite(ETRANGER) == (0, 1)
+
+
+def test_statut_sans_emprunteur_connu_en_sqlite(donnees, capsys):
+    migrer(donnees, donnees / "bibliotheque.db")
+    biblio = BibliothequeSQLite(donnees / "bibliotheque.db")
+    biblio.charger_tout()
+    with pytest.raises(LivreIndisponibleError):
+        biblio.emprunter(ETRANGER, "1")
+    assert biblio.disponibilite(ETRANGER) == (0, 1)
+
+
+def test_commande_emprunter_refuse_le_livre_sorti(donnees):
+    resultat = subprocess.run([sys.executable, str(RACINE / "src" / "main.py"), "--data", str(donnees),
+                               "emprunter", ETRANGER, "1"], capture_output=True, text=True, encoding="utf-8")
+    assert resultat.returncode == 1
+    assert "n'est pas disponible" in resultat.stdout + resultat.stderr
+
+
+def test_exemplaire_ajoute_a_un_livre_sorti(donnees, capsys):
+    biblio = ouvrir(donnees)
+    biblio.ajouter_exemplaires(ETRANGER)
+    assert biblio.disponibilite(ETRANGER) == (1, 2)
+    biblio.emprunter(ETRANGER, "1")
+    assert biblio.disponibilite(ETRANGER) == (0, 2)
+    biblio.sauvegarder_tout()
+
+    relue = ouvrir(donnees)
+    assert relue.disponibilite(ETRANGER) == (0, 2)
+    assert relue.livres[ETRANGER].statut == "emprunté"
+
+
+@pytest.mark.parametrize("stockage", ["texte", "sqlite"])
+def test_compteurs_suivent_les_emprunts(donnees, capsys, stockage):
+    if stockage == "sqlite":
+        migrer(donnees, donnees / "bibliotheque.db")
+        biblio = BibliothequeSQLite(donnees / "bibliotheque.db")
+        biblio.charger_tout()
+    else:
+        biblio = ouvrir(donnees)
+    codes = biblio.ajouter_exemplaires(LIBRE, nombre=2)
+    assert codes == [f"{LIBRE}-2", f"{LIBRE}-3"]
+    assert biblio.disponibilite(LIBRE) == (3, 3)
+    biblio.emprunter(LIBRE, "1")
+    biblio.emprunter(LIBRE, "2")
+    assert biblio.disponibilite(LIBRE) == (1, 3)
+    assert biblio.livres[LIBRE].statut == "disponible"
+    # Un membre n'emprunte qu'un exemplaire d'un même titre
+    with pytest.raises(LivreIndisponibleError):
+        biblio.emprunter(LIBRE, "1")
+    biblio.emprunter(LIBRE, "3")
+    assert biblio.disponibilite(LIBRE) == (0, 3)
+    assert biblio.livres[LIBRE].statut == "emprunté"
+    biblio.retourner(LIBRE, "2")
+    assert biblio.disponibilite(LIBRE) == (1, 3)
+    assert biblio.livres[LIBRE].statut == "disponible"
+
+
+def test_retirer_exemplaire(donnees, capsys):
+    biblio = ouvrir(donnees)
+    biblio.ajouter_exemplaires(LIBRE, nombre=2)
+    biblio.emprunter(LIBRE, "1")
+    stock = biblio.exemplaires.stock(LIBRE)
+    prete, = stock.prets.values()
+    with pytest.raises(LivreIndisponibleError):
+        biblio.retirer_exemplaire(prete)
+    libre = stock.libres[0]
+    biblio.retirer_exemplaire(libre)
+    assert biblio.disponibilite(LIBRE) == (1, 2)
+    assert biblio.isbn_exemplaire(libre) is None
+    biblio.retirer_exemplaire(stock.libres[0])
+    assert biblio.disponibilite(LIBRE) == (0, 1)
+    biblio.retourner(LIBRE, "1")
+    # Le titre garde au moins un exemplaire
+    with pytest.raises(ValueError):
+        biblio.retirer_exemplaire(prete)
+    assert biblio.disponibilite(LIBRE) == (1, 1)
+
+
+def test_compteurs_recharges(donnees, capsys):
+    biblio = ouvrir(donnees)
+    biblio.ajouter_exemplaires(LIBRE, nombre=3)
+    biblio.emprunter(LIBRE, "1")
+    biblio.emprunter(LIBRE, "2")
+    biblio.sauvegarder_tout()
+    relue = ouvrir(donnees)
+    assert relue.disponibilite(LIBRE) == (2, 4)
+    assert sorted(relue.exemplaires.stock(LIBRE).prets) == ["1", "2"]
+    relue.retourner(LIBRE, "1")
+    assert relue.disponibilite(LIBRE) == (3, 4)
@@ -0,0 +1,44 @@
+import pytest
+
+from historique import Historique, HistoriquePartitionne
+
+EVENEMENTS = [
+    ("2025-01-05", "111", "1", "emprunt"),
+    # Champs que csv.writer met entre guillemets
+    ("2025-01-06", "222", 'Dupont, "Jean"', "emprunt"),
+    ("2025-02-01", "111", "1", "retour"),
+    ("2025-02-03", "333,bis", "2", "emprunt"),
+]
+
+
+@pytest.fixture(params=["fichier", "partitions"])
+def historique(request, tmp_path):
+    if request.param == "fichier":
+        historique = Historique(tmp_path / "historique.csv")
+    else:
+        historique = HistoriquePartitionne(tmp_path / "historique")
+    for rec in EVENEMENTS:
+        historique.ajouter(rec)
+    historique.vider()
+    return historique
+
+
+def relire(historique):
+    """Même historique relu depuis le disque, sans tampon ni cache."""
+    return type(historique)(historique.chemin)
+
+
+def test_relecture_des_champs_entre_guillemets(historique):
+    relu = relire(historique)
+    assert list(relu) == EVENEMENTS
+    assert list(reversed(relu)) == EVENEMENTS[::-1]
+    assert relu.dernieres(2) == EVENEMENTS[2:]
+    assert len(relu) == len(EVENEMENTS)
+
+
+def test_recherche(historique):
+    relu = relire(historique)
+    assert list(relu.chercher(id_membre='Dupont, "Jean"')) == [EVENEMENTS[1]]
+    assert list(relu.chercher(isbn="333,bis")) == [EVENEMENTS[3]]
+    assert list(relu.chercher(isbn="111", recents_d_abord=False)) == [EVENEMENTS[0], EVENEMENTS[2]]
+    assert list(relu.chercher(date_min="2025-02-01")) == EVENEMENTS[:1:-1]
@@ -0,0 +1,115 @@
+import csv
+import subprocess
+import sys
+
+import pytest
+
+from conftest import RACINE
+from bibliotheque import Bibliotheque
+from historique import Historique, HistoriquePartitionne
+
+EVENEMENTS = [
+    ("2025-01-05", "111", "1", "emprunt"),
+    ("2025-01-20", "222", "2", "emprunt"),
+    ("2025-02-01", "111", "1", "retour"),
+    ("2025-03-03", "333", "2", "emprunt"),
+    # Date illisible : partition placée avant les autres
+    ("inconnue", "444", "3", "emprunt"),
+]
+
+
+@pytest.fixture
+def partitions(tmp_path):
+    historique = HistoriquePartitionne(tmp_path / "historique")
+    for rec in EVENEMENTS:
+        historique.ajouter(rec)
+    historique.vider()
+    return historique
+
+
+def relire(historique):
+    return HistoriquePartitionne(historique.dossier)
+
+
+def lignes(chemin):
+    """Partition brute : pas d'en-tête, contrairement à historique.csv."""
+    with open(chemin, newline="", encoding="utf-8") as f:
+        return [tuple(row) for row in csv.reader(f)]
+
+
+def test_une_partition_par_mois(partitions):
+    assert partitions._partitions() == ["0000-00", "2025-01", "2025-02", "2025-03"]
+    assert lignes(partitions.dossier / "2025-01.csv") == EVENEMENTS[:2]
+    assert lignes(partitions.dossier / "0000-00.csv") == EVENEMENTS[4:]
+    assert list(relire(partitions)) == [EVENEMENTS[4], *EVENEMENTS[:4]]
+
+
+def test_recherche_par_index_sans_parcours(partitions, monkeypatch):
+    relu = relire(partitions)
+    assert list(relu.chercher(isbn="111", recents_d_abord=False)) == [EVENEMENTS[0], EVENEMENTS[2]]
+    # Index des mois terminés écrits à côté de leur partition
+    assert (partitions.dossier / "2025-01.idx").exists()
+
+    # Nouvelle instance : les index sont relus, aucune partition n'est parcourue ni réindexée
+    relu = relire(partitions)
+
+    def interdit(*args, **kwargs):
+        raise AssertionError("partition parcourue")
+
+    monkeypatch.setattr(relu, "_enregistrements", interdit)
+    monkeypatch.setattr(relu, "_indexer", interdit)
+    assert list(relu.chercher(id_membre="2")) == [EVENEMENTS[3], EVENEMENTS[1]]
+    assert list(relu.chercher(isbn="111", id_membre="1", date_max="2025-01-31")) == [EVENEMENTS[0]]
+
+
+def test_index_complete_apres_ajout(partitions):
+    relu = relire(partitions)
+    assert len(list(relu.chercher(isbn="222"))) == 1
+    partitions.ajouter(("2025-01-25", "222", "5", "retour"))
+    partitions.vider()
+    assert list(relu.chercher(isbn="222")) == [("2025-01-25", "222", "5", "retour"), EVENEMENTS[1]]
+    assert len(relu) == len(EVENEMENTS) + 1
+
+
+def test_archiver_puis_chercher(partitions):
+    assert partitions.archiver("2025-03") == ["0000-00", "2025-01", "2025-02"]
+    assert not (partitions.dossier / "2025-01.csv").exists()
+    assert (partitions.dossier / "2025-01.csv.gz").exists()
+    relu = relire(partitions)
+    assert list(relu) == [EVENEMENTS[4], *EVENEMENTS[:4]]
+    assert list(relu.chercher(isbn="111")) == [EVENEMENTS[2], EVENEMENTS[0]]
+    assert list(relu.chercher(date_min="2025-01-10", date_max="2025-02-28")) == [EVENEMENTS[2], EVENEMENTS[1]]
+    # Un événement daté d'un mois archivé désarchive sa partition
+    relu.ajouter(("2025-01-30", "555", "4", "emprunt"))
+    relu.vider()
+    assert (partitions.dossier / "2025-01.csv").exists()
+    assert not (partitions.dossier / "2025-01.csv.gz").exists()
+    assert list(relu.chercher(isbn="555")) == [("2025-01-30", "555", "4", "emprunt")]
+
+
+def test_remplacer_isbns_ne_reecrit_que_les_partitions_concernees(partitions):
+    partitions.archiver("2025-02")
+    intacte = partitions.dossier / "2025-03.csv"
+    avant = intacte.stat().st_mtime_ns
+    partitions.remplacer_isbns({"111": "999"})
+    assert intacte.stat().st_mtime_ns == avant
+    relu = relire(partitions)
+    assert [rec[1] for rec in relu.chercher(isbn="999", recents_d_abord=False)] == ["999", "999"]
+    assert list(relu.chercher(isbn="111")) == []
+    # La partition archivée le reste
+    assert (partitions.dossier / "2025-01.csv.gz").exists()
+
+
+def test_migration_de_historique_csv(donnees):
+    avant = list(Historique(donnees / "historique.csv"))
+    resultat = subprocess.run([sys.executable, str(RACINE / "src" / "historique.py"), "partitionner",
+                               "--data", str(donnees)], capture_output=True, text=True, encoding="utf-8")
+    assert resultat.returncode == 0, resultat.stderr
+    assert not (donnees / "historique.csv").exists()
+    assert (donnees / "historique.csv.migre").exists()
+    # Le dossier des partitions suffit à choisir le mode partitionné
+    biblio = Bibliotheque(donnees)
+    biblio.charger_tout()
+    assert biblio.partitionne
+    assert sorted(biblio.historique) == sorted(avant)
+    assert len(biblio.historique) == len(avant)
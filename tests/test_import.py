@@ -0,0 +1,101 @@
+import csv
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import RACINE
+from bibliotheque import ouvrir_bibliotheque
+from import_export import lire_enregistrements
+from stockage_sqlite import migrer
+
+LIVRES_CSV = """isbn,titre,auteur,annee,genre
+3000000001,Valide,Auteur Un,2001,Roman
+3000000002,,Auteur Deux,2002,Roman
+30000,ISBN court,Auteur Trois,2003,Roman
+3000000004,Année,Auteur Quatre,deux mille,Roman
+2010000010,Déjà là,George Orwell,1949,Dystopie
+3000000006,Valide aussi,Auteur Six,-50,Essai
+3000000001,Doublon du fichier,Auteur Un,2001,Roman
+"""
+
+REJETS = [
+    (2, "champ manquant"),
+    (3, "ISBN invalide '30000'"),
+    (4, "année invalide 'deux mille'"),
+    (5, "'2010000010' existe déjà"),
+    (7, "'3000000001' existe déjà"),
+]
+
+
+@pytest.fixture(params=["texte", "sqlite"])
+def stockage(request, donnees):
+    if request.param == "sqlite":
+        migrer(donnees, donnees / "bibliotheque.db")
+    return request.param
+
+
+def ouvrir(donnees, stockage):
+    biblio = ouvrir_bibliotheque(donnees, stockage=stockage)
+    biblio.charger_tout()
+    return biblio
+
+
+def test_raisons_des_rejets(donnees, stockage, tmp_path, capsys):
+    source = tmp_path / "livres.csv"
+    source.write_text(LIVRES_CSV, encoding="utf-8")
+    biblio = ouvrir(donnees, stockage)
+    # Lots de 2 : le doublon de la ligne 7 est détecté contre un lot déjà inséré
+    rapport = biblio.importer_livres(lire_enregistrements(source), taille_lot=2)
+    assert (rapport.acceptes, rapport.rejetes) == (2, 5)
+    assert rapport.exemples == REJETS
+    assert str(rapport) == "2 acceptés, 5 rejetés"
+    relue = ouvrir(donnees, stockage)
+    assert relue.livres["3000000001"].titre == "Valide"
+    assert relue.livres["3000000006"].annee == -50
+    assert relue.livres["2010000010"].titre == "1984"
+    assert "3000000004" not in relue.livres
+
+
+def test_fichier_des_rejets(donnees, tmp_path, capsys):
+    source = tmp_path / "membres.jsonl"
+    source.write_text('{"id_membre": "500", "nom": "Nouveau"}\n'
+                      '{"id_membre": "501", "nom": \n'
+                      '\n'
+                      '{"id_membre": "1", "nom": "Homonyme"}\n'
+                      '{"id_membre": "502"}\n', encoding="utf-8")
+    rejets = tmp_path / "rejets.csv"
+    rapport = ouvrir(donnees, "texte").importer_membres(lire_enregistrements(source), fichier_rejets=rejets)
+    assert (rapport.acceptes, rapport.rejetes) == (1, 3)
+    with open(rejets, newline="", encoding="utf-8") as f:
+        lignes = list(csv.reader(f))
+    assert lignes[0] == ["ligne", "raison", "donnees"]
+    # Numéros d'enregistrement (ligne vide non comptée) ; les doublons sortent avec leur lot
+    assert [(int(n), raison) for n, raison, _ in lignes[1:]] == [
+        (2, "JSON invalide"), (4, "champ manquant"), (3, "'1' existe déjà")]
+    # Les données rejetées sont conservées pour pouvoir les corriger
+    assert json.loads(lignes[1][2])["_ligne"] == '{"id_membre": "501", "nom":'
+    assert json.loads(lignes[3][2]) == {"id_membre": "1", "nom": "Homonyme"}
+    assert ouvrir(donnees, "texte").membres["1"].nom == "Youssef El Amrani"
+
+
+def test_commande_importer(donnees, tmp_path):
+    source = tmp_path / "livres.csv"
+    source.write_text(LIVRES_CSV, encoding="utf-8")
+    rejets = tmp_path / "rejets.csv"
+
+    def importer(fichier):
+        return subprocess.run([sys.executable, str(RACINE / "src" / "import_export.py"), "--data", str(donnees),
+                               "importer", "livres", str(fichier), "--rejets", str(rejets)],
+                              capture_output=True, text=True, encoding="utf-8")
+
+    resultat = importer(source)
+    assert resultat.returncode == 0, resultat.stderr
+    assert "Import livres : 2 acceptés, 5 rejetés" in resultat.stdout
+    assert "ligne 3 : ISBN invalide '30000'" in resultat.stdout
+    # Tout rejeté (déjà importé) : code de sortie 1
+    resultat = importer(source)
+    assert resultat.returncode == 1
+    assert "0 acceptés, 7 rejetés" in resultat.stdout
+    assert len(rejets.read_text(encoding="utf-8").splitlines()) == 8
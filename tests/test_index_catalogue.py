@@ -0,0 +1,78 @@
+from collections import Counter
+
+import pytest
+
+from bibliotheque import Bibliotheque
+from index_texte import normaliser
+
+FILTRES = [
+    {"genre": "thriller"},
+    {"genre": "Roman psychologique", "statut": "disponible"},
+    {"auteur": "george orwell"},
+    {"auteur": "J.K. Rowling", "statut": "emprunté"},
+    {"statut": "disponible"},
+    {"statut": "emprunté"},
+    {"statut": "réservé"},
+    {"genre": "Dystopie", "auteur": "Ray Bradbury"},
+]
+
+
+@pytest.fixture(params=[{}, {"compact": True}, {"paresseux": True}], ids=["texte", "compact", "paresseux"])
+def biblio(request, donnees, capsys):
+    biblio = Bibliotheque(donnees, journal=True, **request.param)
+    biblio.charger_tout()
+    return biblio
+
+
+def parcours_complet(biblio, genre=None, auteur=None, statut=None):
+    """Réponse de référence : parcours de tout le catalogue, sans index."""
+    return {livre.isbn for livre in biblio.livres.values()
+            if (genre is None or normaliser(livre.genre) == normaliser(genre))
+            and (auteur is None or normaliser(livre.auteur) == normaliser(auteur))
+            and (statut is None or livre.statut == statut)}
+
+
+def verifier_index(biblio):
+    for filtres in FILTRES:
+        attendus = parcours_complet(biblio, **filtres)
+        livres, curseur = biblio.page_livres(limite=len(biblio.livres) + 1, tri="isbn", **filtres)
+        assert curseur is None
+        assert [livre.isbn for livre in livres] == sorted(attendus), filtres
+        assert biblio.compter_livres(**filtres) == len(attendus), filtres
+    par_genre = Counter(normaliser(livre.genre) for livre in biblio.livres.values())
+    assert {normaliser(g): n for g, n in biblio.index_catalogue.repartition_genres().items()} == par_genre
+
+
+def test_index_suit_les_mutations(biblio):
+    verifier_index(biblio)
+    biblio.ajouter_livre("3000000001", "Shining", "Stephen King", 1977, "Thriller")
+    biblio.ajouter_livre("3000000002", "Shining", "stephen king", 1977, "THRILLER")
+    biblio.ajouter_livre("3000000003", "Nouvelle", "Auteur Unique", 2020, "Genre unique")
+    verifier_index(biblio)
+    biblio.supprimer_livre("3000000003")
+    biblio.supprimer_livre("2010000054")
+    verifier_index(biblio)
+    biblio.emprunter("2010000010", "1")
+    biblio.emprunter("3000000002", "2")
+    verifier_index(biblio)
+    biblio.retourner("2010000010", "1")
+    verifier_index(biblio)
+    # Réservé au retour : le statut change sans emprunt ni rendu d'exemplaire libre
+    biblio.emprunter("2010000043", "1")
+    biblio.reserver("2010000043", "2")
+    biblio.retourner("2010000043", "1")
+    verifier_index(biblio)
+    biblio.fusionner_titres("3000000001", ["3000000002"])
+    assert "3000000002" not in biblio.livres
+    verifier_index(biblio)
+
+
+def test_index_apres_rechargement(biblio, donnees):
+    biblio.ajouter_livre("3000000001", "Shining", "Stephen King", 1977, "Thriller")
+    biblio.emprunter("3000000001", "1")
+    biblio.supprimer_livre("2010000054")
+    biblio.sauvegarder_tout()
+    relue = Bibliotheque(donnees, journal=True)
+    relue.charger_tout()
+    verifier_index(relue)
+    assert relue.compter_livres(auteur="STEPHEN KING", statut="emprunté") == 1
@@ -0,0 +1,36 @@
+import pytest
+
+from bibliotheque import ouvrir_bibliotheque
+from exceptions import InstantaneCorrompuError
+from instantane_binaire import convertir_vers_binaire, convertir_vers_texte, lire_livres
+
+
+def ouvrir(donnees, stockage="texte"):
+    biblio = ouvrir_bibliotheque(donnees, stockage=stockage, partage=True, paresseux=True)
+    biblio.charger_tout()
+    return biblio
+
+
+def test_conversion_d_un_dossier_en_service(donnees, capsys):
+    # L'emprunt n'est encore que dans journal.log
+    ouvrir(donnees).emprunter("2010000010", "1")
+    convertir_vers_binaire(donnees)
+    statuts = {livre.isbn: livre.statut for livre in lire_livres(donnees / "livres.bin")}
+    assert statuts["2010000010"] == "emprunté"
+
+    binaire = ouvrir(donnees, "binaire")
+    assert binaire.binaire
+    binaire.emprunter("2010000032", "1")
+    convertir_vers_texte(donnees)
+    ligne = next(l for l in (donnees / "membres.txt").read_text(encoding="utf-8").splitlines() if l.startswith("1;"))
+    assert "2010000010@" in ligne and "2010000032@" in ligne
+
+
+def test_instantane_corrompu(donnees, capsys):
+    convertir_vers_binaire(donnees)
+    chemin = donnees / "livres.bin"
+    contenu = bytearray(chemin.read_bytes())
+    contenu[-1] ^= 0xFF
+    chemin.write_bytes(bytes(contenu))
+    with pytest.raises(InstantaneCorrompuError):
+        ouvrir(donnees, "binaire")
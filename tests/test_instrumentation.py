@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import RACINE
+
+SCRIPT = """
+import json, sys, threading
+sys.path.insert(0, {src!r})
+import instrumentation
+
+@instrumentation.mesurer
+def ecrire(chemin, taille, pendant):
+    with open(chemin, "wb") as f:
+        f.write(b"x" * taille)
+    pendant()
+
+def autre_thread():
+    # Écritures d'un autre thread pendant l'opération : ne doivent pas lui être comptées
+    t = threading.Thread(target=lambda: open({autre!r}, "wb").write(b"y" * 1_000_000))
+    t.start()
+    t.join()
+
+ecrire({chemin!r}, 12345, autre_thread)
+print(json.dumps(instrumentation.resume()))
+"""
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/thread-self/io"), reason="compteurs par thread de Linux")
+def test_octets_du_seul_thread_mesure(tmp_path):
+    script = SCRIPT.format(src=str(RACINE / "src"), chemin=str(tmp_path / "a.bin"), autre=str(tmp_path / "b.bin"))
+    sortie = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            env={**os.environ, "BIBLIO_MESURES": "1"}).stdout
+    mesure, = json.loads(sortie).values()
+    assert mesure["appels"] == 1
+    assert mesure["octets_ecrits"] == 12345
+    assert mesure["octets_lus"] == 0
@@ -0,0 +1,64 @@
+from bibliotheque import Bibliotheque
+
+ISBN = "2010000010"
+AUTRE = "2010000032"
+
+
+def ouvrir(donnees):
+    biblio = Bibliotheque(donnees, journal=True)
+    biblio.charger_tout()
+    return biblio
+
+
+def etat(biblio):
+    """Ce qui doit survivre à un arrêt brutal : emprunts, statuts et historique."""
+    return ({m.id_membre: dict(m.livres_empruntes) for m in biblio.membres.values()},
+            {isbn: livre.statut for isbn, livre in biblio.livres.items()},
+            len(list(biblio.historique.chercher())))
+
+
+def test_relecture_apres_arret_sans_compaction(donnees, capsys):
+    biblio = ouvrir(donnees)
+    biblio.emprunter(ISBN, "1")
+    biblio.emprunter(AUTRE, "2")
+    biblio.retourner(ISBN, "1")
+    attendu = etat(biblio)
+    # Arrêt brutal : ni sauvegarde des fichiers, ni repli du journal
+    assert etat(ouvrir(donnees)) == attendu
+
+
+def test_ligne_tronquee_ignoree_puis_ajouts_conserves(donnees, capsys):
+    biblio = ouvrir(donnees)
+    biblio.emprunter(ISBN, "1")
+    with open(donnees / "journal.log", "a", encoding="utf-8") as f:
+        f.write('{"seq": 2, "op": "emprunt", "isb')
+    # Le poste suivant ignore la ligne coupée et ses ajouts restent lisibles
+    reprise = ouvrir(donnees)
+    assert ISBN in reprise.membres["1"].livres_empruntes
+    reprise.emprunter(AUTRE, "1")
+    relu = ouvrir(donnees)
+    assert set(relu.membres["1"].livres_empruntes) == {ISBN, AUTRE}
+
+
+def test_arret_entre_instantanes_et_point_de_controle(donnees, capsys):
+    biblio = ouvrir(donnees)
+    biblio.emprunter(ISBN, "1")
+    biblio.retourner(ISBN, "1")
+    biblio.emprunter(AUTRE, "1")
+    attendu = etat(biblio)
+    anomalies = biblio.verifier_coherence()
+    # Instantanés écrits mais point de contrôle absent : le journal est rejoué sur des fichiers à jour
+    biblio._ecrire_instantanes()
+    relu = ouvrir(donnees)
+    assert etat(relu) == attendu
+    # Rien n'est appliqué deux fois (les données livrées ont déjà leurs propres anomalies)
+    assert relu.verifier_coherence() == anomalies
+
+
+def test_compaction_vide_le_journal(donnees, capsys):
+    biblio = ouvrir(donnees)
+    biblio.emprunter(ISBN, "1")
+    attendu = etat(biblio)
+    biblio.compacter()
+    assert (donnees / "journal.log").stat().st_size == 0
+    assert etat(ouvrir(donnees)) == attendu
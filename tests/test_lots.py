@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import pytest
+
+from bibliotheque import Bibliotheque
+from serveur_api import ServeurAPI
+
+
+@pytest.fixture
+def biblio(donnees, capsys):
+    biblio = Bibliotheque(donnees, journal=True)
+    biblio.charger_tout()
+    return biblio
+
+
+def test_lot_applique(biblio):
+    resultats = biblio.traiter_lot([("emprunt", "2010000010", "1"), {"op": "emprunt", "isbn": "2010000032", "id_membre": "1"}])
+    assert [r["statut"] for r in resultats] == ["ok", "ok"]
+    assert set(biblio.membres["1"].livres_empruntes) == {"2010000010", "2010000032"}
+
+
+def test_echec_annule_le_lot(biblio):
+    resultats = biblio.traiter_lot([("emprunt", "2010000010", "1"), ("emprunt", "2010000010", "3")])
+    assert [r["statut"] for r in resultats] == ["annule", "echec"]
+    assert "n'est pas disponible" in resultats[1]["message"]
+    assert biblio.livres["2010000010"].statut == "disponible"
+    assert not biblio.membres["1"].livres_empruntes
+
+
+@pytest.mark.parametrize("operation", [
+    ("emprunt", "2010000010"),
+    ("emprunt", "2010000010", "3", "en trop"),
+    42,
+    None,
+    {"op": "emprunt", "isbn": "2010000010"},
+    {"op": "emprunt", "isbn": ["2010000010"], "id_membre": "3"},
+])
+def test_operation_mal_formee(biblio, operation):
+    resultats = biblio.traiter_lot([("emprunt", "2010000032", "1"), operation])
+    assert [r["statut"] for r in resultats] == ["annule", "echec"]
+    assert resultats[1]["message"].startswith("Opération invalide")
+    assert not biblio.membres["1"].livres_empruntes
+    assert biblio.livres["2010000032"].statut == "disponible"
+
+
+def test_lot_mal_forme_par_http(biblio):
+    async def scenario():
+        serveur = ServeurAPI(biblio, port=0)
+        await serveur.demarrer()
+        try:
+            corps = json.dumps({"operations": [["emprunt", "2010000010", "1"], ["retour"]]}).encode()
+            return await serveur._repondre("POST", "/lot", corps)
+        finally:
+            for tache in serveur._taches:
+                tache.cancel()
+            serveur._serveur.close()
+
+    statut, reponse = asyncio.run(scenario())
+    assert statut == 409
+    assert [r["statut"] for r in reponse["resultats"]] == ["annule", "echec"]
@@ -0,0 +1,96 @@
+import asyncio
+import json
+from urllib.parse import quote
+
+import pytest
+
+from bibliotheque import Bibliotheque
+from serveur_api import ServeurAPI
+
+
+@pytest.fixture
+def biblio(donnees, capsys):
+    biblio = Bibliotheque(donnees, journal=True)
+    biblio.charger_tout()
+    return biblio
+
+
+def parcourir(page, **options):
+    """Tous les éléments d'une requête paginée, une page de 3 à la fois."""
+    elements, curseur = page(limite=3, **options)
+    while curseur is not None:
+        suite, curseur = page(curseur, limite=3, **options)
+        elements += suite
+    return elements
+
+
+def test_pages_stables_malgre_les_ajouts(biblio):
+    attendus = sorted(biblio.livres)
+    vus = []
+    page, curseur = biblio.page_livres(limite=4, tri="isbn")
+    while True:
+        vus += [livre.isbn for livre in page]
+        # Un livre ajouté avant le curseur ne décale pas les pages suivantes
+        biblio.ajouter_livre(f"0000{len(vus):06d}", "Ajout", "Auteur", 2000, "Roman")
+        if curseur is None:
+            break
+        page, curseur = biblio.page_livres(curseur, limite=4, tri="isbn")
+    assert vus == attendus
+
+
+def test_tri_des_membres(biblio):
+    noms = [membre.nom for membre in parcourir(biblio.page_membres, tri="nom")]
+    assert len(noms) == len(biblio.membres)
+    assert [m.id_membre for m in parcourir(biblio.page_membres, tri="id_membre")] == sorted(biblio.membres)
+
+
+def test_historique_chronologique_suit_les_ajouts(biblio):
+    tous = list(biblio.filtrer_historique(recents_d_abord=False))
+    vus, curseur = [], None
+    while True:
+        page, curseur = biblio.page_historique_chronologique(curseur, limite=5)
+        vus += page
+        if len(page) < 5:
+            break
+    assert vus == tous
+    biblio.emprunter("2010000010", "1")
+    biblio.retourner("2010000010", "1")
+    suite, curseur = biblio.page_historique_chronologique(curseur, limite=5)
+    assert [rec[3] for rec in suite] == ["emprunt", "retour"]
+    assert biblio.page_historique_chronologique(curseur, limite=5)[0] == []
+
+
+def test_historique_chronologique_filtre(biblio):
+    isbn = next(iter(biblio.filtrer_historique()))[1]
+    page, _ = biblio.page_historique_chronologique(limite=1000, isbn=isbn)
+    assert page == list(biblio.filtrer_historique(isbn=isbn, recents_d_abord=False))
+
+
+def test_api_curseurs(biblio):
+    async def scenario():
+        serveur = ServeurAPI(biblio, port=0)
+        await serveur.demarrer()
+        try:
+            isbns, curseur = [], None
+            while True:
+                cible = "/livres?taille=7" + (f"&curseur={quote(curseur)}" if curseur else "")
+                statut, reponse = await serveur._repondre("GET", cible, b"")
+                assert statut == 200
+                isbns += [livre["isbn"] for livre in reponse["livres"]]
+                curseur = reponse["curseur_suivant"]
+                if curseur is None:
+                    break
+            invalide = await serveur._repondre("GET", "/livres?curseur=xyz", b"")
+            historique = await serveur._repondre("GET", "/historique?taille=2", b"")
+            emprunt = await serveur._repondre("POST", "/emprunts", json.dumps({"isbn": "2010000010", "id_membre": "1"}).encode())
+            return isbns, invalide, historique, emprunt
+        finally:
+            for tache in serveur._taches:
+                tache.cancel()
+            serveur._serveur.close()
+
+    isbns, invalide, historique, emprunt = asyncio.run(scenario())
+    assert isbns == sorted(biblio.livres)
+    assert invalide[0] == 400
+    assert historique[0] == 200 and len(historique[1]["evenements"]) == 2 and historique[1]["curseur"]
+    assert emprunt[0] == 200 and biblio.livres["2010000010"].statut == "emprunté"
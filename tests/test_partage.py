@@ -0,0 +1,70 @@
+import multiprocessing
+
+import pytest
+
+from bibliotheque import ouvrir_bibliotheque
+from exceptions import LivreIndisponibleError
+from stockage_sqlite import migrer
+
+ISBN = "2010000043"
+
+
+@pytest.fixture(params=["texte", "sqlite"])
+def stockage(request, donnees, capsys):
+    if request.param == "sqlite":
+        migrer(donnees, donnees / "bibliotheque.db")
+    return request.param
+
+
+def ouvrir(donnees, stockage):
+    biblio = ouvrir_bibliotheque(donnees, stockage=stockage, partage=True, paresseux=True)
+    biblio.charger_tout()
+    return biblio
+
+
+def test_deux_postes_ne_pretent_pas_le_meme_exemplaire(donnees, stockage):
+    poste_a, poste_b = ouvrir(donnees, stockage), ouvrir(donnees, stockage)
+    assert poste_b.livres[ISBN].statut == "disponible"
+    poste_a.emprunter(ISBN, "4")
+    with pytest.raises(LivreIndisponibleError):
+        poste_b.emprunter(ISBN, "5")
+    assert [m.id_membre for m in ouvrir(donnees, stockage).emprunteurs_de(ISBN)] == ["4"]
+
+
+def test_reservation_servie_par_un_autre_poste(donnees, stockage):
+    poste_a, poste_b = ouvrir(donnees, stockage), ouvrir(donnees, stockage)
+    poste_a.emprunter(ISBN, "4")
+    poste_b.reserver(ISBN, "5")
+    poste_a.retourner(ISBN, "4")
+    assert poste_a.reservations.mise_de_cote(ISBN, "5") is not None
+    poste_b.synchroniser()
+    assert poste_b.livres[ISBN].statut == "réservé"
+    with pytest.raises(LivreIndisponibleError):
+        poste_b.emprunter(ISBN, "6")
+    poste_b.emprunter(ISBN, "5")
+    poste_a.synchroniser()
+    assert poste_a.livres[ISBN].statut == "emprunté"
+    assert poste_a.reservations.mises_de_cote(ISBN) == {}
+
+
+def _emprunter(donnees, stockage, id_membre, resultats):
+    biblio = ouvrir(donnees, stockage)
+    try:
+        biblio.emprunter(ISBN, id_membre)
+        resultats.put(id_membre)
+    except LivreIndisponibleError:
+        resultats.put(None)
+
+
+def test_processus_concurrents(donnees, stockage):
+    contexte = multiprocessing.get_context("spawn")
+    resultats = contexte.Queue()
+    processus = [contexte.Process(target=_emprunter, args=(donnees, stockage, str(i), resultats))
+                 for i in range(3, 9)]
+    for p in processus:
+        p.start()
+    gagnants = [resultats.get(timeout=60) for _ in processus]
+    for p in processus:
+        p.join(timeout=60)
+    assert len([g for g in gagnants if g is not None]) == 1
+    assert len(ouvrir(donnees, stockage).emprunteurs_de(ISBN)) == 1
@@ -0,0 +1,68 @@
+import pytest
+
+from bibliotheque import Bibliotheque
+from index_texte import IndexTexte
+
+
+@pytest.fixture
+def index():
+    index = IndexTexte({"titre": 3, "auteur": 2, "genre": 1})
+    index.ajouter("a", titre="Dune", auteur="Frank Herbert", genre="Science-fiction")
+    index.ajouter("b", titre="Herbier", auteur="Dune Martin", genre="Botanique")
+    index.ajouter("c", titre="Atlas", auteur="Anonyme", genre="Dune")
+    index.ajouter("d", titre="Dunes", auteur="Anonyme", genre="Voyage")
+    return index
+
+
+def test_classement_par_poids_des_champs(index):
+    # Titre exact (3 x 2) > auteur exact (2 x 2) > titre par préfixe (3) > genre exact (1 x 2)
+    assert index.chercher("dune") == ["a", "b", "d", "c"]
+    assert index.chercher("dune", champs=("titre",)) == ["a", "d"]
+
+
+def test_prefixes(index):
+    # a et d à égalité (titre par préfixe) : d, plus court, passe devant
+    assert index.chercher("dun") == ["d", "a", "b", "c"]
+    assert index.chercher("herb") == ["b", "a"]
+    assert index.chercher("zz") == []
+
+
+def test_termes_multiples_tous_requis(index):
+    # a : dune (titre exact, 6) + herbert (auteur, préfixe, 2) ; b : dune (auteur, 4) + herbier (titre, 3)
+    assert index.chercher("dune herb") == ["a", "b"]
+    # "dune" est aussi un préfixe de "dunes" (titre, 3) qui dépasse le genre exact (2)
+    assert index.chercher("DUNE anonyme") == ["d", "c"]
+    assert index.chercher("dune", limite=2) == ["a", "b"]
+
+
+def test_egalite_departagee_par_longueur(index):
+    index.ajouter("e", titre="Sable", auteur="Anonyme", genre="Voyage lointain")
+    # Même score : le document le plus court passe devant
+    assert index.chercher("anonyme") == ["c", "d", "e"]
+
+
+def test_vocabulaire_suit_ajouts_et_retraits(index):
+    assert index.chercher("herb") == ["b", "a"]
+    index.retirer("b")
+    index.ajouter("f", titre="Herbes folles", auteur="Anonyme", genre="Roman")
+    assert index.chercher("herb") == ["f", "a"]
+    index.retirer("a")
+    assert index.chercher("herb") == ["f"]
+    assert index.chercher("herbert") == []
+
+
+@pytest.mark.parametrize("options", [{}, {"paresseux": True}], ids=["texte", "paresseux"])
+def test_chercher_livres(donnees, capsys, options):
+    biblio = Bibliotheque(donnees, **options)
+    biblio.charger_tout()
+    # Sans accents ni majuscules, par préfixe
+    assert [l.isbn for l in biblio.chercher_livres("miserab")] == ["9782070612"]
+    assert {l.isbn for l in biblio.chercher_livres("harry potter")} == {"9780439139", "1234567891"}
+    # "J.K. Rowling" et "J.K.Rowling" donnent les mêmes jetons
+    assert {l.isbn for l in biblio.chercher_livres("rowl")} == {"9780439139", "1234567891"}
+    # Le titre l'emporte sur le genre
+    biblio.ajouter_livre("3000000001", "Thriller", "Anonyme", 2020, "Essai")
+    assert biblio.chercher_livres("thriller")[0].isbn == "3000000001"
+    assert len(biblio.chercher_livres("thriller")) == 4
+    biblio.supprimer_livre("3000000001")
+    assert [l.isbn for l in biblio.chercher_livres("thriller", limite=1)] != ["3000000001"]
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from bibliotheque import Bibliotheque
+from exceptions import LivreIndisponibleError, ReservationImpossibleError
+
+ISBN = "2010000043"
+
+
+def ouvrir(donnees):
+    biblio = Bibliotheque(donnees, journal=True)
+    biblio.charger_tout()
+    return biblio
+
+
+@pytest.fixture
+def prete(donnees, capsys):
+    """Le livre est emprunté par le membre 1, les membres 2 puis 3 le réservent."""
+    biblio = ouvrir(donnees)
+    biblio.emprunter(ISBN, "1")
+    assert biblio.reserver(ISBN, "2") == 1
+    assert biblio.reserver(ISBN, "3") == 2
+    return biblio
+
+
+def test_reserver_un_livre_disponible_est_refuse(donnees, capsys):
+    with pytest.raises(ReservationImpossibleError):
+        ouvrir(donnees).reserver(ISBN, "2")
+
+
+def test_double_reservation_refusee(prete):
+    with pytest.raises(ReservationImpossibleError):
+        prete.reserver(ISBN, "2")
+    with pytest.raises(ReservationImpossibleError):
+        prete.reserver(ISBN, "1")
+
+
+def test_retour_met_de_cote_pour_le_premier_de_la_file(prete):
+    prete.retourner(ISBN, "1")
+    assert prete.livres[ISBN].statut == "réservé"
+    assert prete.disponibilite(ISBN) == (0, 1)
+    assert [m for m, _ in prete.file_attente(ISBN)] == ["3"]
+    (isbn, rang, limite), = prete.reservations_de("2")
+    assert (isbn, rang) == (ISBN, None) and limite
+    # Seul le réservataire peut l'emprunter
+    with pytest.raises(LivreIndisponibleError):
+        prete.emprunter(ISBN, "3")
+    prete.emprunter(ISBN, "2")
+    assert prete.livres[ISBN].statut == "emprunté"
+    assert prete.reservations_de("2") == []
+
+
+def test_annulation_passe_au_suivant(prete):
+    prete.retourner(ISBN, "1")
+    prete.annuler_reservation(ISBN, "2")
+    assert prete.livres[ISBN].statut == "réservé"
+    assert prete.reservations_de("3")[0][1] is None
+    prete.annuler_reservation(ISBN, "3")
+    assert prete.livres[ISBN].statut == "disponible"
+    assert prete.disponibilite(ISBN) == (1, 1)
+
+
+def test_mise_de_cote_expiree(donnees, capsys):
+    # Délai négatif : la mise de côté est déjà expirée le jour du retour
+    (donnees / "regles_pret.json").write_text(json.dumps({"delai_reservation": -1}), encoding="utf-8")
+    biblio = ouvrir(donnees)
+    biblio.emprunter(ISBN, "1")
+    biblio.reserver(ISBN, "2")
+    biblio.reserver(ISBN, "3")
+    biblio.retourner(ISBN, "1")
+    assert biblio.expirer_reservations() == [(ISBN, "2")]
+    assert biblio.reservations_de("2") == []
+    # Le suivant a eu son tour, lui aussi déjà expiré
+    assert biblio.expirer_reservations() == [(ISBN, "3")]
+    assert biblio.livres[ISBN].statut == "disponible"
+
+
+def test_nouvel_exemplaire_sert_la_file(prete):
+    prete.ajouter_exemplaires(ISBN)
+    assert prete.disponibilite(ISBN) == (0, 2)
+    assert prete.reservations_de("2")[0][1] is None
+    assert [m for m, _ in prete.file_attente(ISBN)] == ["3"]
+
+
+def test_files_rechargees(prete, donnees):
+    prete.retourner(ISBN, "1")
+    prete.sauvegarder_tout()
+    relue = ouvrir(donnees)
+    assert relue.livres[ISBN].statut == "réservé"
+    assert [m for m, _ in relue.file_attente(ISBN)] == ["3"]
+    relue.emprunter(ISBN, "2")
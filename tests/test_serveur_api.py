@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+import pytest
+
+from bibliotheque import ouvrir_bibliotheque
+from serveur_api import ServeurAPI
+from stockage_sqlite import migrer
+
+ISBN = "2010000010"
+
+
+@pytest.fixture(params=["texte", "sqlite"])
+def serveur(request, donnees, capsys):
+    if request.param == "sqlite":
+        migrer(donnees, donnees / "bibliotheque.db")
+    biblio = ouvrir_bibliotheque(donnees, stockage=request.param, partage=True)
+    biblio.charger_tout()
+    serveur = ServeurAPI(biblio, port=0)
+    yield serveur
+    serveur.fermer()
+
+
+def bloquer_lot(serveur):
+    """Arrête l'écrivain au milieu du lot (emprunt appliqué, non validé) jusqu'à libération."""
+    dans_lot, liberer = threading.Event(), threading.Event()
+    historiser = serveur.biblio._historiser
+
+    def suspendu(*args):
+        dans_lot.set()
+        liberer.wait(5)
+        historiser(*args)
+
+    serveur.biblio._historiser = suspendu
+    ecrivain = threading.Thread(target=serveur._appliquer, args=([([("emprunt", ISBN, "1")], True, None)],))
+    ecrivain.start()
+    assert dans_lot.wait(5)
+    return ecrivain, liberer
+
+
+def test_lecture_pendant_un_lot(serveur):
+    ecrivain, liberer = bloquer_lot(serveur)
+    lectures = []
+    lecteur = threading.Thread(target=lambda: lectures.append(serveur._lire_isole(["livres", ISBN], {})))
+    lecteur.start()
+    lecteur.join(0.3)
+    if serveur.lecteur is serveur.biblio:
+        # Texte : la lecture attend la fin du lot au lieu de voir un état intermédiaire
+        assert lectures == []
+    else:
+        # SQLite : la connexion des lectures ne voit que l'état validé
+        assert [l["statut"] for l in lectures] == ["disponible"]
+    liberer.set()
+    ecrivain.join(5)
+    lecteur.join(5)
+    assert serveur._lire_isole(["livres", ISBN], {})["statut"] == "emprunté"
+
+
+def test_lecture_apres_emprunt_http(serveur):
+    async def scenario():
+        await serveur.demarrer()
+        try:
+            emprunt = await serveur._repondre("POST", "/emprunts", b'{"isbn": "2010000010", "id_membre": "1"}')
+            fiche = await serveur._repondre("GET", f"/livres/{ISBN}", b"")
+            membre = await serveur._repondre("GET", "/membres?nom=Youssef", b"")
+            inconnu = await serveur._repondre("GET", "/livres/0000", b"")
+            return emprunt, fiche, membre, inconnu
+        finally:
+            for tache in serveur._taches:
+                tache.cancel()
+            serveur._serveur.close()
+
+    emprunt, fiche, membre, inconnu = asyncio.run(scenario())
+    assert emprunt[0] == 200
+    assert fiche == (200, {**fiche[1], "statut": "emprunté"})
+    assert ISBN in membre[1]["membres"][0]["emprunts"]
+    assert inconnu[0] == 404
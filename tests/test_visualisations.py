@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("matplotlib")
+
+import visualisations as vis
+from bibliotheque import Bibliotheque
+from statistiques import Statistiques
+
+
+def test_activite_calme_tracee_a_zero(tmp_path):
+    stats = Statistiques()
+    # Emprunts anciens seulement : les 30 derniers jours sont à zéro, la courbe est tracée
+    stats.enregistrer("2000-01-01", "1", "1", "emprunt")
+    donnees = (stats.nb_emprunts, stats.activite())
+    assert not any(donnees[1][1])
+    assert vis.rendre_graphique("activite", donnees, tmp_path) is not None
+    # Aucun emprunt du tout : rien à tracer
+    assert vis.rendre_graphique("activite", (0, Statistiques().activite()), tmp_path) is None
+
+
+@pytest.fixture
+def biblio(donnees, capsys):
+    biblio = Bibliotheque(donnees, journal=True)
+    biblio.charger_tout()
+    return biblio
+
+
+def test_cache_sans_redessiner(biblio, tmp_path, monkeypatch):
+    rendus = vis.rendre_rapports(biblio, tmp_path, ("png", "svg"))
+    assert all(chemin is not None and chemin.exists() for chemin in rendus.values())
+
+    def interdit(fig, donnees):
+        raise AssertionError("graphique redessiné")
+
+    # Données inchangées : les mêmes fichiers, sans rien tracer
+    for nom in vis.GRAPHIQUES:
+        monkeypatch.setitem(vis.GRAPHIQUES, nom, (interdit, None))
+    assert vis.rendre_rapports(biblio, tmp_path, ("png", "svg")) == rendus
+
+
+def test_nouvelles_donnees_remplacent_l_image(biblio, tmp_path):
+    avant = vis.rendre_rapports(biblio, tmp_path)
+    biblio.ajouter_livre("3000000001", "Nouveau", "Auteur Nouveau", 2020, "Genre nouveau")
+    biblio.emprunter("3000000001", "1")
+    apres = vis.rendre_rapports(biblio, tmp_path)
+    for nom in vis.GRAPHIQUES:
+        cle = (nom, "png")
+        assert apres[cle] != avant[cle]
+        # Une seule image par graphique : l'ancienne version est supprimée
+        assert not avant[cle].exists()
+        assert list(tmp_path.glob(f"{nom}-*.png")) == [apres[cle]]
+    # Retour à des données déjà vues : même fichier qu'à l'origine
+    biblio.retourner("3000000001", "1")
+    biblio.supprimer_livre("3000000001")
+    assert vis.rendre_graphique("genres", vis.donnees_graphique(biblio, "genres"), tmp_path) == avant["genres", "png"]
+
+
+def test_format_inconnu(tmp_path):
+    with pytest.raises(ValueError):
+        vis.rendre_graphique("genres", ([], []), tmp_path, format="gif")